@@ -70,7 +70,7 @@ from app.core.config import (  # noqa: E402
     STATE_LOCK_FRAMES,
     STATE_UNLOCK_FRAMES,
 )
-from services.yolo_detector import detect_cars_in_region, detect_cars_on_image, extract_vehicle_features, preload_model  # noqa: E402
+from services.yolo_detector import detect_cars_in_region, detect_cars_on_image, extract_vehicle_features, iou_matrix, preload_model  # noqa: E402
 import json
 import cv2
 import numpy as np
@@ -129,29 +129,7 @@ def _calculate_iou(box1: Tuple[int, int, int, int], box2: Tuple[int, int, int, i
     返回:
         IoU值（0.0-1.0）
     """
-    x1_1, y1_1, x2_1, y2_1 = box1
-    x1_2, y1_2, x2_2, y2_2 = box2
-    
-    # 计算交集
-    x1_i = max(x1_1, x1_2)
-    y1_i = max(y1_1, y1_2)
-    x2_i = min(x2_1, x2_2)
-    y2_i = min(y2_1, y2_2)
-    
-    if x2_i <= x1_i or y2_i <= y1_i:
-        return 0.0
-    
-    intersection = (x2_i - x1_i) * (y2_i - y1_i)
-    
-    # 计算并集
-    area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-    area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-    union = area1 + area2 - intersection
-    
-    if union == 0:
-        return 0.0
-    
-    return intersection / union
+    return float(iou_matrix(np.array([box1]), np.array([box2]))[0, 0])
 
 
 def _detect_space_occupancy(
@@ -216,26 +194,34 @@ def _detect_space_occupancy(
     
     print(f"[ParkingChangeWorker] 整图检测到 {len(car_boxes)} 个车辆对象")
     
-    # 对每个车位，计算与检测框的IoU
-    for space in spaces:
+    # 一次性计算所有车位与所有检测框的IoU矩阵（车位坐标格式：[x, y, width, height]，转换为 xyxy）
+    space_boxes = np.array(
+        [
+            (int(sp.bbox_x1), int(sp.bbox_y1), int(sp.bbox_x1) + max(1, int(sp.bbox_x2)), int(sp.bbox_y1) + max(1, int(sp.bbox_y2)))
+            for sp in spaces
+        ],
+        dtype=np.float64,
+    )
+    car_boxes_xyxy = np.array(
+        [(c["x1"], c["y1"], c["x2"], c["y2"]) for c in car_boxes],
+        dtype=np.float64,
+    )
+    ious = iou_matrix(space_boxes, car_boxes_xyxy)
+    
+    # 对每个车位，查找IoU最大的检测框
+    for space_idx, space in enumerate(spaces):
         # 车位坐标格式：[x, y, width, height]
         x = int(space.bbox_x1)
         y = int(space.bbox_y1)
         w = max(1, int(space.bbox_x2))
         h = max(1, int(space.bbox_y2))
         
-        # 转换为 (x1, y1, x2, y2) 格式用于IoU计算
-        space_box = (x, y, x + w, y + h)
-        
         # 查找与该车位IoU最大的车辆检测框
         best_iou = 0.0
         best_confidence = 0.0
         best_car_box = None
         
-        for car_box in car_boxes:
-            car_box_xyxy = (car_box["x1"], car_box["y1"], car_box["x2"], car_box["y2"])
-            iou = _calculate_iou(space_box, car_box_xyxy)
-            
+        for car_box, iou in zip(car_boxes, ious[space_idx].tolist()):
             if iou > best_iou:
                 best_iou = iou
                 best_confidence = car_box["confidence"]
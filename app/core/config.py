@@ -30,8 +30,9 @@ HLS_PROCS: Dict[str, subprocess.Popen] = {}
 from schemas.tasks import TaskSegment
 TASK_STORE: Dict[str, List[TaskSegment]] = {}
 
-# 运行中的任务键
-RUNNING_KEYS: set[str] = set()
+# 运行中的任务键 -> 开始运行的时间戳
+# 检查并占用通过 dict.setdefault 一步完成（GIL 下原子），无需额外加锁
+RUNNING_KEYS: dict[str, float] = {}
 
 # 并发控制（从根目录 config.py 读取，支持环境变量配置）
 # 如果根目录 config.py 存在，则使用其配置；否则使用默认值
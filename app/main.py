@@ -154,6 +154,8 @@ from services.screenshot import capture_frame  # noqa: E402
 
 # OCR功能已移除
 from app.services.image_service import ImageService  # noqa: E402
+from app.repositories.task_repository import TaskRepository  # noqa: E402
+from utils.task_utils import is_task_running, remove_running_key, try_add_running_key  # noqa: E402
 from services.stream_check import check_rtsp  # noqa: E402
 from services.stream_hls import start_hls, probe_rtsp  # noqa: E402
 
@@ -243,7 +245,6 @@ app.mount("/hls", StaticFiles(directory=HLS_BASE), name="hls")
 HLS_PROCS: Dict[str, subprocess.Popen] = {}
 
 TASK_STORE: Dict[str, List[TaskSegment]] = {}
-RUNNING_KEYS: set[str] = set()
 
 # 从配置中读取并发限制（支持环境变量配置）
 MAX_COMBO_CONCURRENCY = settings.MAX_COMBO_CONCURRENCY  # 全局并发：同时运行多少个通道组合（日期+IP+通道）
@@ -319,14 +320,15 @@ def _load_tasks_to_store_from_db(date: str, base_rtsp: str, channel: str):
 def _run_combo_async(run_req: RunTaskRequest):
     """独立线程执行一个通道组合的任务，使用全局并发限制。"""
     key = _make_task_key(run_req.date, run_req.base_rtsp, run_req.channel)
-    if key in RUNNING_KEYS:
+    # 先原子地占用任务键，再申请并发名额，避免两个线程同时通过“是否在运行”检查而重复启动
+    if not try_add_running_key(key):
         print(f"[INFO] 任务组合已在运行中: {key}")
         return
     acquired = COMBO_SEM.acquire(blocking=False)
     if not acquired:
+        remove_running_key(key)
         print(f"[WARN] 并发已达上限({MAX_COMBO_CONCURRENCY})，暂不启动: {key}")
         return
-    RUNNING_KEYS.add(key)
     try:
         # 确保 TASK_STORE 有数据
         loaded = _load_tasks_to_store_from_db(run_req.date, run_req.base_rtsp, run_req.channel)
@@ -341,7 +343,7 @@ def _run_combo_async(run_req: RunTaskRequest):
             )
         _process_run(run_req)
     finally:
-        RUNNING_KEYS.discard(key)
+        remove_running_key(key)
         COMBO_SEM.release()
 
 
@@ -367,7 +369,7 @@ def start_pending_runner():
                 combos = list({c for c in combos})
                 for date, base_rtsp, channel in combos:
                     key = _make_task_key(date, base_rtsp, channel)
-                    if key in RUNNING_KEYS:
+                    if is_task_running(key):
                         continue
                     run_req = RunTaskRequest(
                         date=date,
@@ -531,6 +533,8 @@ def ensure_tasks(req: TaskCreateRequest) -> TaskCreateResponse:
             )
             added_count += 1
         db.commit()
+        # 新日期/IP/通道需要立即出现在下拉列表中
+        TaskRepository.clear_distinct_cache()
         print(f"[INFO] 已添加 {added_count} 个新任务 - 日期: {req.date}, 通道: {req.channel}")
         
         # 验证：检查同日期所有任务数量
@@ -1169,6 +1173,7 @@ def delete_config_tasks(
         db.query(Screenshot).filter(Screenshot.task_id.in_(task_ids)).delete(synchronize_session=False)
         db.query(Task).filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
         db.commit()
+        TaskRepository.clear_distinct_cache()
         
         return {
             "message": f"已删除 {len(tasks)} 个任务及其关联数据",
@@ -1224,6 +1229,7 @@ def delete_task(task_id: int):
             # 删除任务
             db.delete(task)
             db.commit()
+            TaskRepository.clear_distinct_cache()
             print(f"[INFO] 任务 {task_id} 及其关联数据已成功删除")
             
             return {"message": "任务及其关联数据已删除", "task_id": task_id}
@@ -2662,6 +2668,7 @@ def _clear_date_data(db, date: str, base_rtsp: Optional[str] = None, channel: Op
     print(f"[INFO] 已删除 {task_count} 个任务记录")
     
     db.commit()
+    TaskRepository.clear_distinct_cache()
     print(f"[INFO] 清理完成 - 共清理 {len(task_ids)} 个任务及其关联数据")
 
 
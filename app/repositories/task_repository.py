@@ -1,12 +1,17 @@
 """任务数据访问层（Repository Pattern）"""
-from typing import List, Optional, Dict, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
+from typing import Iterator, List, Optional, Dict, Tuple
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, and_, func
 from datetime import datetime
+import os
 import re
 
 from models import Task, Screenshot
 from schemas.tasks import TaskSegment
+from utils.simple_cache import ttl_cache
+
+# 可用日期 / IP / 通道列表的缓存时间（秒），设为 0 关闭缓存
+DISTINCT_CACHE_TTL = float(os.getenv("TASK_DISTINCT_CACHE_TTL", "30"))
 
 
 class TaskRepository:
@@ -97,6 +102,7 @@ class TaskRepository:
         task = Task(**task_data)
         self.db.add(task)
         self.db.commit()
+        self.clear_distinct_cache()
         self.db.refresh(task)
         return task
     
@@ -105,6 +111,7 @@ class TaskRepository:
         tasks = [Task(**data) for data in tasks_data]
         self.db.bulk_save_objects(tasks)
         self.db.commit()
+        self.clear_distinct_cache()
         return tasks
     
     def update(self, task: Task, **kwargs) -> Task:
@@ -112,6 +119,8 @@ class TaskRepository:
         for key, value in kwargs.items():
             setattr(task, key, value)
         self.db.commit()
+        if kwargs.keys() & {"start_ts", "ip", "channel", "rtsp_url"}:
+            self.clear_distinct_cache()
         self.db.refresh(task)
         return task
     
@@ -121,6 +130,7 @@ class TaskRepository:
         if task:
             self.db.delete(task)
             self.db.commit()
+            self.clear_distinct_cache()
             return True
         return False
     
@@ -128,30 +138,66 @@ class TaskRepository:
         """批量删除任务"""
         count = self.db.query(Task).filter(Task.id.in_(task_ids)).delete(synchronize_session=False)
         self.db.commit()
+        self.clear_distinct_cache()
         return count
     
+    @staticmethod
+    def clear_distinct_cache() -> None:
+        """任务增删或关键字段变更后，立即失效可用日期 / IP / 通道列表的缓存"""
+        TaskRepository.get_available_dates.cache_clear()
+        TaskRepository.get_available_ips.cache_clear()
+        TaskRepository.get_available_channels.cache_clear()
+    
     # ==================== 查询操作 ====================
     
-    def get_pending_or_playing_tasks(self) -> List[Task]:
-        """获取待运行或运行中的任务"""
+    def get_pending_or_playing_tasks(self, load_batch: bool = False) -> List[Task]:
+        """
+        获取待运行或运行中的任务
+        
+        Args:
+            load_batch: 是否预加载所属批次（task.batch），遍历时需要批次状态的调用方应开启，
+                        用一次 IN 查询取回全部批次，避免逐个任务懒加载
+        """
+        query = self._pending_or_playing_query()
+        if load_batch:
+            query = query.options(selectinload(Task.batch))
+        return query.all()
+    
+    def iter_pending_or_playing_tasks(self, batch_size: int = 500) -> Iterator[Task]:
+        """
+        逐批迭代待运行或运行中的任务（服务端游标流式读取，内存占用与总行数无关）
+        
+        注意：迭代结束前，同一会话上的连接被流式游标占用（MySQL 非缓冲游标），
+        不要在遍历过程中用同一个 db 会话执行其他查询；需要边遍历边更新时请先收集 ID 再批量更新。
+        
+        Args:
+            batch_size: 每批从数据库取回的行数
+        """
+        yield from self._pending_or_playing_query().yield_per(batch_size)
+    
+    def _pending_or_playing_query(self):
+        """待运行或运行中且尚无截图的任务查询"""
         return (
             self.db.query(Task)
             .filter(Task.status.in_(["pending", "playing"]))
             .filter((Task.screenshot_path.is_(None)) | (Task.screenshot_path == ""))
-            .all()
         )
     
     def get_failed_tasks_for_retry(
         self, 
         max_retry_count: int = 3,
-        current_time: Optional[datetime] = None
+        current_time: Optional[datetime] = None,
+        load_batch: bool = False
     ) -> List[Task]:
-        """获取需要重试的失败任务"""
+        """获取需要重试的失败任务（load_batch 同 get_pending_or_playing_tasks）"""
         if current_time is None:
             current_time = datetime.utcnow()
         
+        query = self.db.query(Task)
+        if load_batch:
+            query = query.options(selectinload(Task.batch))
         return (
-            self.db.query(Task)
+            query
             .filter(Task.status == "failed")
             .filter(Task.retry_count < max_retry_count)
             .filter(Task.next_retry_at.isnot(None))
@@ -252,23 +298,27 @@ class TaskRepository:
             like_expr = f"%{rtsp_url_like.strip()}%"
             query = query.filter(Task.rtsp_url.ilike(like_expr))
         
-        # 获取总数
-        total = query.count()
-        
         # 排序
         if order_by_index_desc:
-            query = query.order_by(Task.index.desc())
+            paged = query.order_by(Task.index.desc())
         else:
-            query = query.order_by(Task.index)
+            paged = query.order_by(Task.index)
         
         # 分页
         if offset is not None:
-            query = query.offset(offset)
+            paged = paged.offset(offset)
         if limit is not None:
-            query = query.limit(limit)
+            paged = paged.limit(limit)
         
-        return query.all(), total
+        # 总数通过窗口函数 COUNT(*) OVER () 随分页结果一并返回（窗口在 LIMIT 之前计算），一次查询完成
+        rows = paged.add_columns(func.count().over().label("_total")).all()
+        if rows:
+            return [task for task, _ in rows], rows[0][1]
+        # 当前页没有数据：偏移量超出范围时仍需单独统计总数
+        total = query.count() if offset else 0
+        return [], total
     
+    @ttl_cache(DISTINCT_CACHE_TTL, method=True)
     def get_available_dates(self) -> List[str]:
         """获取所有可用的日期列表"""
         dates_set = set()
@@ -283,6 +333,7 @@ class TaskRepository:
                     continue
         return sorted(list(dates_set), reverse=True)
     
+    @ttl_cache(DISTINCT_CACHE_TTL, method=True)
     def get_available_ips(self) -> List[str]:
         """获取所有可用的 IP 地址列表"""
         ips_set = set()
@@ -297,6 +348,7 @@ class TaskRepository:
                     ips_set.add(match.group(1))
         return sorted(list(ips_set))
     
+    @ttl_cache(DISTINCT_CACHE_TTL, method=True)
     def get_available_channels(self) -> List[str]:
         """获取所有可用的通道列表"""
         channels_set = set()
@@ -340,18 +392,19 @@ class TaskRepository:
         Returns:
             更新的任务数量
         """
-        stale_tasks = self.get_tasks_with_screenshot_but_not_completed()
-        if not stale_tasks:
-            return 0
-        
-        count = 0
-        for task in stale_tasks:
-            task.status = "completed"
-            task.error = None
-            task.next_retry_at = None
-            count += 1
-        
-        self.db.commit()
+        # 单条 UPDATE 批量纠正，不再逐条加载 ORM 对象再修改（提交时会使会话中的对象过期，随后读取会重新加载）
+        count = (
+            self.db.query(Task)
+            .filter(Task.screenshot_path.isnot(None))
+            .filter(Task.screenshot_path != "")
+            .filter(Task.status != "completed")
+            .update(
+                {"status": "completed", "error": None, "next_retry_at": None},
+                synchronize_session=False
+            )
+        )
+        if count:
+            self.db.commit()
         return count
     
     def get_task_with_screenshot(
@@ -1,12 +1,14 @@
 """图片业务逻辑层（Service Pattern）"""
 from typing import List, Optional, Dict, Tuple, Set
 from pathlib import Path
+import os
 import re
 from sqlalchemy.orm import Session
 from sqlalchemy import tuple_
 
 from app.repositories.image_repository import ImageRepository
 from app.core.config import SCREENSHOT_BASE
+from utils.path_utils import _lexical_rel, scan_dir_files
 from models import Task, Screenshot, ParkingChangeSnapshot
 
 
@@ -17,13 +19,20 @@ class ImageService:
         self.db = db
         self.repository = ImageRepository(db)
     
-    def build_image_url(self, p: Path, prefer_detected: bool = False) -> Tuple[str, bool]:
+    def build_image_url(
+        self,
+        p: Path,
+        prefer_detected: bool = False,
+        dir_cache: Optional[Dict[str, Dict[str, os.DirEntry]]] = None,
+    ) -> Tuple[str, bool]:
         """
         构造图片可访问 URL；如果文件缺失，标记 missing。
         
         参数:
             p: 图片路径
             prefer_detected: 如果为 True，优先返回 _detected.jpg 的URL（如果存在）
+            dir_cache: 列表接口逐行调用时传入同一个字典，按目录缓存 os.scandir 结果，
+                       同一目录下的图片只扫描一次目录，不再逐个 stat
         
         返回: (url, missing)
         """
@@ -31,22 +40,46 @@ class ImageService:
         if not p.is_absolute():
             p = SCREENSHOT_BASE / p
         
+        files = None
+        if dir_cache is not None:
+            parent = str(p.parent)
+            files = dir_cache.get(parent)
+            if files is None:
+                files = dir_cache[parent] = scan_dir_files(parent)
+        
         # 如果优先使用 _detected.jpg，先检查是否存在
         if prefer_detected:
             detected_path = p.parent / f"{p.stem}_detected{p.suffix}"
-            if detected_path.exists():
+            if files is not None:
+                has_detected = detected_path.name in files
+            else:
+                has_detected = detected_path.exists()
+            if has_detected:
                 p = detected_path
         
-        # 如果文件不存在且可能是相对路径，尝试再次拼接
-        missing = not p.exists()
+        if files is not None:
+            # 存在性与修改时间都取自目录扫描结果；截图目录下的路径按字符串前缀求相对路径，
+            # 不再 resolve()（realpath 会对每一级目录做 lstat）
+            entry = files.get(p.name)
+            missing = entry is None
+            rel = _lexical_rel(str(p))
+        else:
+            entry = None
+            missing = not p.exists()
+            rel = None
+        
         try:
-            abs_path = p.resolve()
-            rel = abs_path.relative_to(SCREENSHOT_BASE)
+            if rel is None:
+                # 相对路径无法按前缀判断（如经过符号链接），解析后再判断是否在截图目录下
+                rel = p.resolve().relative_to(SCREENSHOT_BASE).as_posix()
 
             # 为了避免浏览器缓存旧图片（同一路径下内容被更新），
             # 将文件最后修改时间作为版本号附加到 URL 查询参数中。
-            version = int(abs_path.stat().st_mtime) if abs_path.exists() else 0
-            url = f"/shots/{rel.as_posix()}"
+            if files is not None:
+                version = int(entry.stat().st_mtime) if entry is not None else 0
+            else:
+                version = int(p.stat().st_mtime) if not missing else 0
+            url = f"/shots/{rel}"
             if version:
                 url = f"{url}?v={version}"
             return url, missing
@@ -294,7 +327,8 @@ class ImageService:
             if channel_filter_val.startswith("/"):
                 channel_filter_val = channel_filter_val.strip("/")
         
-        # 构建返回项
+        # 构建返回项（同一目录只扫描一次，判断文件是否存在及取修改时间）
+        dir_cache: Dict[str, Dict[str, os.DirEntry]] = {}
         for t in tasks:
             shot = screenshot_dict.get(t.id)
             # OCR功能已移除
@@ -306,7 +340,7 @@ class ImageService:
             # 处理截图信息
             if shot:
                 p = Path(shot.file_path)
-                url, missing_val = self.build_image_url(p)
+                url, missing_val = self.build_image_url(p, dir_cache=dir_cache)
                 name = p.name
                 path = str(p)
                 if missing_val:
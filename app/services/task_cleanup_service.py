@@ -52,6 +52,7 @@ class TaskCleanupService:
         self.db.query(Screenshot).filter(Screenshot.task_id == task_id).delete(synchronize_session=False)
         self.db.delete(task)
         self.db.commit()
+        TaskRepository.clear_distinct_cache()
         
         return True
     
@@ -116,6 +117,7 @@ class TaskCleanupService:
         if batch_ids:
             self.db.query(TaskBatch).filter(TaskBatch.id.in_(batch_ids)).delete(synchronize_session=False)
         self.db.commit()
+        TaskRepository.clear_distinct_cache()
         
         return {
             "message": f"已删除 {len(tasks)} 个任务及其关联数据",
@@ -215,5 +217,6 @@ class TaskCleanupService:
             print(f"[INFO] 已删除 {deleted_batches} 个任务批次记录")
 
         self.db.commit()
+        TaskRepository.clear_distinct_cache()
         print(f"[INFO] 清理完成 - 共清理 {len(task_ids)} 个任务及其关联数据")
 
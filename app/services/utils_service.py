@@ -19,6 +19,7 @@ from app.core.config import (
 )
 from services.stream_hls import start_hls, probe_rtsp
 from db import SessionLocal, engine, Base
+from app.repositories.task_repository import TaskRepository
 from models import (
     Task,
     Screenshot,
@@ -189,6 +190,7 @@ class UtilsService:
             db.query(AutoScheduleRule).delete(synchronize_session=False)
             
             db.commit()
+            TaskRepository.clear_distinct_cache()
         except Exception as e:
             db.rollback()
             print(f"[ERROR] 清空数据库失败: {e}")
@@ -0,0 +1,97 @@
+"""YOLO 推理微批处理队列
+
+说明：
+- 各检测线程独立调用 detect_cars_on_image 时，每次调用都是一次单独的 GPU 推理；
+- 本模块在检测器前放置一个生产者/消费者队列：调用方线程完成解码、夜间增强等预处理后，
+  把 (图像, 推理置信度, Future) 放入队列；
+- 单个推理线程最多凑齐 YOLO_BATCH_SIZE 张图，或在等待 YOLO_MAX_BATCH_DELAY_MS 毫秒后立即发车，
+  调用一次 model.predict 完成整批推理，再把每张图的结果写回对应的 Future。
+
+通过环境变量 YOLO_BATCH_ENABLED=1 开启，默认关闭（保持原有逐张推理路径）。
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Tuple
+
+import numpy as np
+
+# 是否启用微批处理
+BATCH_ENABLED = os.getenv("YOLO_BATCH_ENABLED", "0") == "1"
+# 单批最多包含的图片数
+BATCH_SIZE = max(1, int(os.getenv("YOLO_BATCH_SIZE", "4")))
+# 凑批最长等待时间（毫秒），超时后即使未满也立即推理
+MAX_BATCH_DELAY_MS = float(os.getenv("YOLO_MAX_BATCH_DELAY_MS", "10"))
+
+_request_queue: "queue.Queue[Tuple[np.ndarray, float, Future]]" = queue.Queue()
+_batcher_started = False
+_start_lock = threading.Lock()
+
+
+def _collect_batch() -> List[Tuple[np.ndarray, float, Future]]:
+    """阻塞等待第一个请求，然后在最大延迟内尽量凑满一批。"""
+    batch = [_request_queue.get()]
+    deadline = time.monotonic() + MAX_BATCH_DELAY_MS / 1000.0
+    while len(batch) < BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_request_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _batcher_loop() -> None:
+    """推理线程主循环：只做 GPU 推理，预处理全部在调用方线程完成。"""
+    # 延迟导入，避免与 yolo_detector 循环依赖
+    from services.yolo_detector import PREDICT_IMGSZ, _load_model, inference_context
+
+    model = None
+    print(f"[YOLOBatcher] 推理线程已启动 (batch_size={BATCH_SIZE}, max_delay={MAX_BATCH_DELAY_MS}ms)")
+    while True:
+        batch = _collect_batch()
+        images = [item[0] for item in batch]
+        # 整批使用最低的置信度推理，调用方会按各自阈值做后处理过滤
+        conf = min(item[1] for item in batch)
+        try:
+            if model is None:
+                model = _load_model()
+            with inference_context():
+                results = model.predict(images, imgsz=PREDICT_IMGSZ, conf=conf, verbose=False)
+        except Exception as e:  # noqa: BLE001
+            # 单批失败只影响本批请求，不中断推理线程
+            print(f"[YOLOBatcher] 批量推理失败 (batch={len(batch)}): {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            continue
+
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def _ensure_started() -> None:
+    """启动全局唯一的推理线程。"""
+    global _batcher_started
+    if _batcher_started:
+        return
+    with _start_lock:
+        if _batcher_started:
+            return
+        thread = threading.Thread(target=_batcher_loop, name="yolo-batcher", daemon=True)
+        thread.start()
+        _batcher_started = True
+
+
+def submit(image: np.ndarray, conf: float) -> "Future[Any]":
+    """提交一张已预处理的 BGR 图像，返回对应单张 Results 的 Future。"""
+    _ensure_started()
+    future: "Future[Any]" = Future()
+    _request_queue.put((image, conf, future))
+    return future
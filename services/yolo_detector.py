@@ -8,31 +8,49 @@
 
 from __future__ import annotations
 
+import contextlib
+import functools
+import hashlib
+import logging
 import os
 import sys
 import shutil
-import subprocess
-import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import cv2
 import numpy as np
 
-# 在导入 ultralytics 之前设置环境变量，避免 git 检测问题
-# 检查 git 是否可用
-_git_available = False
 try:
-    subprocess.run(["git", "--version"], capture_output=True, check=True, timeout=2)
-    _git_available = True
-except (FileNotFoundError, subprocess.TimeoutExpired, subprocess.CalledProcessError):
-    _git_available = False
+    from turbojpeg import TurboJPEG, TJPF_BGR
+
+    _TURBO_JPEG = TurboJPEG()
+except Exception:  # pragma: no cover - optional dependency (ImportError / 缺少 libturbojpeg)
+    _TURBO_JPEG = None
+
+from services import yolo_batcher, yolo_server
+
+# 在导入 ultralytics 之前设置环境变量，避免 git 检测问题
+# 检查 git 是否可用（只查找可执行文件，不启动子进程）
+_git_available = shutil.which("git") is not None
 
 # 如果 git 不可用，设置环境变量跳过 git 检测
 if not _git_available:
     os.environ.setdefault("YOLO_SKIP_GIT_CHECK", "1")
     os.environ.setdefault("ULTRALYTICS_SKIP_GIT", "1")
-    # 尝试设置 ultralytics 内部使用的环境变量
-    os.environ.setdefault("YOLO_VERBOSE", "False")
+# 关闭 ultralytics 的启动/推理日志输出
+os.environ.setdefault("YOLO_VERBOSE", "False")
+
+# 每个检测 worker 可用的 CPU 线程数：多个 worker 并行时按核数平分，避免线程池超额订阅
+# 需在导入 torch 之前设置 OMP_NUM_THREADS 才能生效
+YOLO_WORKERS = max(1, int(os.getenv("YOLO_WORKERS", "4")))
+TORCH_NUM_THREADS = max(1, (os.cpu_count() or 4) // YOLO_WORKERS)
+os.environ.setdefault("OMP_NUM_THREADS", str(TORCH_NUM_THREADS))
+
+# 检测热路径日志（默认 WARNING，可通过 YOLO_LOG_LEVEL=DEBUG/INFO 打开详细日志）
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv("YOLO_LOG_LEVEL", "WARNING").upper())
 
 # 获取项目目录（Smart_RTSP_Stream_Manager 目录）
 _current_file = Path(__file__).resolve()
@@ -42,7 +60,12 @@ MODELS_DIR.mkdir(exist_ok=True)
 
 # 全局模型实例（单例模式，避免重复加载）
 _yolo_model: Optional[Any] = None
-_model_lock = None
+# 已解析的模型文件绝对路径（首次解析后缓存）
+_resolved_model_path: Optional[str] = None
+# 区域检测专用的静态形状 TensorRT 引擎（YOLO_USE_TRT=1 时首次区域检测加载；None 表示使用通用模型）
+_region_model: Optional[Any] = None
+_region_model_loaded = False
+_model_lock = threading.Lock()
 
 # 默认模型配置（可通过环境变量覆盖）
 # 可选: yolov8n.pt, yolov8s.pt, yolov8m.pt, yolov8l.pt, yolov8x.pt
@@ -60,6 +83,9 @@ CUSTOM_MODEL_URLS = [
 CAR_CLASS_ID = int(os.getenv("YOLO_CAR_CLASS_ID", "2"))
 # 车辆类别ID列表（car=2, motorcycle=3, bus=5, truck=7）
 VEHICLE_CLASS_IDS = {2, 3, 5, 7}
+# 车辆类别查找表（COCO 共 80 类），按类别ID下标直接索引，用于批量过滤
+_VEHICLE_MASK = np.zeros(max(80, max(VEHICLE_CLASS_IDS) + 1), dtype=bool)
+_VEHICLE_MASK[list(VEHICLE_CLASS_IDS)] = True
 # 默认置信度阈值
 DEFAULT_CONF_THRESHOLD = float(os.getenv("YOLO_CONF_THRESHOLD", "0.25"))
 # 区域检测时的最小尺寸（如果区域太小，可能检测不准）
@@ -67,6 +93,98 @@ DEFAULT_CONF_THRESHOLD = float(os.getenv("YOLO_CONF_THRESHOLD", "0.25"))
 MIN_REGION_SIZE = int(os.getenv("YOLO_MIN_REGION_SIZE", "16"))
 # 区域检测时的padding（在车位坐标基础上扩大一点，提高检测率）
 REGION_PADDING = int(os.getenv("YOLO_REGION_PADDING", "10"))
+# 提取颜色直方图前 ROI 的缩放边长（超过该尺寸 4 倍面积时先缩小）
+HIST_SAMPLE_SIZE = 128
+# 纯色 ROI 预过滤：亮度均值低于 DARK_ROI_MAX_MEAN（或高于 BRIGHT_ROI_MIN_MEAN）且标准差低于 BLANK_ROI_MAX_STD 时跳过推理
+DARK_ROI_MAX_MEAN = float(os.getenv("YOLO_DARK_ROI_MAX_MEAN", "15"))
+BRIGHT_ROI_MIN_MEAN = float(os.getenv("YOLO_BRIGHT_ROI_MIN_MEAN", "245"))
+BLANK_ROI_MAX_STD = float(os.getenv("YOLO_BLANK_ROI_MAX_STD", "5"))
+# 区域批量检测时每批最多推理的 ROI 数量
+REGION_BATCH_SIZE = max(1, int(os.getenv("YOLO_REGION_BATCH_SIZE", "16")))
+# 整图检测时的 JPEG 降采样解码倍数（1/2/4/8，1 表示不降采样）
+# 仅当原图短边 / 倍数 仍不小于模型输入尺寸（640）时才降采样解码，检测框会按倍数映射回原图坐标
+DECODE_SCALE = int(os.getenv("YOLO_DECODE_SCALE", "1"))
+_REDUCED_DECODE_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+MODEL_INPUT_SIZE = 640
+# 整图检测的推理输入尺寸 (高, 宽)，默认按 16:9 的 RTSP 画面使用 384x640，减少灰边填充带来的无效计算
+PREDICT_IMGSZ = (
+    int(os.getenv("YOLO_IMGSZ_H", "384")),
+    int(os.getenv("YOLO_IMGSZ_W", "640")),
+)
+# OpenCV CUDA 是否可用于夜间增强（None 表示尚未检测）
+_CUDA_ENHANCE_AVAILABLE: Optional[bool] = None
+# Gamma 校正查找表缓存 {亮度分桶(brightness // 5): uint8[256]}
+_GAMMA_LUT_CACHE: Dict[int, np.ndarray] = {}
+# 亮度分桶宽度：同一桶内的帧复用同一张 Gamma 表
+BRIGHTNESS_BUCKET_SIZE = 5
+# 每个线程复用的 CLAHE 对象（cv2.CLAHE 内部有状态，不在线程间共享）
+_THREAD_STATE = threading.local()
+# 是否在 GPU 上将模型导出为 TensorRT FP16 引擎（首次加载时导出，缓存到 models/ 目录）
+USE_TRT = os.getenv("YOLO_USE_TRT", "0") == "1"
+# 模型分段并行下载的连接数（<=1 时不分段，直接走 ultralytics 单连接下载）
+DOWNLOAD_PARTS = int(os.getenv("YOLO_DOWNLOAD_PARTS", "4"))
+# 下载完成后校验的 SHA256（可选，留空不校验）
+MODEL_SHA256 = os.getenv("YOLO_MODEL_SHA256", "").strip().lower()
+
+
+def _download_ranged(url: str, target_path: Path, parts: int = DOWNLOAD_PARTS) -> bool:
+    """按 Range 分段并行下载到 target_path。
+
+    多条连接同时下载，避免单连接慢启动拖慢首次部署；服务端不支持 Range
+    或未返回文件长度时返回 False，由调用方回退到单连接下载。
+    """
+    if parts <= 1:
+        return False
+
+    import requests
+
+    with requests.Session() as session:
+        # 跟随重定向拿到最终地址（GitHub Release 会跳转到对象存储）
+        head = session.head(url, allow_redirects=True, timeout=15)
+        head.raise_for_status()
+        total = int(head.headers.get("Content-Length") or 0)
+        if head.headers.get("Accept-Ranges", "").lower() != "bytes" or total <= 0:
+            return False
+
+        final_url = head.url
+        part_size = -(-total // parts)
+        ranges = [(start, min(start + part_size, total) - 1) for start in range(0, total, part_size)]
+        tmp_path = target_path.with_name(target_path.name + ".part")
+        with open(tmp_path, "wb") as f:
+            f.truncate(total)
+
+        def fetch(byte_range: Tuple[int, int]) -> None:
+            start, end = byte_range
+            resp = session.get(final_url, headers={"Range": f"bytes={start}-{end}"}, timeout=60)
+            resp.raise_for_status()
+            if resp.status_code != 206 or len(resp.content) != end - start + 1:
+                raise IOError(f"分段 {start}-{end} 响应不完整 (status={resp.status_code})")
+            # 每个分段使用独立文件句柄写入各自偏移，互不干扰
+            with open(tmp_path, "r+b") as part_file:
+                part_file.seek(start)
+                part_file.write(resp.content)
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+                list(executor.map(fetch, ranges))
+
+            if MODEL_SHA256:
+                digest = hashlib.sha256(tmp_path.read_bytes()).hexdigest()
+                if digest != MODEL_SHA256:
+                    raise IOError(f"SHA256 校验失败: {digest}")
+
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, target_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    print(f"[YOLODetector] 已分 {len(ranges)} 段并行下载模型 ({total} 字节)")
+    return True
 
 
 def _download_from_urls_with_retry(urls: List[str], target_path: Path, retries: int = 3) -> bool:
@@ -91,6 +209,12 @@ def _download_from_urls_with_retry(urls: List[str], target_path: Path, retries:
         for attempt in range(1, retries + 1):
             try:
                 print(f"[YOLODetector] 尝试从 {url} 下载模型 (第 {attempt}/{retries} 次)...")
+                try:
+                    if _download_ranged(url, target_path):
+                        print(f"[YOLODetector] 已从 {url} 下载模型到: {target_path}")
+                        return True
+                except Exception as e:  # noqa: BLE001
+                    print(f"[YOLODetector] 分段下载失败，改用单连接下载: {e}")
                 download(url, dir=str(target_path.parent), unzip=False)
                 if target_path.exists():
                     print(f"[YOLODetector] 已从 {url} 下载模型到: {target_path}")
@@ -102,6 +226,21 @@ def _download_from_urls_with_retry(urls: List[str], target_path: Path, retries:
     return False
 
 
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """将缓存中的模型放到项目目录：优先硬链接，跨设备时改用符号链接，最后才完整复制。"""
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+    try:
+        os.symlink(src.resolve(), dst)
+        return
+    except OSError:
+        pass
+    shutil.copy2(src, dst)
+
+
 def _download_model_to_project(model_name: str) -> Path:
     """下载模型到项目目录下的 models/ 文件夹。
     
@@ -152,7 +291,7 @@ def _download_model_to_project(model_name: str) -> Path:
                 f"[YOLODetector] 从默认位置复制模型到项目目录: "
                 f"{default_model_path} -> {project_model_path}"
             )
-            shutil.copy2(default_model_path, project_model_path)
+            _link_or_copy(default_model_path, project_model_path)
             print(f"[YOLODetector] 模型已保存到项目目录: {project_model_path}")
             return project_model_path
     except ImportError:
@@ -177,7 +316,7 @@ def _download_model_to_project(model_name: str) -> Path:
                 f"[YOLODetector] 在缓存位置找到模型，复制到项目目录: "
                 f"{possible_path} -> {project_model_path}"
             )
-            shutil.copy2(possible_path, project_model_path)
+            _link_or_copy(possible_path, project_model_path)
             print(f"[YOLODetector] 模型已保存到项目目录: {project_model_path}")
             return project_model_path
 
@@ -210,11 +349,19 @@ def _download_model_to_project(model_name: str) -> Path:
 
 
 def _get_model_path() -> str:
-    """获取模型路径，优先使用自定义路径，否则使用默认模型名（会自动下载到项目目录）。"""
+    """获取模型路径，优先使用自定义路径，否则使用默认模型名（会自动下载到项目目录）。
+
+    解析出的绝对路径缓存在 _resolved_model_path 中，后续调用不再重复访问文件系统。
+    """
+    global _resolved_model_path
+    if _resolved_model_path is not None:
+        return _resolved_model_path
+    
     if CUSTOM_MODEL_PATH and CUSTOM_MODEL_PATH.strip():
         custom_path = Path(CUSTOM_MODEL_PATH.strip())
         if custom_path.exists():
-            return str(custom_path.resolve())
+            _resolved_model_path = str(custom_path.resolve())
+            return _resolved_model_path
         # 自定义路径不存在，抛出错误
         raise FileNotFoundError(
             f"自定义模型文件不存在: {custom_path}\n"
@@ -223,13 +370,177 @@ def _get_model_path() -> str:
     
     # 使用默认模型名，检查项目目录下是否存在，不存在则下载
     project_model_path = _download_model_to_project(DEFAULT_MODEL_NAME)
-    return str(project_model_path.resolve())
+    _resolved_model_path = str(project_model_path.resolve())
+    return _resolved_model_path
+
+
+def _load_trt_engine(model, model_path_abs: str):
+    """将模型导出为 TensorRT FP16 引擎并加载（仅在 YOLO_USE_TRT=1 且 CUDA 可用时）。
+
+    引擎文件缓存在 MODELS_DIR 下（如 models/yolov8n.engine），后续启动直接复用。
+    任何一步失败都返回原模型，不影响检测流程。
+    """
+    if not USE_TRT:
+        return model
+
+    try:
+        import torch
+
+        if not torch.cuda.is_available():
+            print("[YOLODetector] 未检测到 CUDA，跳过 TensorRT 引擎导出")
+            return model
+
+        from ultralytics import YOLO
+
+        engine_path = MODELS_DIR / f"{Path(model_path_abs).stem}.engine"
+        if not engine_path.exists():
+            print(f"[YOLODetector] 首次导出 TensorRT FP16 引擎（可能需要几分钟）: {engine_path}")
+            exported = model.export(
+                format="engine",
+                half=True,
+                dynamic=True,
+                batch=yolo_batcher.BATCH_SIZE,
+                imgsz=640,
+                workspace=4,
+            )
+            exported_path = Path(exported)
+            # export 会把引擎写在 .pt 旁边，统一移动到 models/ 目录
+            if exported_path.resolve() != engine_path.resolve():
+                shutil.move(str(exported_path), str(engine_path))
+
+        print(f"[YOLODetector] 加载 TensorRT 引擎: {engine_path}")
+        return YOLO(str(engine_path), task="detect")
+    except Exception as e:  # noqa: BLE001
+        print(f"[YOLODetector] TensorRT 引擎导出/加载失败，继续使用原模型: {e}")
+        return model
+
+
+def _load_roi_engine(model_path_abs: str):
+    """导出并加载区域检测专用的静态形状 TensorRT FP16 引擎（输入固定为 REGION_BATCH_SIZE x 640x640）。
+
+    区域检测的 ROI 均已 letterbox 到 640x640，静态形状引擎可以针对该尺寸选择最优 kernel。
+    引擎文件缓存在 MODELS_DIR 下（如 models/yolov8n_roi640_b16.engine）；失败时返回 None。
+    """
+    try:
+        import torch
+
+        if not torch.cuda.is_available():
+            return None
+
+        from ultralytics import YOLO
+
+        engine_path = MODELS_DIR / f"{Path(model_path_abs).stem}_roi{MODEL_INPUT_SIZE}_b{REGION_BATCH_SIZE}.engine"
+        if not engine_path.exists():
+            print(f"[YOLODetector] 首次导出区域检测静态 TensorRT 引擎（可能需要几分钟）: {engine_path}")
+            exported = YOLO(model_path_abs).export(
+                format="engine",
+                half=True,
+                dynamic=False,
+                batch=REGION_BATCH_SIZE,
+                imgsz=MODEL_INPUT_SIZE,
+                workspace=4,
+                device=0,
+            )
+            exported_path = Path(exported)
+            if exported_path.resolve() != engine_path.resolve():
+                shutil.move(str(exported_path), str(engine_path))
+
+        print(f"[YOLODetector] 加载区域检测 TensorRT 引擎: {engine_path}")
+        return _apply_predict_defaults(YOLO(str(engine_path), task="detect"))
+    except Exception as e:  # noqa: BLE001
+        print(f"[YOLODetector] 区域检测 TensorRT 引擎导出/加载失败，使用通用模型: {e}")
+        return None
+
+
+def _load_region_model() -> Tuple[Any, Optional[int]]:
+    """获取区域检测使用的模型。
+
+    返回:
+        (模型, 固定批大小)；使用静态形状 TensorRT 引擎时固定批大小为 REGION_BATCH_SIZE，
+        调用方需要把每批补齐到该大小；否则为 None。
+    """
+    global _region_model, _region_model_loaded
+    
+    if _region_model_loaded:
+        return (_region_model, REGION_BATCH_SIZE) if _region_model is not None else (_load_model(), None)
+    
+    model = _load_model()
+    if not USE_TRT:
+        return model, None
+    
+    with _model_lock:
+        if not _region_model_loaded:
+            _region_model = _load_roi_engine(_get_model_path())
+            _region_model_loaded = True
+    
+    if _region_model is None:
+        return model, None
+    return _region_model, REGION_BATCH_SIZE
+
+
+def _apply_predict_defaults(model):
+    """设置推理默认参数：CUDA 可用时使用 GPU + FP16 半精度，并关闭推理日志。"""
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            model.overrides.update({"half": True, "device": 0, "verbose": False})
+            print("[YOLODetector] 已启用 GPU FP16 半精度推理")
+        else:
+            model.overrides.update({"device": "cpu", "verbose": False})
+    except Exception as e:  # noqa: BLE001
+        print(f"[YOLODetector] 设置推理默认参数失败，使用 ultralytics 默认值: {e}")
+    return model
+
+
+def inference_context():
+    """推理上下文：优先使用 torch.inference_mode()，关闭 autograd 版本计数等开销。"""
+    try:
+        import torch
+
+        return torch.inference_mode()
+    except ImportError:
+        return contextlib.nullcontext()
+
+
+def _warmup_model(model) -> None:
+    """融合 Conv+BN 并用空白图做一次预热推理，让首个真实请求不再承担 CUDA 上下文/kernel 初始化开销。"""
+    try:
+        if hasattr(model, "fuse"):
+            model.fuse()
+    except Exception as e:  # noqa: BLE001
+        # TensorRT 引擎等非 PyTorch 模型不支持 fuse
+        print(f"[YOLODetector] 跳过层融合: {e}")
+    try:
+        dummy = np.zeros((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), dtype=np.uint8)
+        with inference_context():
+            model.predict(dummy, verbose=False)
+        print("[YOLODetector] 模型预热完成")
+    except Exception as e:  # noqa: BLE001
+        print(f"[YOLODetector] 模型预热失败（不影响后续检测）: {e}")
+
+
+def _configure_torch_threads() -> None:
+    """限制 torch 的 intra-op / inter-op 线程数，避免多个 worker 争抢 CPU。"""
+    try:
+        import torch
+
+        torch.set_num_threads(TORCH_NUM_THREADS)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # inter-op 线程池已启动（并行任务已执行过）时不允许再修改
+            pass
+        print(f"[YOLODetector] torch 线程数: intra-op={TORCH_NUM_THREADS}, inter-op=1 (YOLO_WORKERS={YOLO_WORKERS})")
+    except Exception as e:  # noqa: BLE001
+        print(f"[YOLODetector] 设置 torch 线程数失败: {e}")
 
 
 def _load_model():
     """加载 YOLOv8 模型（单例模式，全局只加载一次）。"""
-    global _yolo_model, _model_lock
+    global _yolo_model
     
+    # 快速路径：模型已加载时无需加锁
     if _yolo_model is not None:
         return _yolo_model
     
@@ -242,11 +553,7 @@ def _load_model():
             "如果使用 GPU，建议安装: pip install ultralytics torch torchvision"
         )
     
-    # 使用线程锁确保多线程环境下只加载一次
-    import threading
-    if _model_lock is None:
-        _model_lock = threading.Lock()
-    
+    # 使用线程锁（模块导入时创建）确保多线程环境下只加载一次
     with _model_lock:
         # 双重检查，避免并发时重复加载
         if _yolo_model is not None:
@@ -280,9 +587,13 @@ def _load_model():
             except Exception as e:
                 raise PermissionError(f"无法读取模型文件: {e}")
             
+            _configure_torch_threads()
+            
             # 加载模型（使用绝对路径，确保 YOLO 可以正确访问）
             print(f"[YOLODetector] 调用 YOLO() 加载模型...")
-            _yolo_model = YOLO(model_path_abs)
+            model = _apply_predict_defaults(_load_trt_engine(YOLO(model_path_abs), model_path_abs))
+            _warmup_model(model)
+            _yolo_model = model
             
             print(f"[YOLODetector] 模型加载完成")
             return _yolo_model
@@ -331,8 +642,35 @@ def preload_model():
         return False
 
 
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """批量计算两组边界框两两之间的IoU（Intersection over Union）。
+
+    参数:
+        boxes_a: 形状 (Na, 4) 的数组，每行为 (x1, y1, x2, y2)
+        boxes_b: 形状 (Nb, 4) 的数组，每行为 (x1, y1, x2, y2)
+
+    返回:
+        形状 (Na, Nb) 的 IoU 矩阵（0.0-1.0）
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    xa1, ya1, xa2, ya2 = a[:, None, 0], a[:, None, 1], a[:, None, 2], a[:, None, 3]
+    xb1, yb1, xb2, yb2 = b[None, :, 0], b[None, :, 1], b[None, :, 2], b[None, :, 3]
+
+    # 计算交集
+    inter = (
+        np.clip(np.minimum(xa2, xb2) - np.maximum(xa1, xb1), 0, None)
+        * np.clip(np.minimum(ya2, yb2) - np.maximum(ya1, yb1), 0, None)
+    )
+
+    # 计算并集
+    area_a = (xa2 - xa1) * (ya2 - ya1)
+    area_b = (xb2 - xb1) * (yb2 - yb1)
+    return inter / (area_a + area_b - inter + 1e-9)
+
+
 def _calculate_iou(box1: Tuple[int, int, int, int], box2: Tuple[int, int, int, int]) -> float:
-    """计算两个边界框的IoU（Intersection over Union）。
+    """计算两个边界框的IoU（兼容旧接口，内部调用 iou_matrix）。
     
     参数:
         box1: (x1, y1, x2, y2) 格式
@@ -341,29 +679,133 @@ def _calculate_iou(box1: Tuple[int, int, int, int], box2: Tuple[int, int, int, i
     返回:
         IoU值（0.0-1.0）
     """
-    x1_1, y1_1, x2_1, y2_1 = box1
-    x1_2, y1_2, x2_2, y2_2 = box2
-    
-    # 计算交集
-    x1_i = max(x1_1, x1_2)
-    y1_i = max(y1_1, y1_2)
-    x2_i = min(x2_1, x2_2)
-    y2_i = min(y2_1, y2_2)
+    return float(iou_matrix(np.array([box1]), np.array([box2]))[0, 0])
+
+
+def _imread_fast(image_path: Path, scale: int = 1) -> Optional[np.ndarray]:
+    """读取 BGR 图像：JPEG 优先使用 libjpeg-turbo（SIMD 加速），否则回退到 cv2.imread。
+
+    参数:
+        image_path: 图片路径
+        scale: 降采样解码倍数（1/2/4/8），由解码器在 DCT 域完成缩放
+    """
+    if _TURBO_JPEG is not None and image_path.suffix.lower() in (".jpg", ".jpeg"):
+        try:
+            with open(image_path, "rb") as f:
+                buf = f.read()
+            if scale > 1:
+                return _TURBO_JPEG.decode(buf, pixel_format=TJPF_BGR, scaling_factor=(1, scale))
+            return _TURBO_JPEG.decode(buf, pixel_format=TJPF_BGR)
+        except Exception as e:  # noqa: BLE001
+            logger.debug("turbojpeg 解码失败，回退到 cv2.imread: %s", e)
+
+    flag = _REDUCED_DECODE_FLAGS.get(scale)
+    if flag is not None:
+        return cv2.imread(str(image_path), flag)
+    return cv2.imread(str(image_path))
+
+
+def _read_image_for_detection(image_path: Path) -> Tuple[Optional[np.ndarray], int, Tuple[int, int]]:
+    """读取整图检测用的图像，原图足够大时利用 libjpeg 的 DCT 域缩放直接降采样解码。
+
+    返回:
+        (图像, 解码倍数, (原图宽, 原图高))；读取失败时图像为 None
+    """
+    if DECODE_SCALE in _REDUCED_DECODE_FLAGS:
+        try:
+            from PIL import Image
+
+            # 只解析文件头获取原图尺寸，不解码像素
+            with Image.open(image_path) as pil_img:
+                width, height = pil_img.size
+            if min(width, height) // DECODE_SCALE >= MODEL_INPUT_SIZE:
+                img = _imread_fast(image_path, DECODE_SCALE)
+                if img is not None:
+                    return img, DECODE_SCALE, (width, height)
+        except Exception as e:  # noqa: BLE001
+            logger.debug("降采样解码失败，回退到原尺寸解码: %s", e)
+
+    img = _imread_fast(image_path)
+    if img is None:
+        return None, 1, (0, 0)
+    height, width = img.shape[:2]
+    return img, 1, (width, height)
+
+
+def _vehicle_class_mask(cls: np.ndarray) -> np.ndarray:
+    """通过 _VEHICLE_MASK 查找表判断每个类别ID是否为车辆类型，返回布尔数组。"""
+    cls = cls.astype(np.int64, copy=False)
+    # 超出查找表范围的类别（自定义模型）一律视为非车辆
+    in_range = (cls >= 0) & (cls < len(_VEHICLE_MASK))
+    vehicle_mask = np.zeros(len(cls), dtype=bool)
+    vehicle_mask[in_range] = _VEHICLE_MASK[cls[in_range]]
+    return vehicle_mask
+
+
+def _append_car_boxes(
+    xyxy: np.ndarray,
+    cls: np.ndarray,
+    conf: np.ndarray,
+    img_width: int,
+    img_height: int,
+    conf_threshold: float,
+    image_brightness: Optional[float],
+    out_list: List[Dict[str, Any]],
+    scale: int = 1,
+) -> Tuple[int, int]:
+    """过滤车辆类别并按置信度阈值筛选检测框，结果追加到 out_list。
+
+    参数:
+        xyxy: 形状 (N, 4) 的检测框坐标（相对于原始图像）
+        cls: 形状 (N,) 的类别ID
+        conf: 形状 (N,) 的置信度
+        img_width / img_height: 原始图像尺寸，用于裁剪坐标
+        conf_threshold: 后处理置信度阈值
+        image_brightness: 图像亮度，暗光环境下放宽到 0.1
+        out_list: 接收 car_boxes 字典的列表
+        scale: 图像降采样解码倍数，检测框坐标会乘以该倍数映射回原图
+
+    返回:
+        (车辆类别检测框数, 因置信度被过滤的数量)
+    """
+    vehicle_mask = _vehicle_class_mask(cls)
     
-    if x2_i <= x1_i or y2_i <= y1_i:
-        return 0.0
+    # 应用动态阈值和宽松检测策略：暗光环境下接受置信度 >= 0.1 的检测
+    is_dark = bool(image_brightness and image_brightness < 120)
+    accept_threshold = min(conf_threshold, 0.1) if is_dark else conf_threshold
+    keep = vehicle_mask & (conf >= accept_threshold)
     
-    intersection = (x2_i - x1_i) * (y2_i - y1_i)
+    if logger.isEnabledFor(logging.DEBUG):
+        # 调试：打印所有检测结果（包括非车辆），只打印前10个，避免日志过多
+        for i in range(min(10, len(cls))):
+            logger.debug("检测框 %s: 类别ID=%s, 置信度=%.3f, 是否车辆=%s", i + 1, cls[i], conf[i], bool(vehicle_mask[i]))
+        for i in np.flatnonzero(vehicle_mask & ~keep):
+            if is_dark:
+                reject_reason = f"置信度{conf[i]:.3f} < 0.1（暗光环境最低阈值）"
+            else:
+                reject_reason = f"置信度{conf[i]:.3f} < {conf_threshold:.3f}（动态阈值）"
+            logger.debug("✗ 过滤车辆检测: 类别ID=%s, 置信度=%.3f, 原因=%s", cls[i], conf[i], reject_reason)
     
-    # 计算并集
-    area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-    area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-    union = area1 + area2 - intersection
+    # 只保留通过过滤的车辆检测框，并确保坐标在图像范围内
+    kept_xyxy = (xyxy[keep] * scale).astype(int)
+    kept_xyxy[:, [0, 2]] = np.clip(kept_xyxy[:, [0, 2]], 0, img_width)
+    kept_xyxy[:, [1, 3]] = np.clip(kept_xyxy[:, [1, 3]], 0, img_height)
     
-    if union == 0:
-        return 0.0
+    for (x1, y1, x2, y2), score, cls_id in zip(kept_xyxy.tolist(), conf[keep].tolist(), cls[keep].tolist()):
+        if score < conf_threshold:
+            logger.debug("暗光环境宽松检测：置信度=%.3f（阈值=%.3f）", score, conf_threshold)
+        out_list.append({
+            "x1": x1,
+            "y1": y1,
+            "x2": x2,
+            "y2": y2,
+            "confidence": score,
+            "class_id": cls_id,
+        })
+        logger.debug("✓ 接受车辆检测: 类别ID=%s, 坐标=(%s,%s)-(%s,%s), 置信度=%.3f", cls_id, x1, y1, x2, y2, score)
     
-    return intersection / union
+    vehicle_count = int(vehicle_mask.sum())
+    return vehicle_count, vehicle_count - int(keep.sum())
 
 
 def detect_cars_on_image(
@@ -399,8 +841,21 @@ def detect_cars_on_image(
               "pad_y": int,
           }
     """
+    # 优先使用常驻检测服务（模型已预热），不可用时回退到进程内检测
+    remote_result = yolo_server.request_detection(image_path, conf_threshold, image_brightness)
+    if remote_result is not None:
+        return remote_result
+    return _detect_cars_on_image_local(image_path, conf_threshold, image_brightness)
+
+
+def _detect_cars_on_image_local(
+    image_path: Path,
+    conf_threshold: float = None,
+    image_brightness: float = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """在当前进程内执行整图车辆检测（参数与返回值同 detect_cars_on_image）。"""
     if not image_path.exists():
-        print(f"[YOLODetector] 警告: 图片文件不存在: {image_path}")
+        logger.warning("图片文件不存在: %s", image_path)
         return [], {}
     
     if conf_threshold is None:
@@ -408,13 +863,11 @@ def detect_cars_on_image(
     
     try:
         # 读取原始图像
-        img = cv2.imread(str(image_path))
+        img, decode_scale, (original_width, original_height) = _read_image_for_detection(image_path)
         if img is None:
-            print(f"[YOLODetector] 警告: 无法读取图片: {image_path}")
+            logger.warning("无法读取图片: %s", image_path)
             return [], {}
         
-        original_height, original_width = img.shape[:2]
-        
         # 动态调整置信度阈值
         # 注意：在暗光环境下，应该使用更低的阈值来接受更多检测结果
         if image_brightness and image_brightness < 120:
@@ -424,99 +877,80 @@ def detect_cars_on_image(
             if dynamic_threshold > 0.1:
                 # 如果动态阈值 > 0.1，在暗光环境下应该降低到 0.1
                 conf_threshold = 0.1
-                print(f"[YOLODetector] 暗光环境整图检测（亮度={image_brightness:.1f}），动态阈值={dynamic_threshold:.3f}，但后处理使用最低阈值: {conf_threshold:.3f}")
+                logger.debug("暗光环境整图检测（亮度=%.1f），动态阈值=%.3f，但后处理使用最低阈值: %.3f", image_brightness, dynamic_threshold, conf_threshold)
             else:
                 conf_threshold = dynamic_threshold
-                print(f"[YOLODetector] 暗光环境整图检测（亮度={image_brightness:.1f}），动态调整阈值: {conf_threshold:.3f}")
+                logger.debug("暗光环境整图检测（亮度=%.1f），动态调整阈值: %.3f", image_brightness, conf_threshold)
         
-        # 夜间图像增强
-        enhanced_path = image_path
-        temp_enhanced_path = None
+        # 夜间图像增强（增强结果直接以 BGR ndarray 交给 YOLO，不再落盘为临时 JPEG）
         if image_brightness and image_brightness < 120:
             img = _enhance_image_for_night(img, image_brightness)
-            # 保存增强后的图像到临时文件
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-                tmp_path = Path(tmp_file.name)
-                cv2.imwrite(str(tmp_path), img)
-                enhanced_path = tmp_path
-                temp_enhanced_path = tmp_path
-                print(f"[YOLODetector] [DEBUG] 夜间增强图像已保存到临时文件: {enhanced_path}")
         
         model = _load_model()
         
         # 执行推理（使用更低的置信度以获取所有可能的检测结果）
         inference_conf = min(0.1, conf_threshold) if image_brightness and image_brightness < 120 else conf_threshold
-        print(f"[YOLODetector] 整图检测推理参数: conf={inference_conf:.3f} (动态阈值={conf_threshold:.3f})")
-        print(f"[YOLODetector] [DEBUG] 调用YOLO推理，图像路径: {enhanced_path}, 文件存在: {enhanced_path.exists()}")
+        logger.debug("整图检测推理参数: conf=%.3f (动态阈值=%.3f)", inference_conf, conf_threshold)
+        logger.debug("调用YOLO推理，图像: %s, 尺寸: %sx%s", image_path.name, original_width, original_height)
         
         try:
             # 注意：YOLO的model()方法返回的是一个Results对象列表
             # 尝试使用predict()方法，这可能返回更标准的结果格式
             # 如果predict()不可用，则使用model()方法
-            if hasattr(model, 'predict'):
-                print(f"[YOLODetector] [DEBUG] 使用 model.predict() 方法")
-                results = model.predict(str(enhanced_path), conf=inference_conf, verbose=False)
+            if yolo_batcher.BATCH_ENABLED:
+                # 微批处理：预处理已在当前线程完成，推理线程只负责 GPU 推理
+                logger.debug("提交到微批处理队列")
+                results = [yolo_batcher.submit(img, inference_conf).result()]
+            elif hasattr(model, 'predict'):
+                logger.debug("使用 model.predict() 方法")
+                with inference_context():
+                    results = model.predict(img, imgsz=PREDICT_IMGSZ, conf=inference_conf, verbose=False)
             else:
-                print(f"[YOLODetector] [DEBUG] 使用 model() 方法")
-                results = model(str(enhanced_path), conf=inference_conf, verbose=False)
+                logger.debug("使用 model() 方法")
+                with inference_context():
+                    results = model(img, imgsz=PREDICT_IMGSZ, conf=inference_conf, verbose=False)
             
-            print(f"[YOLODetector] [DEBUG] YOLO推理完成，results类型: {type(results)}")
+            logger.debug("YOLO推理完成，results类型: %s", type(results))
             
             # 检查results的实际结构
             if hasattr(results, '__len__'):
-                print(f"[YOLODetector] [DEBUG] results长度: {len(results)}")
+                logger.debug("results长度: %s", len(results))
                 if len(results) > 0:
-                    print(f"[YOLODetector] [DEBUG] results[0]类型: {type(results[0])}")
+                    logger.debug("results[0]类型: %s", type(results[0]))
                     if hasattr(results[0], 'boxes'):
-                        print(f"[YOLODetector] [DEBUG] results[0].boxes类型: {type(results[0].boxes)}")
+                        logger.debug("results[0].boxes类型: %s", type(results[0].boxes))
                         if results[0].boxes is not None:
-                            print(f"[YOLODetector] [DEBUG] results[0].boxes长度: {len(results[0].boxes)}")
+                            logger.debug("results[0].boxes长度: %s", len(results[0].boxes))
                         else:
-                            print(f"[YOLODetector] [DEBUG] results[0].boxes 为 None")
+                            logger.debug("results[0].boxes 为 None")
                     else:
-                        print(f"[YOLODetector] [DEBUG] results[0] 没有 boxes 属性")
-                        print(f"[YOLODetector] [DEBUG] results[0] 的属性: {dir(results[0])}")
+                        logger.debug("results[0] 没有 boxes 属性")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("results[0] 的属性: %s", dir(results[0]))
                 else:
-                    print(f"[YOLODetector] [DEBUG] results列表为空！")
+                    logger.debug("results列表为空！")
                     # 尝试从predictor获取结果（自定义YOLO版本可能将结果存储在predictor.all_outputs中）
                     if hasattr(model, 'predictor') and hasattr(model.predictor, 'all_outputs'):
-                        print(f"[YOLODetector] [DEBUG] 尝试从 predictor.all_outputs 获取结果")
+                        logger.debug("尝试从 predictor.all_outputs 获取结果")
                         if model.predictor.all_outputs:
-                            print(f"[YOLODetector] [DEBUG] predictor.all_outputs长度: {len(model.predictor.all_outputs)}")
+                            logger.debug("predictor.all_outputs长度: %s", len(model.predictor.all_outputs))
                             # all_outputs中存储的是原始检测张量，需要转换为Results对象或直接处理
                             # 暂时使用all_outputs，后续代码会处理
                             results = model.predictor.all_outputs
-                            print(f"[YOLODetector] [DEBUG] 从predictor.all_outputs获取到结果，类型: {type(results[0]) if results else 'N/A'}")
+                            logger.debug("从predictor.all_outputs获取到结果，类型: %s", type(results[0]) if results else 'N/A')
             else:
-                print(f"[YOLODetector] [DEBUG] results不是列表类型，实际类型: {type(results)}")
+                logger.debug("results不是列表类型，实际类型: %s", type(results))
                 # 尝试将results转换为列表
                 try:
                     results = list(results) if results else []
-                    print(f"[YOLODetector] [DEBUG] 转换后results长度: {len(results)}")
+                    logger.debug("转换后results长度: %s", len(results))
                 except Exception as e:
-                    print(f"[YOLODetector] [ERROR] 无法转换results: {e}")
+                    logger.error("无法转换results: %s", e)
                     results = []
         except Exception as e:
-            print(f"[YOLODetector] [ERROR] YOLO推理失败: {e}")
-            import traceback
-            traceback.print_exc()
-            # 清理临时文件
-            if temp_enhanced_path and temp_enhanced_path.exists():
-                try:
-                    temp_enhanced_path.unlink()
-                except Exception:
-                    pass
+            logger.exception("YOLO推理失败: %s", e)
             return [], {}
         
-        # 清理临时增强图像（推理完成后才删除，但确保results已经被处理）
-        if temp_enhanced_path and temp_enhanced_path.exists():
-            try:
-                temp_enhanced_path.unlink()
-                print(f"[YOLODetector] [DEBUG] 已清理临时增强图像: {temp_enhanced_path}")
-            except Exception as e:
-                print(f"[YOLODetector] [WARN] 清理临时文件失败: {e}")
-        
         # 解析结果，只保留车辆类别
         car_boxes: List[Dict[str, Any]] = []
         
@@ -526,201 +960,148 @@ def detect_cars_on_image(
         filtered_by_conf_count = 0
         
         # 调试：检查results的结构
-        print(f"[YOLODetector] [DEBUG] results类型: {type(results)}, 长度: {len(results) if hasattr(results, '__len__') else 'N/A'}")
+        logger.debug("results类型: %s, 长度: %s", type(results), len(results) if hasattr(results, '__len__') else 'N/A')
         
         for idx, result in enumerate(results):
-            print(f"[YOLODetector] [DEBUG] result[{idx}]类型: {type(result)}")
+            logger.debug("result[%s]类型: %s", idx, type(result))
             
-            # 检查result是否是Results对象
             if hasattr(result, 'boxes'):
                 # 标准Results对象
-                print(f"[YOLODetector] [DEBUG] result[{idx}].boxes类型: {type(result.boxes)}")
-                
-                if result.boxes is None:
-                    print(f"[YOLODetector] [DEBUG] result[{idx}].boxes 为 None，跳过")
-                    continue
-                
                 boxes = result.boxes
-                print(f"[YOLODetector] [DEBUG] boxes类型: {type(boxes)}, 长度: {len(boxes) if hasattr(boxes, '__len__') else 'N/A'}")
-                
-                # 检查boxes是否有数据
-                if hasattr(boxes, '__len__') and len(boxes) == 0:
-                    print(f"[YOLODetector] [DEBUG] boxes为空列表")
+                if boxes is None or len(boxes) == 0:
+                    logger.debug("result[%s].boxes 为空，跳过", idx)
                     continue
-                
-                all_detections_count = len(boxes)
-                print(f"[YOLODetector] [DEBUG] YOLO原始检测结果: 共 {all_detections_count} 个检测框")
-                
-                for i in range(len(boxes)):
-                    cls_id = int(boxes.cls[i])
-                    conf = float(boxes.conf[i])
-                    
-                    # 调试：打印所有检测结果（包括非车辆）
-                    if i < 10:  # 只打印前10个，避免日志过多
-                        print(f"[YOLODetector] [DEBUG] 检测框 {i+1}: 类别ID={cls_id}, 置信度={conf:.3f}, 是否车辆={cls_id in VEHICLE_CLASS_IDS}")
-                    
-                    # 检查车辆类别（car, motorcycle, bus, truck）
-                    if cls_id in VEHICLE_CLASS_IDS:
-                        vehicle_detections_count += 1
-                        # 获取边界框坐标（xyxy 格式，相对于原始图像）
-                        # YOLO返回的坐标已经是相对于原始图像的，因为YOLO内部处理了缩放
-                        x1, y1, x2, y2 = boxes.xyxy[i].cpu().numpy().tolist()
+                # 一次性将 xyxy / cls / conf 拷贝到 CPU，避免逐框触发设备同步
+                xyxy_arr = boxes.xyxy.cpu().numpy()
+                cls_arr = boxes.cls.cpu().numpy()
+                conf_arr = boxes.conf.cpu().numpy()
             else:
                 # 可能是原始检测张量（torch.Tensor），格式为 [N, 6] 其中每行为 [x1, y1, x2, y2, conf, cls]
                 import torch
-                if isinstance(result, torch.Tensor):
-                    print(f"[YOLODetector] [DEBUG] result[{idx}]是torch.Tensor，形状: {result.shape}")
-                    det = result
-                    all_detections_count = len(det)
-                    print(f"[YOLODetector] [DEBUG] YOLO原始检测结果（张量）: 共 {all_detections_count} 个检测框")
-                    
-                    for i in range(len(det)):
-                        # 张量格式: [x1, y1, x2, y2, conf, cls]
-                        x1, y1, x2, y2, conf, cls_id = det[i].cpu().numpy().tolist()
-                        cls_id = int(cls_id)
-                        conf = float(conf)
-                        
-                        # 调试：打印所有检测结果（包括非车辆）
-                        if i < 10:  # 只打印前10个，避免日志过多
-                            print(f"[YOLODetector] [DEBUG] 检测框 {i+1}: 类别ID={cls_id}, 置信度={conf:.3f}, 是否车辆={cls_id in VEHICLE_CLASS_IDS}")
-                        
-                        # 检查车辆类别（car, motorcycle, bus, truck）
-                        if cls_id in VEHICLE_CLASS_IDS:
-                            vehicle_detections_count += 1
-                            # 坐标已经是相对于原始图像的
-                            x1 = max(0, min(int(x1), original_width))
-                            y1 = max(0, min(int(y1), original_height))
-                            x2 = max(0, min(int(x2), original_width))
-                            y2 = max(0, min(int(y2), original_height))
-                            
-                            # 应用动态阈值和宽松检测策略
-                            accepted = False
-                            reject_reason = ""
-                            
-                            if conf >= conf_threshold:
-                                accepted = True
-                            elif image_brightness and image_brightness < 120 and conf >= 0.1:
-                                accepted = True
-                                print(f"[YOLODetector] 暗光环境宽松检测：置信度={conf:.3f}（阈值={conf_threshold:.3f}）")
-                            else:
-                                filtered_by_conf_count += 1
-                                if image_brightness and image_brightness < 120:
-                                    reject_reason = f"置信度{conf:.3f} < 0.1（暗光环境最低阈值）"
-                                else:
-                                    reject_reason = f"置信度{conf:.3f} < {conf_threshold:.3f}（动态阈值）"
-                            
-                            if accepted:
-                                car_boxes.append({
-                                    "x1": x1,
-                                    "y1": y1,
-                                    "x2": x2,
-                                    "y2": y2,
-                                    "confidence": conf,
-                                    "class_id": cls_id,
-                                })
-                                print(f"[YOLODetector] ✓ 接受车辆检测: 类别ID={cls_id}, 坐标=({x1},{y1})-({x2},{y2}), 置信度={conf:.3f}")
-                            else:
-                                print(f"[YOLODetector] ✗ 过滤车辆检测: 类别ID={cls_id}, 置信度={conf:.3f}, 原因={reject_reason}")
-                else:
-                    print(f"[YOLODetector] [DEBUG] result[{idx}]既不是Results对象也不是torch.Tensor，无法处理")
+                if not isinstance(result, torch.Tensor):
+                    logger.debug("result[%s]既不是Results对象也不是torch.Tensor，无法处理", idx)
                     continue
+                det_arr = result.cpu().numpy()
+                xyxy_arr = det_arr[:, :4]
+                conf_arr = det_arr[:, 4]
+                cls_arr = det_arr[:, 5]
             
-            # 处理Results对象的情况（标准YOLO返回格式）
-            if hasattr(result, 'boxes') and result.boxes is not None:
-                boxes = result.boxes
-                print(f"[YOLODetector] [DEBUG] boxes类型: {type(boxes)}, 长度: {len(boxes) if hasattr(boxes, '__len__') else 'N/A'}")
-                
-                # 检查boxes是否有数据
-                if hasattr(boxes, '__len__') and len(boxes) == 0:
-                    print(f"[YOLODetector] [DEBUG] boxes为空列表")
-                    continue
-                
-                all_detections_count = len(boxes)
-                print(f"[YOLODetector] [DEBUG] YOLO原始检测结果: 共 {all_detections_count} 个检测框")
-                
-                for i in range(len(boxes)):
-                    cls_id = int(boxes.cls[i])
-                    conf = float(boxes.conf[i])
-                    
-                    # 调试：打印所有检测结果（包括非车辆）
-                    if i < 10:  # 只打印前10个，避免日志过多
-                        print(f"[YOLODetector] [DEBUG] 检测框 {i+1}: 类别ID={cls_id}, 置信度={conf:.3f}, 是否车辆={cls_id in VEHICLE_CLASS_IDS}")
-                    
-                    # 检查车辆类别（car, motorcycle, bus, truck）
-                    if cls_id in VEHICLE_CLASS_IDS:
-                        vehicle_detections_count += 1
-                        # 获取边界框坐标（xyxy 格式，相对于原始图像）
-                        # YOLO返回的坐标已经是相对于原始图像的，因为YOLO内部处理了缩放
-                        x1, y1, x2, y2 = boxes.xyxy[i].cpu().numpy().tolist()
-                        
-                        # 确保坐标在图像范围内
-                        x1 = max(0, min(int(x1), original_width))
-                        y1 = max(0, min(int(y1), original_height))
-                        x2 = max(0, min(int(x2), original_width))
-                        y2 = max(0, min(int(y2), original_height))
-                        
-                        # 应用动态阈值和宽松检测策略
-                        accepted = False
-                        reject_reason = ""
-                        
-                        if conf >= conf_threshold:
-                            accepted = True
-                        elif image_brightness and image_brightness < 120 and conf >= 0.1:
-                            accepted = True
-                            print(f"[YOLODetector] 暗光环境宽松检测：置信度={conf:.3f}（阈值={conf_threshold:.3f}）")
-                        else:
-                            filtered_by_conf_count += 1
-                            if image_brightness and image_brightness < 120:
-                                reject_reason = f"置信度{conf:.3f} < 0.1（暗光环境最低阈值）"
-                            else:
-                                reject_reason = f"置信度{conf:.3f} < {conf_threshold:.3f}（动态阈值）"
-                        
-                        if accepted:
-                            car_boxes.append({
-                                "x1": x1,
-                                "y1": y1,
-                                "x2": x2,
-                                "y2": y2,
-                                "confidence": conf,
-                                "class_id": cls_id,
-                            })
-                            print(f"[YOLODetector] ✓ 接受车辆检测: 类别ID={cls_id}, 坐标=({x1},{y1})-({x2},{y2}), 置信度={conf:.3f}")
-                        else:
-                            print(f"[YOLODetector] ✗ 过滤车辆检测: 类别ID={cls_id}, 置信度={conf:.3f}, 原因={reject_reason}")
+            all_detections_count += len(cls_arr)
+            logger.debug("YOLO原始检测结果: 共 %s 个检测框", len(cls_arr))
+            
+            vehicle_count, filtered_count = _append_car_boxes(
+                xyxy_arr,
+                cls_arr,
+                conf_arr,
+                original_width,
+                original_height,
+                conf_threshold,
+                image_brightness,
+                car_boxes,
+                decode_scale,
+            )
+            vehicle_detections_count += vehicle_count
+            filtered_by_conf_count += filtered_count
         
         # 调试总结
-        print(f"[YOLODetector] [DEBUG] 检测统计: 总检测框={all_detections_count}, 车辆类别={vehicle_detections_count}, 通过过滤={len(car_boxes)}, 被过滤={filtered_by_conf_count}")
+        logger.debug("检测统计: 总检测框=%s, 车辆类别=%s, 通过过滤=%s, 被过滤=%s", all_detections_count, vehicle_detections_count, len(car_boxes), filtered_by_conf_count)
         
         # 获取预处理信息（YOLO内部处理的缩放信息）
         # 注意：YOLOv8会自动处理缩放，返回的坐标已经是相对于原始图像的
         # 但我们仍然需要记录一些信息用于调试
         preprocess_info = {
             "original_size": (original_width, original_height),
-            "model_input_size": (640, 640),  # YOLOv8默认输入尺寸
-            "scale": 1.0,  # YOLO内部已处理，坐标已映射回原始图像
+            "model_input_size": (PREDICT_IMGSZ[1], PREDICT_IMGSZ[0]),  # 推理输入尺寸 (宽, 高)
+            "scale": float(decode_scale),  # 降采样解码倍数，检测框已乘以该倍数映射回原始图像
             "pad_x": 0,
             "pad_y": 0,
         }
         
         if car_boxes:
-            print(f"[YOLODetector] ✓ 在 {image_path.name} 中检测到 {len(car_boxes)} 辆车")
+            logger.info("✓ 在 %s 中检测到 %s 辆车", image_path.name, len(car_boxes))
         else:
             if vehicle_detections_count > 0:
-                print(f"[YOLODetector] ⚠️  警告: YOLO检测到 {vehicle_detections_count} 个车辆对象，但全部被过滤（置信度阈值可能过高）")
+                logger.warning("⚠️  YOLO检测到 %s 个车辆对象，但全部被过滤（置信度阈值可能过高）", vehicle_detections_count)
             elif all_detections_count > 0:
-                print(f"[YOLODetector] ⚠️  警告: YOLO检测到 {all_detections_count} 个对象，但没有车辆类别（类别ID可能不匹配）")
+                logger.warning("⚠️  YOLO检测到 %s 个对象，但没有车辆类别（类别ID可能不匹配）", all_detections_count)
             else:
-                print(f"[YOLODetector] 在 {image_path.name} 中未检测到任何对象")
+                logger.info("在 %s 中未检测到任何对象", image_path.name)
         
         return car_boxes, preprocess_info
         
     except Exception as e:
-        print(f"[YOLODetector] 检测失败: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("检测失败: %s", e)
         return [], {}
 
 
+def _get_gamma_table(brightness: float) -> np.ndarray:
+    """获取 Gamma 校正查找表（按亮度分桶缓存，亮度稳定的连续夜间帧直接复用）。"""
+    bucket = int(brightness // BRIGHTNESS_BUCKET_SIZE)
+    table = _GAMMA_LUT_CACHE.get(bucket)
+    if table is None:
+        # 以桶中点亮度计算Gamma值（亮度越低，Gamma值越大，增强越明显）
+        bucket_brightness = min(60.0, (bucket + 0.5) * BRIGHTNESS_BUCKET_SIZE)
+        gamma = 1.5 + (60 - bucket_brightness) / 60 * 0.5  # 1.5 到 2.0 之间
+        table = (np.power(np.arange(256, dtype=np.float32) / 255.0, 1.0 / gamma) * 255).astype(np.uint8)
+        _GAMMA_LUT_CACHE[bucket] = table
+    return table
+
+
+def _get_clahe():
+    """获取当前线程复用的 CLAHE 对象，避免每帧重新分配。"""
+    clahe = getattr(_THREAD_STATE, "clahe", None)
+    if clahe is None:
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        _THREAD_STATE.clahe = clahe
+    return clahe
+
+
+def _get_enhance_buffers(shape: Tuple[int, ...]) -> Dict[str, np.ndarray]:
+    """获取当前线程复用的夜间增强缓冲区，仅在帧尺寸变化时重新分配。"""
+    bufs = getattr(_THREAD_STATE, "enhance_buffers", None)
+    if bufs is None or bufs["lab"].shape != shape:
+        height, width = shape[:2]
+        bufs = {
+            "lab": np.empty(shape, dtype=np.uint8),
+            "l": np.empty((height, width), dtype=np.uint8),
+            "l_enhanced": np.empty((height, width), dtype=np.uint8),
+            "out": np.empty(shape, dtype=np.uint8),
+        }
+        _THREAD_STATE.enhance_buffers = bufs
+    return bufs
+
+
+def _cuda_enhance_available() -> bool:
+    """检测 OpenCV 是否编译了 CUDA 支持且有可用设备（结果缓存）。"""
+    global _CUDA_ENHANCE_AVAILABLE
+    if _CUDA_ENHANCE_AVAILABLE is None:
+        try:
+            _CUDA_ENHANCE_AVAILABLE = hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+        except Exception:  # noqa: BLE001
+            _CUDA_ENHANCE_AVAILABLE = False
+    return _CUDA_ENHANCE_AVAILABLE
+
+
+def _enhance_on_gpu(roi: np.ndarray, brightness: float) -> np.ndarray:
+    """在 GPU 上执行 CLAHE + Gamma 校正（cv2.cuda），流程与 CPU 版本一致。"""
+    stream = cv2.cuda_Stream.Null()
+    gpu_img = cv2.cuda_GpuMat()
+    gpu_img.upload(roi)
+    
+    gpu_lab = cv2.cuda.cvtColor(gpu_img, cv2.COLOR_BGR2LAB)
+    l, a, b = cv2.cuda.split(gpu_lab)
+    clahe = cv2.cuda.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    l_enhanced = clahe.apply(l, stream)
+    gpu_lab = cv2.cuda.merge([l_enhanced, a, b])
+    gpu_enhanced = cv2.cuda.cvtColor(gpu_lab, cv2.COLOR_LAB2BGR)
+    
+    if brightness < 60:
+        lut = cv2.cuda.createLookUpTable(_get_gamma_table(brightness).reshape(1, 256))
+        gpu_enhanced = lut.transform(gpu_enhanced)
+    
+    return gpu_enhanced.download()
+
+
 def _enhance_image_for_night(roi: np.ndarray, brightness: float = None) -> np.ndarray:
     """对夜间图像进行增强处理，提高YOLO检测率。
     
@@ -733,53 +1114,52 @@ def _enhance_image_for_night(roi: np.ndarray, brightness: float = None) -> np.nd
     """
     try:
         if brightness is None:
-            # 计算平均亮度
-            gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-            brightness = float(np.mean(gray))
+            # 计算平均亮度：每 8 个像素取 1 个，按 BT.601 权重估算灰度均值
+            sample = roi[::8, ::8]
+            brightness = float(
+                0.114 * sample[:, :, 0].mean()
+                + 0.587 * sample[:, :, 1].mean()
+                + 0.299 * sample[:, :, 2].mean()
+            )
         
         # 如果亮度较高（>120），不需要增强
         if brightness > 120:
             return roi
         
+        # OpenCV 带 CUDA 支持时在 GPU 上增强，失败则回退到 CPU
+        if _cuda_enhance_available():
+            try:
+                return _enhance_on_gpu(roi, brightness)
+            except Exception as e:  # noqa: BLE001
+                logger.warning("GPU 图像增强失败，回退到 CPU: %s", e)
+        
+        # 各步骤写入线程内复用的缓冲区，避免每帧重新分配整帧大小的数组
+        # 注意：返回值是当前线程的缓冲区，在同一线程下一次增强前有效
+        bufs = _get_enhance_buffers(roi.shape)
+        
         # 方法1: CLAHE（对比度受限的自适应直方图均衡化）- 对夜间图像效果最好
-        lab = cv2.cvtColor(roi, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
+        lab = cv2.cvtColor(roi, cv2.COLOR_BGR2LAB, dst=bufs["lab"])
+        l = cv2.extractChannel(lab, 0, dst=bufs["l"])
         
         # 对L通道应用CLAHE
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        l_enhanced = clahe.apply(l)
+        l_enhanced = _get_clahe().apply(l, dst=bufs["l_enhanced"])
         
-        # 合并通道
-        lab_enhanced = cv2.merge([l_enhanced, a, b])
-        enhanced = cv2.cvtColor(lab_enhanced, cv2.COLOR_LAB2BGR)
+        # 合并通道（原地替换 L 通道）
+        cv2.insertChannel(l_enhanced, lab, 0)
+        enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=bufs["out"])
         
         # 方法2: Gamma校正（如果亮度很低，额外应用Gamma校正）
         if brightness < 60:
-            # 计算Gamma值（亮度越低，Gamma值越大，增强越明显）
-            gamma = 1.5 + (60 - brightness) / 60 * 0.5  # 1.5 到 2.0 之间
-            inv_gamma = 1.0 / gamma
-            table = np.array([((i / 255.0) ** inv_gamma) * 255 for i in np.arange(0, 256)]).astype("uint8")
-            enhanced = cv2.LUT(enhanced, table)
+            enhanced = cv2.LUT(enhanced, _get_gamma_table(brightness), dst=enhanced)
         
         return enhanced
     except Exception as e:
-        print(f"[YOLODetector] 图像增强失败: {e}")
+        logger.warning("图像增强失败: %s", e)
         return roi  # 失败时返回原图
 
 
-def _calculate_dynamic_threshold(brightness: float, base_threshold: float = None) -> float:
-    """根据图像亮度动态计算置信度阈值。
-    
-    参数:
-        brightness: 图像平均亮度（0-255）
-        base_threshold: 基础阈值，默认使用 DEFAULT_CONF_THRESHOLD
-    
-    返回:
-        调整后的置信度阈值
-    """
-    if base_threshold is None:
-        base_threshold = DEFAULT_CONF_THRESHOLD
-    
+def _compute_dynamic_threshold(brightness: float, base_threshold: float) -> float:
+    """亮度→置信度阈值的分段函数（纯计算，由 _calculate_dynamic_threshold 查表/缓存调用）。"""
     # 亮度阈值分段调整
     if brightness < 50:
         # 极暗环境（<50）：大幅降低阈值，提高检测率
@@ -802,6 +1182,35 @@ def _calculate_dynamic_threshold(brightness: float, base_threshold: float = None
     return dynamic_threshold
 
 
+# 默认基础阈值下 0-255 每个整数亮度对应的置信度阈值，导入时预计算
+_THRESH_LUT = np.array(
+    [_compute_dynamic_threshold(b, DEFAULT_CONF_THRESHOLD) for b in range(256)],
+    dtype=np.float32,
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _cached_dynamic_threshold(brightness: int, base_threshold: float) -> float:
+    """非默认基础阈值时按 (整数亮度, 基础阈值) 缓存计算结果。"""
+    return _compute_dynamic_threshold(brightness, base_threshold)
+
+
+def _calculate_dynamic_threshold(brightness: float, base_threshold: float = None) -> float:
+    """根据图像亮度动态计算置信度阈值。
+    
+    参数:
+        brightness: 图像平均亮度（0-255），按四舍五入后的整数亮度查表
+        base_threshold: 基础阈值，默认使用 DEFAULT_CONF_THRESHOLD
+    
+    返回:
+        调整后的置信度阈值
+    """
+    level = min(255, max(0, int(round(brightness))))
+    if base_threshold is None or base_threshold == DEFAULT_CONF_THRESHOLD:
+        return float(_THRESH_LUT[level])
+    return _cached_dynamic_threshold(level, float(base_threshold))
+
+
 def extract_vehicle_features(vehicle_roi: np.ndarray) -> Dict[str, Any]:
     """从车辆ROI图像中提取视觉特征。
     
@@ -816,46 +1225,53 @@ def extract_vehicle_features(vehicle_roi: np.ndarray) -> Dict[str, Any]:
         - has_rear_wiper: 是否有后雨刮（布尔值）
     """
     try:
+        h, w = vehicle_roi.shape[:2]
+        
+        # 颜色直方图归一化后与尺度无关，大 ROI 先缩小到 128x128 再转换颜色空间
+        hist_roi = vehicle_roi
+        if h * w > HIST_SAMPLE_SIZE * HIST_SAMPLE_SIZE * 4:
+            hist_roi = cv2.resize(vehicle_roi, (HIST_SAMPLE_SIZE, HIST_SAMPLE_SIZE), interpolation=cv2.INTER_AREA)
+        
         # 转换为HSV颜色空间
-        hsv = cv2.cvtColor(vehicle_roi, cv2.COLOR_BGR2HSV)
+        hsv = cv2.cvtColor(hist_roi, cv2.COLOR_BGR2HSV)
         
-        # 提取H和S通道直方图（32 bins）
-        hist_h = cv2.calcHist([hsv], [0], None, [32], [0, 180])
-        hist_s = cv2.calcHist([hsv], [1], None, [32], [0, 256])
+        # 一次遍历得到 H×S 二维直方图（32x32 bins），再分别求边缘分布得到 H 和 S 通道直方图
+        hist2d = cv2.calcHist([hsv], [0, 1], None, [32, 32], [0, 180, 0, 256])
+        hist_h = hist2d.sum(axis=1, dtype=np.float32)
+        hist_s = hist2d.sum(axis=0, dtype=np.float32)
         
-        # 归一化直方图
-        hist_h = hist_h.flatten() / (hist_h.sum() + 1e-6)
-        hist_s = hist_s.flatten() / (hist_s.sum() + 1e-6)
+        # 归一化直方图（L1 归一化，原地进行；全零直方图保持为零）
+        cv2.normalize(hist_h, hist_h, alpha=1.0, norm_type=cv2.NORM_L1)
+        cv2.normalize(hist_s, hist_s, alpha=1.0, norm_type=cv2.NORM_L1)
         
         # 计算宽高比
-        h, w = vehicle_roi.shape[:2]
         aspect_ratio = float(w) / (h + 1e-6)
         
         # 检测后雨刮（简单边缘检测方法）
-        # 在后车窗区域（图像下半部分）检测水平边缘
-        gray = cv2.cvtColor(vehicle_roi, cv2.COLOR_BGR2GRAY)
-        lower_half = gray[h // 2:, :]
+        # 在后车窗区域（图像下半部分）检测水平边缘；
+        # 未缩放时直接复用 HSV 的 V 通道（max(B,G,R)）作为灰度图，省去一次颜色转换
+        if hist_roi is vehicle_roi:
+            lower_half = hsv[h // 2:, :, 2]
+        else:
+            lower_half = cv2.cvtColor(vehicle_roi[h // 2:, :], cv2.COLOR_BGR2GRAY)
         
         # 使用Canny边缘检测
         edges = cv2.Canny(lower_half, 50, 150)
         
-        # 检测水平线（雨刮通常是水平线）
-        horizontal_lines = 0
-        for y in range(edges.shape[0]):
-            line_pixels = np.sum(edges[y, :] > 0)
-            if line_pixels > edges.shape[1] * 0.3:  # 如果一行中有30%以上是边缘
-                horizontal_lines += 1
+        # 检测水平线（雨刮通常是水平线）：统计每行边缘像素数，一行中有30%以上是边缘即视为水平线
+        row_counts = np.count_nonzero(edges, axis=1)
+        horizontal_lines = int(np.count_nonzero(row_counts > edges.shape[1] * 0.3))
         
         has_rear_wiper = horizontal_lines >= 2  # 至少2条水平线
         
         return {
-            "color_hist_h": hist_h.tolist(),
-            "color_hist_s": hist_s.tolist(),
+            "color_hist_h": hist_h.ravel().tolist(),
+            "color_hist_s": hist_s.ravel().tolist(),
             "aspect_ratio": aspect_ratio,
             "has_rear_wiper": bool(has_rear_wiper),
         }
     except Exception as e:
-        print(f"[YOLODetector] 特征提取失败: {e}")
+        logger.warning("特征提取失败: %s", e)
         # 返回默认特征
         return {
             "color_hist_h": [0.0] * 32,
@@ -865,223 +1281,316 @@ def extract_vehicle_features(vehicle_roi: np.ndarray) -> Dict[str, Any]:
         }
 
 
-def detect_cars_in_region(
-    image_path: Path,
+def _crop_region(
+    img: np.ndarray,
     region: Tuple[int, int, int, int],
+    use_padding: bool = True,
+) -> Optional[np.ndarray]:
+    """按车位区域 (x, y, width, height) 裁剪 ROI（可选 padding），区域无效或太小时返回 None。"""
+    img_height, img_width = img.shape[:2]
+    
+    # 解析区域坐标 (x, y, width, height)
+    bbox = np.asarray(region, dtype=np.int64)
+    img_size = np.array([img_width, img_height], dtype=np.int64)
+    xy, wh = bbox[:2], bbox[2:]
+    
+    # 调试：输出原始区域坐标
+    logger.debug("检测区域: 原始坐标=%s, 图像尺寸=(%s, %s)", tuple(region), img_width, img_height)
+    
+    # 如果使用padding，在区域基础上扩大一点
+    if use_padding and REGION_PADDING > 0:
+        xy = np.maximum(xy - REGION_PADDING, 0)
+        wh = np.minimum(wh + 2 * REGION_PADDING, img_size - xy)
+        logger.debug("应用padding后: (%s, %s, %s, %s)", *xy.tolist(), *wh.tolist())
+    
+    # 确保坐标在图片范围内
+    x1, y1 = np.clip(xy, 0, img_size).tolist()
+    x2, y2 = np.clip(xy + wh, 0, img_size).tolist()
+    
+    # 如果区域无效或太小，返回 None
+    if x2 <= x1 or y2 <= y1:
+        logger.warning("区域无效 (x1=%s, y1=%s, x2=%s, y2=%s)", x1, y1, x2, y2)
+        return None
+    
+    region_width = x2 - x1
+    region_height = y2 - y1
+    if region_width < MIN_REGION_SIZE or region_height < MIN_REGION_SIZE:
+        # 区域太小，可能检测不准
+        logger.warning("区域太小 (%sx%s < %sx%s)", region_width, region_height, MIN_REGION_SIZE, MIN_REGION_SIZE)
+        return None
+    
+    # 裁剪区域
+    roi = img[y1:y2, x1:x2]
+    if roi.size == 0:
+        logger.warning("ROI为空")
+        return None
+    
+    logger.debug("ROI尺寸: %sx%s", region_width, region_height)
+    return roi
+
+
+def _is_blank_roi(roi: np.ndarray) -> bool:
+    """判断 ROI 是否为几乎无信息的纯黑/过曝画面（均值极低或极高且标准差很小）。"""
+    mean, stddev = cv2.meanStdDev(roi)
+    if float(stddev.mean()) >= BLANK_ROI_MAX_STD:
+        return False
+    brightness = float(mean.mean())
+    return brightness < DARK_ROI_MAX_MEAN or brightness > BRIGHT_ROI_MIN_MEAN
+
+
+def _letterbox(roi: np.ndarray, size: int = MODEL_INPUT_SIZE) -> Tuple[np.ndarray, float, int, int]:
+    """将 ROI 等比缩放并用灰边填充到 size x size，便于多个 ROI 堆叠为一批推理。
+
+    返回:
+        (填充后的图像, 缩放比例, 左侧填充像素, 顶部填充像素)
+    """
+    roi_height, roi_width = roi.shape[:2]
+    scale = min(size / roi_width, size / roi_height)
+    new_width = max(1, int(round(roi_width * scale)))
+    new_height = max(1, int(round(roi_height * scale)))
+    resized = cv2.resize(roi, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    
+    pad_x = (size - new_width) // 2
+    pad_y = (size - new_height) // 2
+    padded = cv2.copyMakeBorder(
+        resized,
+        pad_y,
+        size - new_height - pad_y,
+        pad_x,
+        size - new_width - pad_x,
+        cv2.BORDER_CONSTANT,
+        value=(114, 114, 114),
+    )
+    return padded, scale, pad_x, pad_y
+
+
+def _evaluate_region_result(
+    result: Any,
+    roi: np.ndarray,
+    letterbox_info: Tuple[float, int, int],
+    conf_threshold: float,
+    image_brightness: Optional[float],
+    extract_features: bool,
+) -> Tuple[bool, float, Optional[Dict[str, Any]]]:
+    """解析单个 ROI 的 YOLO 结果，判定是否有车并可选提取特征（坐标从 letterbox 映射回 ROI）。"""
+    scale, pad_x, pad_y = letterbox_info
+    
+    # 根据亮度一次性确定有效阈值（等价于原先的三段判断：标准阈值 / 亮度<80 时阈值*0.7 / 亮度<120 时 0.1）
+    effective_threshold = conf_threshold
+    if image_brightness is not None:
+        if image_brightness < 80:
+            effective_threshold = min(conf_threshold * 0.7, 0.1)
+        elif image_brightness < 120:
+            effective_threshold = min(conf_threshold, 0.1)
+    
+    max_confidence = 0.0
+    has_vehicle = False
+    best_box = None  # 置信度最高的车辆检测框（相对于ROI的坐标）
+    
+    def _to_roi_box(xyxy) -> Tuple[int, int, int, int]:
+        x1, y1, x2, y2 = xyxy
+        return (
+            int((x1 - pad_x) / scale),
+            int((y1 - pad_y) / scale),
+            int((x2 - pad_x) / scale),
+            int((y2 - pad_y) / scale),
+        )
+    
+    boxes = result.boxes
+    if boxes is not None and len(boxes) > 0:
+        # 一次性把所有检测框拷贝到 CPU，避免逐框 .cpu() 触发 GPU 同步
+        xyxy_cpu = boxes.xyxy.cpu().numpy()
+        cls_cpu = boxes.cls.cpu().numpy().astype(np.int64)
+        conf_cpu = boxes.conf.cpu().numpy()
+        
+        # 检查车辆类别（car, motorcycle, bus, truck），向量化过滤
+        vehicle_mask = _vehicle_class_mask(cls_cpu)
+        keep = vehicle_mask & (conf_cpu >= effective_threshold)
+        if keep.any():
+            has_vehicle = True
+            kept_idx = np.flatnonzero(keep)
+            best = kept_idx[int(conf_cpu[kept_idx].argmax())]
+            max_confidence = float(conf_cpu[best])
+            best_box = _to_roi_box(xyxy_cpu[best])
+        
+        # 输出调试信息
+        if logger.isEnabledFor(logging.DEBUG):
+            if vehicle_mask.any():
+                logger.debug("ROI区域检测到 %s 个车辆对象（有效阈值=%.3f）:", int(vehicle_mask.sum()), effective_threshold)
+                for cls_id, conf in zip(cls_cpu[vehicle_mask].tolist(), conf_cpu[vehicle_mask].tolist()):
+                    status = "✓通过" if conf >= effective_threshold else "✗低于阈值"
+                    logger.debug("  类别ID=%s, 置信度=%.3f, 阈值=%.3f, %s", cls_id, conf, conf_threshold, status)
+            else:
+                logger.debug("ROI区域检测到 %s 个对象，但都不是车辆类型:", len(cls_cpu))
+                for cls_id, conf in zip(cls_cpu[:5].tolist(), conf_cpu[:5].tolist()):  # 只显示前5个
+                    logger.debug("  类别ID=%s, 置信度=%.3f", cls_id, conf)
+    else:
+        logger.debug("ROI区域未检测到任何对象")
+    
+    if has_vehicle:
+        logger.info("✓ 最终判定：有车，最高置信度=%.3f", max_confidence)
+    else:
+        logger.info("✗ 最终判定：无车")
+    
+    # 如果检测到车辆且需要提取特征，提取最高置信度车辆的特征
+    vehicle_features = None
+    if has_vehicle and extract_features and best_box is not None:
+        try:
+            # 从ROI中裁剪出车辆区域（best_box是相对于ROI的坐标）
+            bx1, by1, bx2, by2 = best_box
+            # 确保坐标在ROI范围内
+            bx1 = max(0, min(bx1, roi.shape[1]))
+            by1 = max(0, min(by1, roi.shape[0]))
+            bx2 = max(0, min(bx2, roi.shape[1]))
+            by2 = max(0, min(by2, roi.shape[0]))
+            
+            if bx2 > bx1 and by2 > by1:
+                vehicle_roi = roi[by1:by2, bx1:bx2]
+                if vehicle_roi.size > 0:
+                    vehicle_features = extract_vehicle_features(vehicle_roi)
+        except Exception as e:
+            logger.warning("提取车辆特征时出错: %s", e)
+            vehicle_features = None
+    
+    return has_vehicle, max_confidence, vehicle_features
+
+
+def detect_cars_in_regions(
+    image_path: Path,
+    regions: List[Tuple[int, int, int, int]],
     conf_threshold: float = None,
     use_padding: bool = True,
     extract_features: bool = True,
-    image_brightness: float = None,  # 图像亮度，用于动态调整阈值
-    enable_night_enhancement: bool = True,  # 是否启用夜间图像增强
-) -> Tuple[bool, float, Optional[Dict[str, Any]]]:
-    """在图片的指定区域内检测是否有车辆，并可选择提取车辆特征。
+    image_brightness: float = None,
+    enable_night_enhancement: bool = True,
+    decode_scale: int = 1,
+) -> List[Tuple[bool, float, Optional[Dict[str, Any]]]]:
+    """批量检测同一张图片中多个区域是否有车辆（参数含义同 detect_cars_in_region）。
 
-    参数:
-        image_path: 图片的绝对路径。
-        region: 区域坐标 (x, y, width, height)，其中 x, y 是左上角坐标。
-        conf_threshold: 置信度阈值，默认使用 DEFAULT_CONF_THRESHOLD。如果提供了 image_brightness，会动态调整。
-        use_padding: 是否在区域基础上添加padding，提高检测率。
-        extract_features: 是否提取车辆特征（用于车辆重识别）。
-        image_brightness: 图像平均亮度（0-255），用于动态调整置信度阈值。如果为None，会从ROI自动计算。
-        enable_night_enhancement: 是否启用夜间图像增强（CLAHE + Gamma校正）。
+    图片只读取一次；所有有效 ROI 先 letterbox 到 640x640，再按 REGION_BATCH_SIZE 分批一次性推理，
+    避免逐个区域调用 YOLO 带来的 kernel 启动开销和 GPU 利用率不足。
+    decode_scale 为 2/4/8 时按该倍数降采样解码（DCT 域缩放），区域坐标同步按比例缩小。
 
     返回:
-        (bool, float, Optional[Dict]): 
-        - bool: 如果在该区域内检测到车辆（置信度 >= conf_threshold），返回 True；否则返回 False。
-        - float: 检测到的最高置信度（如果有车），否则返回 0.0。
-        - Optional[Dict]: 车辆特征字典（如果 extract_features=True 且检测到车辆），否则为 None。
+        与 regions 一一对应的 (是否有车, 最高置信度, 车辆特征) 列表。
     """
+    empty_result: Tuple[bool, float, Optional[Dict[str, Any]]] = (False, 0.0, None)
+    outputs = [empty_result] * len(regions)
+    if not regions:
+        return outputs
+    
     if not image_path.exists():
-        print(f"[YOLODetector] 警告: 图片文件不存在: {image_path}")
-        return False, 0.0, None
+        logger.warning("图片文件不存在: %s", image_path)
+        return outputs
     
     if conf_threshold is None:
         conf_threshold = DEFAULT_CONF_THRESHOLD
     
     try:
-        # 读取图片
-        img = cv2.imread(str(image_path))
+        # 读取图片（所有区域共用）；ROI 最终都会缩放到 640x640，大图可降采样解码以减少解码开销
+        if decode_scale not in _REDUCED_DECODE_FLAGS:
+            decode_scale = 1
+        img = _imread_fast(image_path, decode_scale)
         if img is None:
-            print(f"[YOLODetector] 警告: 无法读取图片: {image_path}")
-            return False, 0.0, None
-        
-        img_height, img_width = img.shape[:2]
-        
-        # 解析区域坐标 (x, y, width, height)
-        x, y, w, h = region
-        
-        # 调试：输出原始区域坐标
-        print(f"[YOLODetector] 检测区域: 原始坐标=({x}, {y}, {w}, {h}), 图像尺寸=({img_width}, {img_height})")
-        
-        # 如果使用padding，在区域基础上扩大一点
-        if use_padding and REGION_PADDING > 0:
-            x = max(0, x - REGION_PADDING)
-            y = max(0, y - REGION_PADDING)
-            w = min(img_width - x, w + 2 * REGION_PADDING)
-            h = min(img_height - y, h + 2 * REGION_PADDING)
-            print(f"[YOLODetector] 应用padding后: ({x}, {y}, {w}, {h})")
-        
-        x1, y1 = x, y
-        x2, y2 = x + w, y + h
-        
-        # 确保坐标在图片范围内
-        x1 = max(0, min(x1, img_width))
-        y1 = max(0, min(y1, img_height))
-        x2 = max(0, min(x2, img_width))
-        y2 = max(0, min(y2, img_height))
-        
-        # 如果区域无效或太小，返回 False
-        if x2 <= x1 or y2 <= y1:
-            print(f"[YOLODetector] 警告: 区域无效 (x1={x1}, y1={y1}, x2={x2}, y2={y2})")
-            return False, 0.0, None
+            logger.warning("无法读取图片: %s", image_path)
+            return outputs
         
-        region_width = x2 - x1
-        region_height = y2 - y1
-        if region_width < MIN_REGION_SIZE or region_height < MIN_REGION_SIZE:
-            # 区域太小，可能检测不准，返回 False
-            print(f"[YOLODetector] 警告: 区域太小 ({region_width}x{region_height} < {MIN_REGION_SIZE}x{MIN_REGION_SIZE})")
-            return False, 0.0, None
-        
-        # 裁剪区域
-        roi = img[y1:y2, x1:x2]
-        if roi.size == 0:
-            print(f"[YOLODetector] 警告: ROI为空")
-            return False, 0.0, None
+        # 裁剪并 letterbox 所有有效区域
+        pending: List[Tuple[int, np.ndarray, np.ndarray, Tuple[float, int, int]]] = []
+        for idx, region in enumerate(regions):
+            if decode_scale > 1:
+                region = tuple(int(v) // decode_scale for v in region)
+            roi = _crop_region(img, region, use_padding)
+            if roi is None:
+                continue
+            if _is_blank_roi(roi):
+                # 全黑/全白且几乎无纹理的区域不含任何信息，直接判定为无车，省去一次 YOLO 推理
+                logger.debug("ROI几乎为纯色（全黑/过曝），跳过检测: region=%s", region)
+                continue
+            padded, scale, pad_x, pad_y = _letterbox(roi)
+            pending.append((idx, roi, padded, (scale, pad_x, pad_y)))
         
-        # 如果裁剪后的区域太小，可能检测不准
-        roi_height, roi_width = roi.shape[:2]
-        if roi_width < MIN_REGION_SIZE or roi_height < MIN_REGION_SIZE:
-            print(f"[YOLODetector] 警告: ROI尺寸太小 ({roi_width}x{roi_height} < {MIN_REGION_SIZE}x{MIN_REGION_SIZE})")
-            return False, 0.0, None
+        if not pending:
+            return outputs
         
-        print(f"[YOLODetector] ROI尺寸: {roi_width}x{roi_height}")
+        # 加载模型（启用 TensorRT 时使用固定 640x640 输入的区域检测引擎）
+        model, fixed_batch = _load_region_model()
         
-        # 加载模型
-        model = _load_model()
+        # 注意：在暗光环境下，使用更低的初始置信度（0.1）来获取所有可能的检测结果
+        # 然后在后处理中根据动态阈值进行过滤
+        inference_conf = min(0.1, conf_threshold) if image_brightness and image_brightness < 120 else conf_threshold
+        logger.debug("YOLO推理参数: conf=%.3f (动态阈值=%.3f), ROI数量=%s", inference_conf, conf_threshold, len(pending))
         
-        # 执行推理：由于 ultralytics 的某些版本不支持直接传入 numpy 数组，
-        # 我们需要将 ROI 保存为临时文件，然后让 YOLO 读取
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp_file:
-            tmp_path = Path(tmp_file.name)
-            # 保存 ROI 为临时图片文件
-            cv2.imwrite(str(tmp_path), roi)
+        for start in range(0, len(pending), REGION_BATCH_SIZE):
+            chunk = pending[start:start + REGION_BATCH_SIZE]
+            batch = [item[2] for item in chunk]
+            if fixed_batch is not None and len(batch) < fixed_batch:
+                # 静态形状引擎要求固定批大小，不足部分用灰色空白图补齐（其结果会被丢弃）
+                blank = np.full((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE, 3), 114, dtype=np.uint8)
+                batch.extend([blank] * (fixed_batch - len(batch)))
+            # 每个 ROI 均为连续内存的 uint8 图像，由 ultralytics 负责归一化并转换为 FP16（GPU）/FP32（CPU）
+            with inference_context():
+                results = model(batch, conf=inference_conf, verbose=False)
             
-            try:
-                # 使用临时文件路径进行推理
-                # 注意：在暗光环境下，使用更低的初始置信度（0.1）来获取所有可能的检测结果
-                # 然后在后处理中根据动态阈值进行过滤
-                inference_conf = min(0.1, conf_threshold) if image_brightness and image_brightness < 120 else conf_threshold
-                print(f"[YOLODetector] YOLO推理参数: conf={inference_conf:.3f} (动态阈值={conf_threshold:.3f})")
-                results = model(str(tmp_path), conf=inference_conf, verbose=False)
-            finally:
-                # 清理临时文件
+            for (idx, roi, _, letterbox_info), result in zip(chunk, results):
                 try:
-                    tmp_path.unlink()
-                except Exception:
-                    pass
-        
-        # 检查是否有车辆检测结果（支持多种车辆类型）
-        max_confidence = 0.0
-        has_vehicle = False
-        vehicle_classes = []  # 记录检测到的车辆类型
-        best_box = None  # 记录置信度最高的检测框
-        all_detections = []  # 记录所有检测结果（用于调试）
-        
-        for result in results:
-            if result.boxes is None:
-                continue
-            
-            boxes = result.boxes
-            for i in range(len(boxes)):
-                cls_id = int(boxes.cls[i])
-                conf = float(boxes.conf[i])
-                
-                # 记录所有检测结果（用于调试）
-                all_detections.append({
-                    "class_id": cls_id,
-                    "confidence": conf,
-                    "is_vehicle": cls_id in VEHICLE_CLASS_IDS,
-                })
-                
-                # 检查车辆类别（car, motorcycle, bus, truck）
-                # 注意：在暗光环境下，即使置信度略低于阈值，也考虑接受（但降低权重）
-                if cls_id in VEHICLE_CLASS_IDS:
-                    # 标准阈值检查
-                    if conf >= conf_threshold:
-                        has_vehicle = True
-                        if conf > max_confidence:
-                            max_confidence = conf
-                            # 记录置信度最高的检测框（相对于ROI的坐标）
-                            x1, y1, x2, y2 = boxes.xyxy[i].cpu().numpy()
-                            best_box = (int(x1), int(y1), int(x2), int(y2))
-                        vehicle_classes.append(cls_id)
-                    # 暗光环境下的宽松检查（置信度在阈值的70%-100%之间，且亮度<80）
-                    elif image_brightness < 80 and conf >= conf_threshold * 0.7:
-                        # 在暗光环境下，即使置信度略低，也接受检测结果
-                        has_vehicle = True
-                        if conf > max_confidence:
-                            max_confidence = conf
-                            x1, y1, x2, y2 = boxes.xyxy[i].cpu().numpy()
-                            best_box = (int(x1), int(y1), int(x2), int(y2))
-                        vehicle_classes.append(cls_id)
-                        print(f"[YOLODetector] 暗光环境宽松检测：置信度={conf:.3f}（阈值={conf_threshold:.3f}）")
-                    # 更宽松的检查：在暗光环境下（亮度<120），接受置信度>=0.1的检测结果
-                    elif image_brightness < 120 and conf >= 0.1:
-                        has_vehicle = True
-                        if conf > max_confidence:
-                            max_confidence = conf
-                            x1, y1, x2, y2 = boxes.xyxy[i].cpu().numpy()
-                            best_box = (int(x1), int(y1), int(x2), int(y2))
-                        vehicle_classes.append(cls_id)
-                        print(f"[YOLODetector] 暗光环境超宽松检测：置信度={conf:.3f}（阈值={conf_threshold:.3f}，亮度={image_brightness:.1f}）")
-        
-        # 输出调试信息
-        if all_detections:
-            vehicle_detections = [d for d in all_detections if d["is_vehicle"]]
-            if vehicle_detections:
-                print(f"[YOLODetector] ROI区域检测到 {len(vehicle_detections)} 个车辆对象:")
-                for det in vehicle_detections:
-                    status = "✓通过" if det['confidence'] >= conf_threshold else "✗低于阈值"
-                    print(f"  类别ID={det['class_id']}, 置信度={det['confidence']:.3f}, 阈值={conf_threshold:.3f}, {status}")
-            else:
-                print(f"[YOLODetector] ROI区域检测到 {len(all_detections)} 个对象，但都不是车辆类型:")
-                for det in all_detections[:5]:  # 只显示前5个
-                    print(f"  类别ID={det['class_id']}, 置信度={det['confidence']:.3f}")
-        else:
-            print(f"[YOLODetector] ROI区域未检测到任何对象")
-        
-        if has_vehicle:
-            print(f"[YOLODetector] ✓ 最终判定：有车，最高置信度={max_confidence:.3f}")
-        else:
-            print(f"[YOLODetector] ✗ 最终判定：无车")
-        
-        # 如果检测到车辆且需要提取特征，提取最高置信度车辆的特征
-        vehicle_features = None
-        if has_vehicle and extract_features and best_box is not None:
-            try:
-                # 从ROI中裁剪出车辆区域（best_box是相对于ROI的坐标）
-                bx1, by1, bx2, by2 = best_box
-                # 确保坐标在ROI范围内
-                bx1 = max(0, min(bx1, roi.shape[1]))
-                by1 = max(0, min(by1, roi.shape[0]))
-                bx2 = max(0, min(bx2, roi.shape[1]))
-                by2 = max(0, min(by2, roi.shape[0]))
-                
-                if bx2 > bx1 and by2 > by1:
-                    vehicle_roi = roi[by1:by2, bx1:bx2]
-                    if vehicle_roi.size > 0:
-                        vehicle_features = extract_vehicle_features(vehicle_roi)
-            except Exception as e:
-                print(f"[YOLODetector] 提取车辆特征时出错: {e}")
-                vehicle_features = None
+                    outputs[idx] = _evaluate_region_result(
+                        result,
+                        roi,
+                        letterbox_info,
+                        conf_threshold,
+                        image_brightness,
+                        extract_features,
+                    )
+                except Exception as e:
+                    logger.exception("区域检测失败: %s", e)
         
-        # 返回检测结果、最高置信度和特征
-        return has_vehicle, max_confidence, vehicle_features
+        return outputs
         
     except Exception as e:
-        print(f"[YOLODetector] 区域检测失败: {e}")
-        import traceback
-        traceback.print_exc()
-        return False, 0.0, None
+        logger.exception("区域检测失败: %s", e)
+        return outputs
+
+
+def detect_cars_in_region(
+    image_path: Path,
+    region: Tuple[int, int, int, int],
+    conf_threshold: float = None,
+    use_padding: bool = True,
+    extract_features: bool = True,
+    image_brightness: float = None,  # 图像亮度，用于动态调整阈值
+    enable_night_enhancement: bool = True,  # 是否启用夜间图像增强
+    decode_scale: int = 1,  # 降采样解码倍数（1/2/4/8）
+) -> Tuple[bool, float, Optional[Dict[str, Any]]]:
+    """在图片的指定区域内检测是否有车辆，并可选择提取车辆特征。
+
+    参数:
+        image_path: 图片的绝对路径。
+        region: 区域坐标 (x, y, width, height)，其中 x, y 是左上角坐标。
+        conf_threshold: 置信度阈值，默认使用 DEFAULT_CONF_THRESHOLD。如果提供了 image_brightness，会动态调整。
+        use_padding: 是否在区域基础上添加padding，提高检测率。
+        extract_features: 是否提取车辆特征（用于车辆重识别）。
+        image_brightness: 图像平均亮度（0-255），用于动态调整置信度阈值。如果为None，会从ROI自动计算。
+        enable_night_enhancement: 是否启用夜间图像增强（CLAHE + Gamma校正）。
+        decode_scale: 降采样解码倍数，2/4/8 时由 JPEG 解码器直接输出缩小后的图像，默认 1 为原尺寸解码。
 
+    说明:
+        CUDA 可用时推理使用 FP16 半精度（见 _apply_predict_defaults），CPU 上保持 FP32。
+        内部调用 detect_cars_in_regions，批量检测多个区域时请直接使用后者。
+
+    返回:
+        (bool, float, Optional[Dict]): 
+        - bool: 如果在该区域内检测到车辆（置信度 >= conf_threshold），返回 True；否则返回 False。
+        - float: 检测到的最高置信度（如果有车），否则返回 0.0。
+        - Optional[Dict]: 车辆特征字典（如果 extract_features=True 且检测到车辆），否则为 None。
+    """
+    return detect_cars_in_regions(
+        image_path,
+        [region],
+        conf_threshold=conf_threshold,
+        use_padding=use_padding,
+        extract_features=extract_features,
+        image_brightness=image_brightness,
+        enable_night_enhancement=enable_night_enhancement,
+        decode_scale=decode_scale,
+    )[0]
@@ -0,0 +1,193 @@
+"""YOLO 常驻检测服务
+
+说明：
+- 模型加载（导入 ultralytics、读取权重、首次推理初始化）耗时数秒，远大于单次推理耗时；
+- 本模块启动一个常驻进程，先调用 preload_model() 预热模型，再监听 Unix Domain Socket；
+- 客户端发送 (image_path, conf_threshold, image_brightness)，服务端返回 (car_boxes, preprocess_info)；
+- 消息只用 JSON 传递数据，不使用 pickle，避免反序列化执行任意代码；
+- Socket 放在仅当前用户可访问的目录（0700）下，文件权限 0600，客户端连接前校验属主；
+- detect_cars_on_image 会优先尝试连接本服务，连接失败时回退到进程内检测。
+
+启动方式（项目根目录下）：
+    python -m services.yolo_server
+
+环境变量：
+- YOLO_SERVER_SOCKET: Socket 文件路径，默认 $XDG_RUNTIME_DIR/yolo_detector.sock，
+  未设置 XDG_RUNTIME_DIR 时为 <临时目录>/yolo_detector-<uid>/yolo_detector.sock；设为空字符串可禁用客户端连接
+- YOLO_SERVER_TIMEOUT: 客户端等待结果的超时时间（秒），默认 30
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _default_socket_path() -> str:
+    """默认 Socket 路径：放在仅当前用户可访问的运行时目录下，而不是所有人可写的 /tmp 根目录。"""
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        uid = os.getuid() if hasattr(os, "getuid") else 0
+        runtime_dir = os.path.join(tempfile.gettempdir(), f"yolo_detector-{uid}")
+    return os.path.join(runtime_dir, "yolo_detector.sock")
+
+
+SOCKET_PATH = os.getenv("YOLO_SERVER_SOCKET", _default_socket_path())
+CLIENT_TIMEOUT = float(os.getenv("YOLO_SERVER_TIMEOUT", "30"))
+
+# 消息格式：4 字节大端长度 + UTF-8 JSON 负载
+_HEADER = struct.Struct("!I")
+# 单条消息上限，防止异常长度头导致一次性分配过大内存
+_MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+def _send_message(sock: socket.socket, payload: Any) -> None:
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("连接已关闭")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_message(sock: socket.socket) -> Any:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if size > _MAX_MESSAGE_SIZE:
+        raise ValueError(f"消息过大: {size} 字节")
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+def _is_own_socket(path: str) -> bool:
+    """path 是当前用户创建的 Socket 文件（防止其他本地用户预先放置伪造的 Socket）。"""
+    if not hasattr(os, "getuid"):
+        return False
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"数值参数类型错误: {value!r}")
+    return float(value)
+
+
+def _parse_response(payload: Any) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """校验服务端返回的 JSON 结构，并把尺寸字段还原为元组（与进程内检测的返回值一致）。"""
+    car_boxes, preprocess_info = payload
+    if not isinstance(car_boxes, list) or not all(isinstance(box, dict) for box in car_boxes):
+        raise ValueError("car_boxes 格式错误")
+    if not isinstance(preprocess_info, dict):
+        raise ValueError("preprocess_info 格式错误")
+    preprocess_info = {
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in preprocess_info.items()
+    }
+    return car_boxes, preprocess_info
+
+
+def request_detection(
+    image_path: Path,
+    conf_threshold: Optional[float],
+    image_brightness: Optional[float],
+) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """通过常驻服务检测整图车辆；服务不可用时返回 None，由调用方回退到进程内检测。"""
+    if not SOCKET_PATH or not hasattr(socket, "AF_UNIX") or not os.path.exists(SOCKET_PATH):
+        return None
+    if not _is_own_socket(SOCKET_PATH):
+        print(f"[YOLOServer] {SOCKET_PATH} 不是当前用户创建的 Socket，忽略常驻检测服务")
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT)
+            sock.connect(SOCKET_PATH)
+            _send_message(sock, [str(image_path), conf_threshold, image_brightness])
+            return _parse_response(_recv_message(sock))
+    except (OSError, ConnectionError, ValueError, TypeError) as e:
+        print(f"[YOLOServer] 连接常驻检测服务失败，回退到进程内检测: {e}")
+        return None
+
+
+class _DetectionHandler(socketserver.BaseRequestHandler):
+    """处理单个检测请求。"""
+
+    def handle(self) -> None:
+        from services.yolo_detector import _detect_cars_on_image_local
+
+        try:
+            image_path, conf_threshold, image_brightness = _recv_message(self.request)
+            if not isinstance(image_path, str):
+                raise ValueError(f"图片路径类型错误: {image_path!r}")
+            conf_threshold = _optional_float(conf_threshold)
+            image_brightness = _optional_float(image_brightness)
+        except (OSError, ConnectionError, ValueError, TypeError) as e:
+            print(f"[YOLOServer] 读取请求失败: {e}")
+            return
+
+        result = _detect_cars_on_image_local(Path(image_path), conf_threshold, image_brightness)
+        try:
+            _send_message(self.request, result)
+        except OSError as e:
+            print(f"[YOLOServer] 返回结果失败: {e}")
+
+
+def serve(socket_path: str = SOCKET_PATH) -> None:
+    """预热模型并在 Unix Domain Socket 上持续提供检测服务。"""
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("当前平台不支持 Unix Domain Socket")
+
+    from services.yolo_detector import preload_model
+
+    if not preload_model():
+        raise RuntimeError("YOLO 模型预加载失败，无法启动常驻检测服务")
+
+    # Socket 所在目录只允许当前用户访问；已存在时必须属于当前用户且不对其他用户开放
+    socket_dir = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    dir_stat = os.stat(socket_dir)
+    if dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077:
+        raise RuntimeError(f"Socket 目录 {socket_dir} 必须属于当前用户且权限为 0700")
+
+    # 清理上次异常退出遗留的 socket 文件（只删除当前用户自己的 Socket）
+    if os.path.lexists(socket_path):
+        if not _is_own_socket(socket_path):
+            raise RuntimeError(f"{socket_path} 已存在且不是当前用户的 Socket，拒绝覆盖")
+        os.unlink(socket_path)
+
+    with socketserver.ThreadingUnixStreamServer(socket_path, _DetectionHandler) as server:
+        os.chmod(socket_path, 0o600)
+        server.daemon_threads = True
+        print(f"[YOLOServer] 常驻检测服务已启动: {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            if _is_own_socket(socket_path):
+                os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    # 兼容从项目根目录直接运行
+    ROOT = Path(__file__).resolve().parents[1]
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    serve()
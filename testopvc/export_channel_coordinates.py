@@ -25,8 +25,14 @@
 
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
 # 添加项目路径（testopvc 的父目录，即 Smart_RTSP_Stream_Manager）
 CURRENT_DIR = Path(__file__).resolve().parent  # testopvc 目录
@@ -37,13 +43,24 @@ if str(PROJECT_ROOT) not in sys.path:
 from db import SessionLocal
 from models import NvrConfig, ChannelConfig, ParkingSpace
 
+# 文件名中的特殊字符替换表
+_IP_TRANS = str.maketrans(".:", "__")
+_CHANNEL_TRANS = str.maketrans("/", "_")
+
+# 并发导出通道的线程数（每个通道的工作以数据库查询和文件写入为主）
+EXPORT_WORKERS = 16
 
-def export_all_channel_coordinates(output_dir: str = "channel_coordinates") -> Dict[str, Any]:
+
+def export_all_channel_coordinates(
+    output_dir: str = "channel_coordinates",
+    max_workers: int = EXPORT_WORKERS,
+) -> Dict[str, Any]:
     """
     导出所有通道的坐标数据
     
     参数:
         output_dir: 输出目录（相对于 testopvc 目录）
+        max_workers: 并发导出通道的线程数
     
     返回:
         统计信息
@@ -61,13 +78,187 @@ def export_all_channel_coordinates(output_dir: str = "channel_coordinates") -> D
         "errors": []
     }
     
+    # 外部数据库连接按 (host, port, database) 复用，所有通道处理完后统一关闭
+    ext_conns: Dict[Tuple[str, int, str], Any] = {}
+    
+    try:
+        _export_channels(output_path, stats, ext_conns, max_workers)
+    finally:
+        for conn in ext_conns.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    return stats
+
+
+def _get_ext_connection(ext_conns: Dict[Tuple[str, int, str], Any], nvr: NvrConfig) -> Any:
+    """获取（必要时创建）NVR 外部数据库连接，同一 (host, port, database) 只连接一次。"""
+    import pymysql
+    
+    port = nvr.db_port or 3306
+    key = (nvr.db_host, port, nvr.db_name)
+    conn = ext_conns.get(key)
+    if conn is None:
+        conn = pymysql.connect(
+            host=nvr.db_host,
+            user=nvr.db_user,
+            password=nvr.db_password,
+            port=port,
+            database=nvr.db_name,
+            charset='utf8mb4',
+            cursorclass=pymysql.cursors.SSCursor,
+        )
+        ext_conns[key] = conn
+    return conn
+
+
+def _write_json(filepath: Path, data: Dict[str, Any]) -> None:
+    """写入 JSON 文件（UTF-8，缩进2），安装了 orjson 时使用其 C 实现序列化。"""
+    if orjson is not None:
+        with open(filepath, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _query_original_bboxes(ext_conn: Any, sns: List[str]) -> Dict[str, Dict[str, Any]]:
+    """批量查询多个枪机序列号对应的原始bbox，返回 {gun_camera_sn: {车位名称: bbox}}。"""
+    sql = """
+    SELECT 
+        gun_camera_sn,
+        name,
+        JSON_EXTRACT(
+            space_annotation_info,
+            CONCAT('$[', idx - 1, '].bbox')
+        ) AS bbox
+    FROM (
+        SELECT 
+            jt.gun_camera_sn,
+            name,
+            space_annotation_info,
+            idx
+        FROM parking_space_info_tbl
+        JOIN JSON_TABLE(
+            space_annotation_info,
+            '$[*]' COLUMNS (
+                idx FOR ORDINALITY,
+                gun_camera_sn VARCHAR(64) PATH '$.gun_camera_sn'
+            )
+        ) AS jt
+        WHERE jt.gun_camera_sn IN %s
+    ) AS matched;
+    """
+    orig_bbox_by_sn: Dict[str, Dict[str, Any]] = {}
+    ext_cursor = ext_conn.cursor()
+    try:
+        # pymysql 会把 tuple 参数展开为 (%s, %s, ...)
+        ext_cursor.execute(sql, (tuple(sns),))
+        for row in ext_cursor.fetchall():
+            camera_sn, space_name, bbox_json = row
+            if bbox_json:
+                try:
+                    bbox = json.loads(bbox_json)
+                    orig_bbox_by_sn.setdefault(camera_sn, {})[space_name] = bbox
+                except:
+                    pass
+    finally:
+        ext_cursor.close()
+    return orig_bbox_by_sn
+
+
+def _export_channel(
+    output_path: Path,
+    nvr_info: Dict[str, Any],
+    channel_info: Dict[str, Any],
+    original_bbox_data: Dict[str, Any],
+) -> Dict[str, Any]:
+    """导出单个通道的坐标文件（在线程池中执行，使用独立的数据库会话），返回导出文件信息。"""
+    spaces_data = []
+    
+    # 查询该通道下的所有停车位（从本地数据库）
     with SessionLocal() as db:
+        parking_spaces = (
+            db.query(ParkingSpace)
+            .filter(ParkingSpace.channel_config_id == channel_info["id"])
+            .all()
+        )
+        
+        # 构建停车位数据（优先使用原始bbox，否则使用本地数据库的坐标）
+        for space in parking_spaces:
+            space_data = {
+                "space_name": space.space_name,
+            }
+            
+            # 如果从外部数据库获取到原始bbox，使用原始格式
+            if space.space_name in original_bbox_data:
+                space_data["bbox"] = original_bbox_data[space.space_name]
+            else:
+                # 否则使用本地数据库的矩形坐标
+                space_data["bbox_x1"] = space.bbox_x1
+                space_data["bbox_y1"] = space.bbox_y1
+                space_data["bbox_x2"] = space.bbox_x2
+                space_data["bbox_y2"] = space.bbox_y2
+            
+            spaces_data.append(space_data)
+    
+    # 构建通道数据
+    channel_data = {
+        "nvr_ip": nvr_info["nvr_ip"],
+        "parking_name": nvr_info["parking_name"],
+        "channel_code": channel_info["channel_code"],
+        "channel_name": channel_info["camera_name"] or "",
+        "camera_ip": channel_info["camera_ip"] or "",
+        "camera_sn": channel_info["camera_sn"] or "",
+        "track_space": channel_info["track_space"] or None,
+        "parking_spaces": spaces_data,
+    }
+    
+    # 生成文件名：{ip}_{channel_code}.json
+    safe_channel = channel_info["channel_code"].lower().translate(_CHANNEL_TRANS)
+    filename = f"{nvr_info['safe_ip']}_{safe_channel}.json"
+    filepath = output_path / filename
+    
+    # 保存到文件
+    _write_json(filepath, channel_data)
+    
+    return {
+        "file": filename,
+        "nvr_ip": nvr_info["nvr_ip"],
+        "channel": channel_info["channel_code"],
+        "spaces_count": len(spaces_data),
+    }
+
+
+def _export_channels(
+    output_path: Path,
+    stats: Dict[str, Any],
+    ext_conns: Dict[Tuple[str, int, str], Any],
+    max_workers: int = EXPORT_WORKERS,
+) -> None:
+    """遍历所有 NVR 及其通道，导出坐标文件并更新统计信息。
+
+    外部数据库按 NVR 批量查询在主线程完成；每个通道的本地车位查询和文件写入提交到线程池并发执行，
+    统计信息只在主线程中汇总。
+    """
+    with SessionLocal() as db, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        
         # 查询所有NVR配置
         nvr_configs = db.query(NvrConfig).all()
         stats["total_nvr"] = len(nvr_configs)
         
         for nvr in nvr_configs:
             try:
+                nvr_info = {
+                    "nvr_ip": nvr.nvr_ip,
+                    "parking_name": nvr.parking_name,
+                    # 清理IP地址中的特殊字符（每个NVR只处理一次）
+                    "safe_ip": nvr.nvr_ip.translate(_IP_TRANS),
+                }
+                
                 # 查询该NVR下的所有通道
                 channels = (
                     db.query(ChannelConfig)
@@ -75,137 +266,49 @@ def export_all_channel_coordinates(output_dir: str = "channel_coordinates") -> D
                     .all()
                 )
                 
-                for channel in channels:
+                # 如果NVR有数据库配置，一次性从外部数据库查询该NVR下所有通道的原始bbox
+                orig_bbox_by_sn: Dict[str, Dict[str, Any]] = {}
+                sns = [c.camera_sn for c in channels if c.camera_sn]
+                if sns and nvr.db_host and nvr.db_user and nvr.db_password and nvr.db_name:
                     try:
-                        stats["total_channels"] += 1
-                        
-                        # 优先从外部数据库查询原始bbox格式（如果是多边形）
-                        spaces_data = []
-                        original_bbox_data = {}
-                        
-                        # 如果通道有camera_sn和NVR有数据库配置，尝试从外部数据库查询原始bbox
-                        if channel.camera_sn and nvr.db_host and nvr.db_user and nvr.db_password and nvr.db_name:
-                            try:
-                                import pymysql
-                                ext_conn = pymysql.connect(
-                                    host=nvr.db_host,
-                                    user=nvr.db_user,
-                                    password=nvr.db_password,
-                                    port=nvr.db_port or 3306,
-                                    database=nvr.db_name,
-                                    charset='utf8mb4'
-                                )
-                                ext_cursor = ext_conn.cursor()
-                                
-                                sql = """
-                                SELECT 
-                                    name,
-                                    JSON_EXTRACT(
-                                        space_annotation_info,
-                                        CONCAT('$[', idx - 1, '].bbox')
-                                    ) AS bbox
-                                FROM (
-                                    SELECT 
-                                        name,
-                                        space_annotation_info,
-                                        idx
-                                    FROM parking_space_info_tbl
-                                    JOIN JSON_TABLE(
-                                        space_annotation_info,
-                                        '$[*]' COLUMNS (
-                                            idx FOR ORDINALITY,
-                                            gun_camera_sn VARCHAR(64) PATH '$.gun_camera_sn'
-                                        )
-                                    ) AS jt
-                                    WHERE jt.gun_camera_sn = %s
-                                ) AS matched;
-                                """
-                                ext_cursor.execute(sql, (channel.camera_sn,))
-                                ext_results = ext_cursor.fetchall()
-                                
-                                for row in ext_results:
-                                    space_name, bbox_json = row
-                                    if bbox_json:
-                                        try:
-                                            bbox = json.loads(bbox_json)
-                                            original_bbox_data[space_name] = bbox
-                                        except:
-                                            pass
-                                
-                                ext_cursor.close()
-                                ext_conn.close()
-                            except Exception as e:
-                                print(f"警告: 无法从外部数据库查询原始bbox ({nvr.nvr_ip}/{channel.channel_code}): {e}")
-                        
-                        # 查询该通道下的所有停车位（从本地数据库）
-                        parking_spaces = (
-                            db.query(ParkingSpace)
-                            .filter(ParkingSpace.channel_config_id == channel.id)
-                            .all()
-                        )
-                        stats["total_spaces"] += len(parking_spaces)
-                        
-                        # 构建停车位数据（优先使用原始bbox，否则使用本地数据库的坐标）
-                        for space in parking_spaces:
-                            space_data = {
-                                "space_name": space.space_name,
-                            }
-                            
-                            # 如果从外部数据库获取到原始bbox，使用原始格式
-                            if space.space_name in original_bbox_data:
-                                space_data["bbox"] = original_bbox_data[space.space_name]
-                            else:
-                                # 否则使用本地数据库的矩形坐标
-                                space_data["bbox_x1"] = space.bbox_x1
-                                space_data["bbox_y1"] = space.bbox_y1
-                                space_data["bbox_x2"] = space.bbox_x2
-                                space_data["bbox_y2"] = space.bbox_y2
-                            
-                            spaces_data.append(space_data)
-                        
-                        # 构建通道数据
-                        channel_data = {
-                            "nvr_ip": nvr.nvr_ip,
-                            "parking_name": nvr.parking_name,
-                            "channel_code": channel.channel_code,
-                            "channel_name": channel.camera_name or "",
-                            "camera_ip": channel.camera_ip or "",
-                            "camera_sn": channel.camera_sn or "",
-                            "track_space": channel.track_space or None,
-                            "parking_spaces": spaces_data,
-                        }
-                        
-                        # 生成文件名：{ip}_{channel_code}.json
-                        # 清理IP地址中的特殊字符
-                        safe_ip = nvr.nvr_ip.replace(".", "_").replace(":", "_")
-                        safe_channel = channel.channel_code.lower().replace("/", "_")
-                        filename = f"{safe_ip}_{safe_channel}.json"
-                        filepath = output_path / filename
-                        
-                        # 保存到文件
-                        with open(filepath, "w", encoding="utf-8") as f:
-                            json.dump(channel_data, f, ensure_ascii=False, indent=2)
-                        
-                        stats["exported_files"].append({
-                            "file": filename,
-                            "nvr_ip": nvr.nvr_ip,
-                            "channel": channel.channel_code,
-                            "spaces_count": len(spaces_data),
-                        })
-                        
-                        print(f"✓ 已导出: {filename} (NVR: {nvr.nvr_ip}, 通道: {channel.channel_code}, 车位: {len(spaces_data)}个)")
-                        
+                        orig_bbox_by_sn = _query_original_bboxes(_get_ext_connection(ext_conns, nvr), sns)
                     except Exception as e:
-                        error_msg = f"导出通道 {nvr.nvr_ip}/{channel.channel_code} 时出错: {e}"
-                        stats["errors"].append(error_msg)
-                        print(f"✗ {error_msg}")
+                        print(f"警告: 无法从外部数据库查询原始bbox ({nvr.nvr_ip}): {e}")
+                
+                for channel in channels:
+                    stats["total_channels"] += 1
+                    # 只把普通字段传给工作线程，避免跨线程访问 ORM 对象
+                    channel_info = {
+                        "id": channel.id,
+                        "channel_code": channel.channel_code,
+                        "camera_name": channel.camera_name,
+                        "camera_ip": channel.camera_ip,
+                        "camera_sn": channel.camera_sn,
+                        "track_space": channel.track_space,
+                    }
+                    # 优先使用外部数据库中的原始bbox格式（如果是多边形），按 camera_sn 取该NVR批量查询的结果
+                    original_bbox_data = orig_bbox_by_sn.get(channel.camera_sn, {}) if channel.camera_sn else {}
+                    future = executor.submit(_export_channel, output_path, nvr_info, channel_info, original_bbox_data)
+                    futures[future] = (nvr.nvr_ip, channel.channel_code)
                         
             except Exception as e:
                 error_msg = f"处理NVR {nvr.nvr_ip} 时出错: {e}"
                 stats["errors"].append(error_msg)
                 print(f"✗ {error_msg}")
-    
-    return stats
+        
+        for future in as_completed(futures):
+            nvr_ip, channel_code = futures[future]
+            try:
+                item = future.result()
+            except Exception as e:
+                error_msg = f"导出通道 {nvr_ip}/{channel_code} 时出错: {e}"
+                stats["errors"].append(error_msg)
+                print(f"✗ {error_msg}")
+                continue
+            
+            stats["total_spaces"] += item["spaces_count"]
+            stats["exported_files"].append(item)
+            print(f"✓ 已导出: {item['file']} (NVR: {nvr_ip}, 通道: {channel_code}, 车位: {item['spaces_count']}个)")
 
 
 def main():
@@ -231,6 +334,13 @@ def main():
         help="输出目录（默认: channel_coordinates）"
     )
     
+    parser.add_argument(
+        "--workers", "-w",
+        type=int,
+        default=EXPORT_WORKERS,
+        help=f"并发导出通道的线程数（默认: {EXPORT_WORKERS}）"
+    )
+    
     args = parser.parse_args()
     
     print("=" * 60)
@@ -239,7 +349,7 @@ def main():
     print()
     
     try:
-        stats = export_all_channel_coordinates(args.output)
+        stats = export_all_channel_coordinates(args.output, max(1, args.workers))
         
         print()
         print("=" * 60)
@@ -8,6 +8,9 @@
 4. 生成标注后的图片
 
 或者使用命令行参数（见 main 函数）
+
+性能提示：脚本只使用标准 Pillow API，可直接换装 Pillow-SIMD（见 requirements.txt 中的说明），
+图层合成（alpha_composite）和 JPEG/PNG 编解码会明显加快，代码无需修改。
 """
 
 # ==================== 配置区域：在这里直接修改参数 ====================
@@ -30,22 +33,107 @@ ORIGINAL_WIDTH = 1920  # 数据库中坐标的原始宽度（默认1920×1080）
 ORIGINAL_HEIGHT = 1080  # 数据库中坐标的原始高度
 # 如果设置为 None，则使用实际图片尺寸（不缩放）
 # 如果设置了值，会将坐标从 ORIGINAL_WIDTH×ORIGINAL_HEIGHT 缩放到实际图片尺寸
+
+# 跟踪区域宽或高小于该像素值时不绘制四角坐标（框太小时标签互相重叠、无法辨认）
+CORNER_LABEL_MIN_SIZE = 40
 # ==================== 配置区域结束 ====================
 
 import argparse
+import ast
+import functools
 import json
+import os
+import re
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# 有 orjson 时用它解析 JSON（可直接接收 bytes，解析失败抛出的异常是 json.JSONDecodeError 的子类）
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# 最常见的 track_space 字符串格式 "[11, 19, 1875, 430]"，用正则直接提取，无需走 JSON/AST 解析
+_SIMPLE_LIST_RE = re.compile(r"\s*\[\s*(-?\d+)\s*,\s*(-?\d+)\s*,\s*(-?\d+)\s*,\s*(-?\d+)\s*\]\s*")
 
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image, ImageDraw, ImageFont, UnidentifiedImageError
 except ImportError:
     print("错误: 需要安装 Pillow 库")
     print("请运行: pip install Pillow")
     sys.exit(1)
 
 
+# 当前 Pillow 是否支持 font.getbbox（Pillow >= 8.0），导入时检测一次
+_HAS_GETBBOX = hasattr(ImageFont.FreeTypeFont, "getbbox")
+
+
+@functools.lru_cache(maxsize=8)
+def _get_font(size: int):
+    """加载指定字号的字体（arial → Helvetica → PIL 默认字体），每个字号只加载一次"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except:
+        try:
+            return ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", size)
+        except:
+            return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=512)
+def get_text_size(text: str, font) -> Tuple[int, int]:
+    """获取文本尺寸（兼容不同PIL版本），按 (文本, 字体) 缓存；坐标标签在各角点和各区域间大量重复"""
+    if _HAS_GETBBOX:
+        # 与 draw.textbbox((0, 0), text, font=font) 结果一致，但不依赖 ImageDraw 对象
+        bbox = font.getbbox(text)
+        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+    try:
+        # 旧版本PIL使用 getsize
+        return font.getsize(text)
+    except Exception:
+        # 如果都不可用，返回估算值
+        return len(text) * 8, 14
+
+
+@functools.lru_cache(maxsize=2048)
+def _render_label(text: str, font_size: int, color: tuple) -> Optional[Image.Image]:
+    """把文本渲染为透明 RGBA 小图并缓存；车位编号和坐标标签大量重复，FreeType 排版/光栅化只做一次
+    
+    小图原点与 draw.text 的绘制原点一致，贴到 (x, y) 的效果等同于 draw.text((x, y), ...)。
+    文本为空（无可见像素）时返回 None。调用方不应修改返回的小图。
+    """
+    font = _get_font(font_size)
+    if _HAS_GETBBOX:
+        _, _, right, bottom = font.getbbox(text)
+    else:
+        right, bottom = get_text_size(text, font)
+    if right <= 0 or bottom <= 0:
+        return None
+    tile = Image.new("RGBA", (right, bottom), (0, 0, 0, 0))
+    ImageDraw.Draw(tile).text((0, 0), text, fill=color, font=font)
+    return tile
+
+
+def _paste_labels(img: Image.Image, labels: List[Tuple[Tuple[int, int], str]], font_size: int, color: tuple):
+    """把缓存的文本小图原地贴到图片上（RGBA 图层用 alpha 合成，其他模式以 alpha 为蒙版粘贴）"""
+    composite = img.mode == "RGBA"
+    for (x, y), text in labels:
+        tile = _render_label(text, font_size, color)
+        if tile is None:
+            continue
+        if composite:
+            img.alpha_composite(tile, (max(0, x), max(0, y)))
+        else:
+            img.paste(tile, (x, y), tile)
+
+
 def parse_track_space(track_space_str: str) -> Optional[Any]:
     """解析跟踪区域坐标字符串（可能是JSON格式）"""
     if not track_space_str or not track_space_str.strip():
@@ -53,7 +141,7 @@ def parse_track_space(track_space_str: str) -> Optional[Any]:
     
     try:
         # 尝试解析为JSON
-        return json.loads(track_space_str)
+        return _json_loads(track_space_str)
     except json.JSONDecodeError:
         # 如果不是JSON，尝试其他格式
         # 这里可以根据实际格式进行扩展
@@ -67,7 +155,7 @@ def parse_parking_spaces(parking_spaces_str: str) -> List[Dict[str, Any]]:
         return []
     
     try:
-        spaces = json.loads(parking_spaces_str)
+        spaces = _json_loads(parking_spaces_str)
         if isinstance(spaces, list):
             return spaces
         elif isinstance(spaces, dict):
@@ -102,6 +190,11 @@ def scale_coordinates(x1, y1, x2, y2, original_width, original_height, target_wi
 
 def normalize_bbox(x1, y1, x2, y2, img_width, img_height):
     """规范化边界框坐标，确保 x1 < x2 且 y1 < y2，并在图片范围内"""
+    # 快速路径：已经是图片范围内、顺序正确的整数坐标时原样返回
+    if (type(x1) is int and type(y1) is int and type(x2) is int and type(y2) is int
+            and 0 <= x1 < x2 <= img_width and 0 <= y1 < y2 <= img_height):
+        return x1, y1, x2, y2
+    
     # 交换坐标如果顺序错误
     if x1 > x2:
         x1, x2 = x2, x1
@@ -117,20 +210,159 @@ def normalize_bbox(x1, y1, x2, y2, img_width, img_height):
     return x1, y1, x2, y2
 
 
-def draw_track_space(draw: ImageDraw.Draw, track_space: Any, img_width: int, img_height: int, 
-                     original_width: Optional[int] = None, original_height: Optional[int] = None):
+def normalize_bboxes(coords: np.ndarray, img_width: int, img_height: int,
+                     scale: Optional[Tuple[float, float]] = None) -> np.ndarray:
+    """批量缩放并规范化边界框（与逐个调用 scale_coordinates + normalize_bbox 的结果一致）
+    
+    参数:
+        coords: N×4 的 (x1, y1, x2, y2) 数组
+        img_width: 图片宽度
+        img_height: 图片高度
+        scale: (scale_x, scale_y)，为 None 时不缩放
+    
+    返回:
+        N×4 的 int32 数组，保证 x1 < x2、y1 < y2 且在图片范围内
+    """
+    coords = np.asarray(coords)
+    
+    # 快速路径：整数坐标且不缩放时，一次向量化判断是否全部已合法，合法则直接返回
+    if scale is None and coords.dtype.kind in "iu":
+        x1, y1, x2, y2 = coords[:, 0], coords[:, 1], coords[:, 2], coords[:, 3]
+        valid = (0 <= x1) & (x1 < x2) & (x2 <= img_width) & (0 <= y1) & (y1 < y2) & (y2 <= img_height)
+        if valid.all():
+            return coords.astype(np.int32, copy=False)
+    
+    coords = coords.astype(np.float64, copy=False)
+    if scale is not None:
+        coords = coords * np.array([scale[0], scale[1], scale[0], scale[1]])
+    
+    # 交换顺序错误的坐标，然后截断为整数（与 int() 一样向零取整）
+    lo = np.minimum(coords[:, :2], coords[:, 2:]).astype(np.int32)
+    hi = np.maximum(coords[:, :2], coords[:, 2:]).astype(np.int32)
+    
+    # 限制在图片范围内
+    lo = np.clip(lo, 0, [img_width - 1, img_height - 1])
+    hi = np.maximum(lo + 1, np.minimum(hi, [img_width, img_height]))
+    return np.hstack([lo, hi]).astype(np.int32)
+
+
+def _add_track_rectangle(prims: Dict[str, list], font,
+                         x1, y1, x2, y2, original_coords: Optional[List[int]],
+                         need_scale: bool, original_width: Optional[int], original_height: Optional[int],
+                         img_width: int, img_height: int):
+    """记录一个跟踪区域矩形及其坐标标注需要绘制的图元（所有依赖通过参数显式传入）
+    
+    prims 中的列表：
+    - outlines: 矩形边框 (x1, y1, x2, y2)
+    - boxes: 白色背景框 (x1, y1, x2, y2)，带 1 像素边框
+    - dots: 角点圆点中心 (cx, cy)
+    - texts: 文本 ((x, y), text)
+    """
+    # 如果需要缩放，先缩放坐标（优先使用原始坐标）
+    if need_scale:
+        if original_coords is not None:
+            x1, y1, x2, y2 = original_coords[0], original_coords[1], original_coords[2], original_coords[3]
+        scale_x = img_width / original_width
+        scale_y = img_height / original_height
+        x1, y1, x2, y2 = x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y
+    x1, y1, x2, y2 = normalize_bbox(x1, y1, x2, y2, img_width, img_height)
+    
+    # 矩形边框
+    prims["outlines"].append((x1, y1, x2, y2))
+    
+    # 准备坐标文本（显示原始坐标值）
+    if original_coords is not None:
+        # 使用原始坐标值显示
+        coord_text = f"[{original_coords[0]}, {original_coords[1]}, {original_coords[2]}, {original_coords[3]}]"
+    else:
+        # 使用规范化后的坐标值
+        coord_text = f"[{x1}, {y1}, {x2}, {y2}]"
+    
+    # 在左上角显示完整坐标
+    text_width, text_height = get_text_size(coord_text, font)
+    padding = 2
+    
+    # 在左上角绘制背景框（白色背景）
+    prims["boxes"].append((x1, y1, x1 + text_width + padding * 2, y1 + text_height + padding * 2))
+    
+    # 在左上角显示坐标文本
+    prims["texts"].append(((x1 + padding, y1 + padding), coord_text))
+    
+    # 框太小时四角标签无法辨认，直接跳过
+    if x2 - x1 < CORNER_LABEL_MIN_SIZE or y2 - y1 < CORNER_LABEL_MIN_SIZE:
+        return
+    
+    # 在四个角显示对应的坐标点
+    corner_size = 6
+    corner_labels = [
+        (x1, y1, f"({original_coords[0] if original_coords else x1},{original_coords[1] if original_coords else y1})"),  # 左上角
+        (x2, y1, f"({original_coords[2] if original_coords else x2},{original_coords[1] if original_coords else y1})"),  # 右上角
+        (x1, y2, f"({original_coords[0] if original_coords else x1},{original_coords[3] if original_coords else y2})"),  # 左下角
+        (x2, y2, f"({original_coords[2] if original_coords else x2},{original_coords[3] if original_coords else y2})"),  # 右下角
+    ]
+    
+    for cx, cy, label in corner_labels:
+        # 绘制角点标记（小圆点）
+        prims["dots"].append((cx, cy))
+        
+        # 在角点旁边显示坐标
+        label_width, label_height = get_text_size(label, font)
+        
+        # 根据角点位置调整标签位置，避免超出图片
+        if cx == x1:  # 左角
+            label_x = cx + corner_size + 3
+        else:  # 右角
+            label_x = cx - label_width - corner_size - 3
+        
+        if cy == y1:  # 上角
+            label_y = cy + corner_size + 3
+        else:  # 下角
+            label_y = cy - label_height - corner_size - 3
+        
+        # 确保标签在图片范围内
+        label_x = max(0, min(label_x, img_width - label_width))
+        label_y = max(0, min(label_y, img_height - label_height))
+        
+        # 绘制标签背景（白色背景）
+        prims["boxes"].append((label_x - 1, label_y - 1, 
+                               label_x + label_width + 1, label_y + label_height + 1))
+        prims["texts"].append(((label_x, label_y), label))
+
+
+def draw_track_space(img: Image.Image, track_space: Any, img_width: int, img_height: int, 
+                     original_width: Optional[int] = None, original_height: Optional[int] = None) -> Image.Image:
     """在图片上绘制跟踪区域（红色），并在框上显示坐标数值
     
+    先收集所有图元：矩形边框、白色背景框和角点在 NumPy 图像数组上绘制，文本贴缓存的文本小图。
+    
     参数:
-        draw: ImageDraw对象
+        img: 图片对象
         track_space: 跟踪区域坐标数据
         img_width: 实际图片宽度
         img_height: 实际图片高度
         original_width: 坐标的原始宽度（如果提供，会进行缩放）
         original_height: 坐标的原始高度（如果提供，会进行缩放）
+    
+    返回:
+        绘制后的图片对象
     """
     if not track_space:
-        return
+        return img
+    
+    # 字符串格式在入口处只解析一次：先匹配最常见的 "[11, 19, 1875, 430]"，再按JSON解析，最后尝试 Python 字面量
+    if isinstance(track_space, str):
+        m = _SIMPLE_LIST_RE.fullmatch(track_space)
+        if m:
+            track_space = [int(v) for v in m.groups()]
+        else:
+            try:
+                track_space = _json_loads(track_space)
+            except ValueError:
+                try:
+                    track_space = ast.literal_eval(track_space)
+                except (ValueError, SyntaxError):
+                    print(f"警告: 无法解析 track_space 字符串: {track_space}")
+                    return img
     
     # 红色，线宽3
     color = (255, 0, 0)  # RGB红色
@@ -140,108 +372,16 @@ def draw_track_space(draw: ImageDraw.Draw, track_space: Any, img_width: int, img
     need_scale = (original_width is not None and original_height is not None and 
                   (original_width != img_width or original_height != img_height))
     
-    # 尝试加载字体（如果失败则使用默认字体）
-    try:
-        font = ImageFont.truetype("arial.ttf", 14)
-    except:
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-        except:
-            font = ImageFont.load_default()
+    # 加载字体（全局缓存，每个字号只加载一次）
+    font = _get_font(14)
     
-    def get_text_size(text, font):
-        """获取文本尺寸（兼容不同PIL版本）"""
-        try:
-            # 新版本PIL使用 textbbox
-            bbox = draw.textbbox((0, 0), text, font=font)
-            return bbox[2] - bbox[0], bbox[3] - bbox[1]
-        except AttributeError:
-            # 旧版本PIL使用 textsize
-            try:
-                return draw.textsize(text, font=font)
-            except:
-                # 如果都不可用，返回估算值
-                return len(text) * 8, 14
-    
-    def draw_rectangle_with_coords(x1, y1, x2, y2, original_coords=None):
-        """绘制矩形并在框上显示坐标"""
-        # 如果需要缩放，先缩放坐标
-        if need_scale and original_coords is not None:
-            x1_scaled, y1_scaled, x2_scaled, y2_scaled = scale_coordinates(
-                original_coords[0], original_coords[1], original_coords[2], original_coords[3],
-                original_width, original_height, img_width, img_height
-            )
-            x1, y1, x2, y2 = normalize_bbox(x1_scaled, y1_scaled, x2_scaled, y2_scaled, img_width, img_height)
-        elif need_scale:
-            # 如果没有原始坐标，直接缩放当前坐标
-            x1_scaled, y1_scaled, x2_scaled, y2_scaled = scale_coordinates(
-                x1, y1, x2, y2, original_width, original_height, img_width, img_height
-            )
-            x1, y1, x2, y2 = normalize_bbox(x1_scaled, y1_scaled, x2_scaled, y2_scaled, img_width, img_height)
-        else:
-            # 不需要缩放，直接规范化
-            x1, y1, x2, y2 = normalize_bbox(x1, y1, x2, y2, img_width, img_height)
-        
-        # 绘制矩形
-        draw.rectangle([x1, y1, x2, y2], outline=color, width=width)
-        
-        # 准备坐标文本（显示原始坐标值）
-        if original_coords is not None:
-            # 使用原始坐标值显示
-            coord_text = f"[{original_coords[0]}, {original_coords[1]}, {original_coords[2]}, {original_coords[3]}]"
-        else:
-            # 使用规范化后的坐标值
-            coord_text = f"[{x1}, {y1}, {x2}, {y2}]"
-        
-        # 在左上角显示完整坐标
-        text_width, text_height = get_text_size(coord_text, font)
-        padding = 2
-        
-        # 在左上角绘制背景框（白色背景）
-        bg_box = [x1, y1, x1 + text_width + padding * 2, y1 + text_height + padding * 2]
-        draw.rectangle(bg_box, fill=(255, 255, 255), outline=color, width=1)
-        
-        # 在左上角显示坐标文本
-        draw.text((x1 + padding, y1 + padding), coord_text, fill=color, font=font)
-        
-        # 在四个角显示对应的坐标点
-        corner_size = 6
-        corner_labels = [
-            (x1, y1, f"({original_coords[0] if original_coords else x1},{original_coords[1] if original_coords else y1})"),  # 左上角
-            (x2, y1, f"({original_coords[2] if original_coords else x2},{original_coords[1] if original_coords else y1})"),  # 右上角
-            (x1, y2, f"({original_coords[0] if original_coords else x1},{original_coords[3] if original_coords else y2})"),  # 左下角
-            (x2, y2, f"({original_coords[2] if original_coords else x2},{original_coords[3] if original_coords else y2})"),  # 右下角
-        ]
-        
-        for cx, cy, label in corner_labels:
-            # 绘制角点标记（小圆点）
-            draw.ellipse([cx - corner_size//2, cy - corner_size//2, 
-                         cx + corner_size//2, cy + corner_size//2], 
-                        fill=color, outline=color, width=1)
-            
-            # 在角点旁边显示坐标
-            label_width, label_height = get_text_size(label, font)
-            
-            # 根据角点位置调整标签位置，避免超出图片
-            if cx == x1:  # 左角
-                label_x = cx + corner_size + 3
-            else:  # 右角
-                label_x = cx - label_width - corner_size - 3
-            
-            if cy == y1:  # 上角
-                label_y = cy + corner_size + 3
-            else:  # 下角
-                label_y = cy - label_height - corner_size - 3
-            
-            # 确保标签在图片范围内
-            label_x = max(0, min(label_x, img_width - label_width))
-            label_y = max(0, min(label_y, img_height - label_height))
-            
-            # 绘制标签背景（白色背景）
-            label_bg = [label_x - 1, label_y - 1, 
-                       label_x + label_width + 1, label_y + label_height + 1]
-            draw.rectangle(label_bg, fill=(255, 255, 255), outline=color, width=1)
-            draw.text((label_x, label_y), label, fill=color, font=font)
+    # 绑定本次绘制不变的参数，调用时只需传入坐标
+    prims: Dict[str, list] = {"outlines": [], "boxes": [], "dots": [], "texts": []}
+    draw_rect = functools.partial(
+        _add_track_rectangle, prims, font,
+        need_scale=need_scale, original_width=original_width, original_height=original_height,
+        img_width=img_width, img_height=img_height,
+    )
     
     try:
         if isinstance(track_space, dict):
@@ -251,12 +391,12 @@ def draw_track_space(draw: ImageDraw.Draw, track_space: Any, img_width: int, img
                 bbox = track_space["bbox"]
                 original_coords = [int(bbox[0]), int(bbox[1]), int(bbox[2]), int(bbox[3])]
                 # draw_rectangle_with_coords 内部会处理缩放
-                draw_rectangle_with_coords(bbox[0], bbox[1], bbox[2], bbox[3], original_coords)
+                draw_rect(bbox[0], bbox[1], bbox[2], bbox[3], original_coords)
             elif all(k in track_space for k in ["x1", "y1", "x2", "y2"]):
                 # 对象格式: {x1, y1, x2, y2}
                 original_coords = [int(track_space["x1"]), int(track_space["y1"]), 
                                   int(track_space["x2"]), int(track_space["y2"])]
-                draw_rectangle_with_coords(
+                draw_rect(
                     track_space["x1"], track_space["y1"], 
                     track_space["x2"], track_space["y2"], 
                     original_coords
@@ -267,7 +407,7 @@ def draw_track_space(draw: ImageDraw.Draw, track_space: Any, img_width: int, img
                 # [x1, y1, x2, y2] 格式
                 original_coords = [int(track_space[0]), int(track_space[1]), 
                                   int(track_space[2]), int(track_space[3])]
-                draw_rectangle_with_coords(
+                draw_rect(
                     track_space[0], track_space[1], 
                     track_space[2], track_space[3], 
                     original_coords
@@ -279,86 +419,111 @@ def draw_track_space(draw: ImageDraw.Draw, track_space: Any, img_width: int, img
                         if "bbox" in area and isinstance(area["bbox"], list) and len(area["bbox"]) >= 4:
                             bbox = area["bbox"]
                             original_coords = [int(bbox[0]), int(bbox[1]), int(bbox[2]), int(bbox[3])]
-                            draw_rectangle_with_coords(bbox[0], bbox[1], bbox[2], bbox[3], original_coords)
+                            draw_rect(bbox[0], bbox[1], bbox[2], bbox[3], original_coords)
                         elif all(k in area for k in ["x1", "y1", "x2", "y2"]):
                             original_coords = [int(area["x1"]), int(area["y1"]), 
                                               int(area["x2"]), int(area["y2"])]
-                            draw_rectangle_with_coords(
+                            draw_rect(
                                 area["x1"], area["y1"], 
                                 area["x2"], area["y2"], 
                                 original_coords
                             )
                     elif isinstance(area, list) and len(area) >= 4:
                         original_coords = [int(area[0]), int(area[1]), int(area[2]), int(area[3])]
-                        draw_rectangle_with_coords(area[0], area[1], area[2], area[3], original_coords)
-        elif isinstance(track_space, str):
-            # 字符串格式（可能是JSON字符串）
-            try:
-                import json
-                parsed = json.loads(track_space)
-                # 递归调用处理解析后的数据
-                draw_track_space(draw, parsed, img_width, img_height, original_width, original_height)
-            except:
-                # 如果不是JSON，尝试解析为列表格式 "[11, 19, 1875, 430]"
-                try:
-                    import ast
-                    parsed = ast.literal_eval(track_space)
-                    if isinstance(parsed, list) and len(parsed) >= 4:
-                        original_coords = [int(parsed[0]), int(parsed[1]), int(parsed[2]), int(parsed[3])]
-                        # 如果需要缩放，先缩放坐标
-                        if need_scale:
-                            x1, y1, x2, y2 = scale_coordinates(
-                                original_coords[0], original_coords[1], original_coords[2], original_coords[3],
-                                original_width, original_height, img_width, img_height
-                            )
-                            x1, y1, x2, y2 = normalize_bbox(x1, y1, x2, y2, img_width, img_height)
-                        else:
-                            x1, y1, x2, y2 = normalize_bbox(parsed[0], parsed[1], parsed[2], parsed[3], img_width, img_height)
-                        draw_rectangle_with_coords(x1, y1, x2, y2, original_coords)
-                except:
-                    print(f"警告: 无法解析 track_space 字符串: {track_space}")
+                        draw_rect(area[0], area[1], area[2], area[3], original_coords)
     except Exception as e:
         print(f"警告: 绘制跟踪区域时出错: {e}")
         import traceback
         traceback.print_exc()
-
-
-def draw_parking_spaces(draw: ImageDraw.Draw, parking_spaces: List[Dict[str, Any]], img_width: int, img_height: int,
-                        original_width: Optional[int] = None, original_height: Optional[int] = None):
-    """在图片上绘制停车位坐标（黄色）
     
-    支持两种格式：
-    1. 矩形格式：{"bbox_x1": x1, "bbox_y1": y1, "bbox_x2": x2, "bbox_y2": y2}
-    2. 多边形格式：{"bbox": [x1, y1, x2, y2, x3, y3, x4, y4, ...]} 或 {"bbox": [x, y, width, height]}
+    if not prims["outlines"]:
+        return img
     
-    参数:
-        draw: ImageDraw对象
-        parking_spaces: 停车位坐标列表
-        img_width: 实际图片宽度
-        img_height: 实际图片高度
-        original_width: 坐标的原始宽度（如果提供，会进行缩放）
-        original_height: 坐标的原始高度（如果提供，会进行缩放）
-    """
-    if not parking_spaces:
-        return
+    # 矩形边框和白色背景框：在图像数组上用切片赋值绘制
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB")
+    arr = np.array(img)
+    _fill_rect_outlines(arr, np.array(prims["outlines"], dtype=np.int32), color, width)
+    if prims["boxes"]:
+        boxes = _clip_boxes(np.array(prims["boxes"], dtype=np.int32), img_width, img_height)
+        _fill_rects(arr, boxes, (255, 255, 255))
+        _fill_rect_outlines(arr, boxes, color, 1)
+    if prims["dots"]:
+        _blit_dots(arr, np.array(prims["dots"], dtype=np.int32), color)
+    img = Image.fromarray(arr)
     
-    # 黄色，线宽2
-    color = (255, 255, 0)  # RGB黄色
-    width = 2
+    # 文本使用缓存的文本小图贴图
+    _paste_labels(img, prims["texts"], 14, color)
     
-    # 确定是否需要缩放
-    need_scale = (original_width is not None and original_height is not None and 
-                  (original_width != img_width or original_height != img_height))
+    return img
+
+
+def _ink_for(arr: np.ndarray, color: tuple) -> np.ndarray:
+    """把 RGB 颜色转换为与图像数组通道数一致的像素值（RGBA 图像补 alpha=255）"""
+    channels = arr.shape[2] if arr.ndim == 3 else 1
+    if channels == 1:
+        return np.array(color[0], dtype=arr.dtype)
+    if channels == 4 and len(color) == 3:
+        color = (*color, 255)
+    return np.array(color[:channels], dtype=arr.dtype)
+
+
+# 角点圆点：半径 3 的圆盘内像素相对圆心的偏移（与 draw.ellipse([cx-3, cy-3, cx+3, cy+3]) 大小一致）
+_DOT_RADIUS = 3
+_dot_dy, _dot_dx = np.nonzero(
+    np.hypot(*np.ogrid[-_DOT_RADIUS:_DOT_RADIUS + 1, -_DOT_RADIUS:_DOT_RADIUS + 1]) <= _DOT_RADIUS + 0.5
+)
+_DOT_OFFSETS_Y = (_dot_dy - _DOT_RADIUS).astype(np.int32)
+_DOT_OFFSETS_X = (_dot_dx - _DOT_RADIUS).astype(np.int32)
+
+
+def _blit_dots(arr: np.ndarray, centers: np.ndarray, color: tuple):
+    """在图像数组上原地绘制所有角点圆点（一次花式索引赋值，替代逐个 draw.ellipse 调用）
     
-    # 尝试加载字体（如果失败则使用默认字体）
-    try:
-        font = ImageFont.truetype("arial.ttf", 12)
-    except:
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 12)
-        except:
-            font = ImageFont.load_default()
+    参数:
+        arr: H×W×C 图像数组
+        centers: N×2 的 (cx, cy) 整数数组
+        color: RGB 颜色
+    """
+    ys = (centers[:, 1:2] + _DOT_OFFSETS_Y).ravel()
+    xs = (centers[:, 0:1] + _DOT_OFFSETS_X).ravel()
+    inside = (ys >= 0) & (ys < arr.shape[0]) & (xs >= 0) & (xs < arr.shape[1])
+    arr[ys[inside], xs[inside]] = _ink_for(arr, color)
+
+
+def _fill_rect_outlines(arr: np.ndarray, coords: np.ndarray, color: tuple, width: int):
+    """在图像数组上原地绘制矩形边框，每个矩形只做 4 次切片赋值（替代逐个 draw.rectangle 调用）
     
+    参数:
+        arr: 图像数组（H×W×C）
+        coords: N×4 的 (x1, y1, x2, y2) 整数数组，已规范化到图片范围内（与 draw.rectangle 一样包含 x2/y2）
+        color: RGB 颜色
+        width: 线宽（向矩形内侧绘制）
+    """
+    ink = _ink_for(arr, color)
+    for x1, y1, x2, y2 in coords.tolist():
+        arr[y1:y1 + width, x1:x2 + 1] = ink  # 上边
+        arr[max(y1, y2 - width + 1):y2 + 1, x1:x2 + 1] = ink  # 下边
+        arr[y1:y2 + 1, x1:x1 + width] = ink  # 左边
+        arr[y1:y2 + 1, max(x1, x2 - width + 1):x2 + 1] = ink  # 右边
+
+
+def _clip_boxes(coords: np.ndarray, img_width: int, img_height: int) -> np.ndarray:
+    """把 N×4 的 (x1, y1, x2, y2) 限制在图片范围内（切片赋值不支持负索引越界）"""
+    return np.clip(coords, 0, [img_width - 1, img_height - 1, img_width - 1, img_height - 1]).astype(np.int32)
+
+
+def _fill_rects(arr: np.ndarray, coords: np.ndarray, color: tuple):
+    """在图像数组上原地填充矩形（包含 x2/y2），coords 需已限制在图片范围内"""
+    ink = _ink_for(arr, color)
+    for x1, y1, x2, y2 in coords.tolist():
+        arr[y1:y2 + 1, x1:x2 + 1] = ink
+
+
+def _collect_spaces_generic(parking_spaces: List[Dict[str, Any]], img_width: int, img_height: int,
+                            need_scale: bool, original_width: Optional[int], original_height: Optional[int],
+                            rects: list, rect_names: list, polygons: list, labels: list):
+    """通用解析：逐个判断车位格式（矩形 / [x, y, width, height] / 多边形），结果追加到传入的列表中"""
     for space in parking_spaces:
         try:
             space_name = space.get("space_name", "")
@@ -393,51 +558,27 @@ def draw_parking_spaces(draw: ImageDraw.Draw, parking_spaces: List[Dict[str, Any
                             if y1_orig > y2_orig:
                                 y1_orig, y2_orig = y2_orig, y1_orig
                         
-                        # 如果需要缩放，先缩放坐标
-                        if need_scale:
-                            x1, y1, x2, y2 = scale_coordinates(
-                                x1_orig, y1_orig, x2_orig, y2_orig,
-                                original_width, original_height, img_width, img_height
-                            )
-                        else:
-                            x1, y1, x2, y2 = x1_orig, y1_orig, x2_orig, y2_orig
-                        
-                        # 规范化坐标
-                        x1, y1, x2, y2 = normalize_bbox(x1, y1, x2, y2, img_width, img_height)
-                        
-                        # 绘制矩形框
-                        draw.rectangle([x1, y1, x2, y2], outline=color, width=width)
-                        
-                        # 绘制车位编号
-                        if space_name:
-                            draw.text((x1 + 2, y1 + 2), space_name, fill=color, font=font)
+                        # 记录原始矩形框，缩放和规范化在循环结束后统一向量化处理
+                        rects.append((x1_orig, y1_orig, x2_orig, y2_orig))
+                        rect_names.append(space_name)
                     else:
                         # 多边形格式：至少4个点（8个值），可能是 [x1, y1, x2, y2, x3, y3, x4, y4, ...]
                         if len(bbox) % 2 == 0 and len(bbox) >= 8:
-                            # 构建多边形点列表 [(x1, y1), (x2, y2), ...]
-                            points = []
-                            for i in range(0, len(bbox), 2):
-                                if i + 1 < len(bbox):
-                                    x_orig, y_orig = int(bbox[i]), int(bbox[i + 1])
-                                    # 如果需要缩放，先缩放坐标
-                                    if need_scale:
-                                        x = scale_coordinate(x_orig, original_width, img_width)
-                                        y = scale_coordinate(y_orig, original_height, img_height)
-                                    else:
-                                        x, y = x_orig, y_orig
-                                    # 限制在图片范围内
-                                    x = max(0, min(x, img_width - 1))
-                                    y = max(0, min(y, img_height - 1))
-                                    points.append((x, y))
+                            # 构建多边形点数组 N×2，向量化缩放并限制在图片范围内
+                            pts = np.array(bbox, dtype=np.float64).astype(np.int64).reshape(-1, 2)
+                            if need_scale:
+                                pts = (pts * np.array([img_width / original_width, img_height / original_height])).astype(np.int64)
+                            np.clip(pts[:, 0], 0, img_width - 1, out=pts[:, 0])
+                            np.clip(pts[:, 1], 0, img_height - 1, out=pts[:, 1])
                             
-                            if len(points) >= 3:
-                                # 绘制多边形
-                                draw.polygon(points, outline=color, width=width)
+                            if len(pts) >= 3:
+                                # 记录多边形（扁平坐标列表 [x1, y1, x2, y2, ...]，PIL 直接遍历，无需构建元组）
+                                polygons.append(pts.ravel().tolist())
                                 
-                                # 绘制车位编号（在多边形中心或第一个点附近）
-                                if space_name and points:
-                                    label_x, label_y = points[0]
-                                    draw.text((label_x + 2, label_y + 2), space_name, fill=color, font=font)
+                                # 记录车位编号（在多边形第一个点附近）
+                                if space_name:
+                                    label_x, label_y = pts[0].tolist()
+                                    labels.append(((label_x + 2, label_y + 2), space_name))
                         else:
                             print(f"警告: 停车位 {space_name} 的bbox格式不正确（长度: {len(bbox)}），跳过")
                             continue
@@ -460,39 +601,226 @@ def draw_parking_spaces(draw: ImageDraw.Draw, parking_spaces: List[Dict[str, Any
                     print(f"警告: 停车位 {space_name} 的坐标无效（宽度或高度为0），跳过绘制")
                     continue
                 
-                # 如果需要缩放，先缩放坐标
-                if need_scale:
-                    x1, y1, x2, y2 = scale_coordinates(
-                        x1_orig, y1_orig, x2_orig, y2_orig,
-                        original_width, original_height, img_width, img_height
-                    )
-                else:
-                    x1, y1, x2, y2 = x1_orig, y1_orig, x2_orig, y2_orig
-                
-                # 规范化坐标
-                x1, y1, x2, y2 = normalize_bbox(x1, y1, x2, y2, img_width, img_height)
-                
-                # 绘制矩形框
-                draw.rectangle([x1, y1, x2, y2], outline=color, width=width)
-                
-                # 绘制车位编号
-                if space_name:
-                    draw.text((x1 + 2, y1 + 2), space_name, fill=color, font=font)
+                # 记录原始矩形框，缩放和规范化在循环结束后统一向量化处理
+                rects.append((x1_orig, y1_orig, x2_orig, y2_orig))
+                rect_names.append(space_name)
             else:
                 print(f"警告: 停车位 {space_name} 的坐标格式不正确，跳过")
                 continue
                 
         except Exception as e:
-            print(f"警告: 绘制停车位 {space.get('space_name', 'unknown')} 时出错: {e}")
+            print(f"警告: 处理停车位 {space.get('space_name', 'unknown')} 时出错: {e}")
             import traceback
             traceback.print_exc()
 
 
+def _collect_spaces_rect(parking_spaces: List[Dict[str, Any]], rects: list, rect_names: list) -> bool:
+    """矩形格式专用解析（所有车位都是 bbox_x1/bbox_y1/bbox_x2/bbox_y2）
+    
+    省去逐个车位的格式判断；遇到不符合该格式的车位时返回 False，由调用方改用通用解析。
+    """
+    for space in parking_spaces:
+        try:
+            # 通用解析中 bbox 列表优先于 bbox_x1 等字段，这里保持一致
+            if isinstance(space.get("bbox"), list):
+                return False
+            x1_orig = int(space["bbox_x1"])
+            y1_orig = int(space["bbox_y1"])
+            x2_orig = int(space["bbox_x2"])
+            y2_orig = int(space["bbox_y2"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return False
+        
+        # 验证和修正坐标（确保 x1 < x2 且 y1 < y2）
+        if x1_orig > x2_orig:
+            x1_orig, x2_orig = x2_orig, x1_orig
+        if y1_orig > y2_orig:
+            y1_orig, y2_orig = y2_orig, y1_orig
+        
+        # 检查坐标是否有效
+        if x1_orig == x2_orig or y1_orig == y2_orig:
+            print(f"警告: 停车位 {space.get('space_name', '')} 的坐标无效（宽度或高度为0），跳过绘制")
+            continue
+        
+        rects.append((x1_orig, y1_orig, x2_orig, y2_orig))
+        rect_names.append(space.get("space_name", ""))
+    return True
+
+
+def _collect_spaces_polygon(parking_spaces: List[Dict[str, Any]], img_width: int, img_height: int,
+                            scale: Optional[np.ndarray], polygons: list, labels: list) -> bool:
+    """多边形格式专用解析（所有车位的 bbox 都是至少 4 个点的扁平坐标列表）
+    
+    缩放系数和裁剪上界在循环外计算一次；遇到不符合该格式的车位时返回 False，由调用方改用通用解析。
+    """
+    upper = np.array([img_width - 1, img_height - 1])
+    for space in parking_spaces:
+        bbox = space.get("bbox") if isinstance(space, dict) else None
+        if not isinstance(bbox, list) or len(bbox) < 8 or len(bbox) % 2:
+            return False
+        try:
+            pts = np.array(bbox, dtype=np.float64).astype(np.int64).reshape(-1, 2)
+        except (TypeError, ValueError):
+            return False
+        if scale is not None:
+            pts = (pts * scale).astype(np.int64)
+        np.clip(pts, 0, upper, out=pts)
+        polygons.append(pts.ravel().tolist())
+        
+        # 记录车位编号（在多边形第一个点附近）
+        space_name = space.get("space_name", "")
+        if space_name:
+            label_x, label_y = pts[0].tolist()
+            labels.append(((label_x + 2, label_y + 2), space_name))
+    return True
+
+
+def draw_parking_spaces(img: Image.Image, parking_spaces: List[Dict[str, Any]], img_width: int, img_height: int,
+                        original_width: Optional[int] = None, original_height: Optional[int] = None) -> Image.Image:
+    """在图片上绘制停车位坐标（黄色）
+    
+    支持两种格式：
+    1. 矩形格式：{"bbox_x1": x1, "bbox_y1": y1, "bbox_x2": x2, "bbox_y2": y2}
+    2. 多边形格式：{"bbox": [x1, y1, x2, y2, x3, y3, x4, y4, ...]} 或 {"bbox": [x, y, width, height]}
+    
+    先解析所有车位并按绘制类型分组：矩形边框收集为 N×4 数组，在 NumPy 图像数组上一次性绘制；
+    然后用 PIL 依次绘制所有多边形边框，最后统一贴上缓存的车位编号文本小图。
+    
+    参数:
+        img: 图片对象
+        parking_spaces: 停车位坐标列表
+        img_width: 实际图片宽度
+        img_height: 实际图片高度
+        original_width: 坐标的原始宽度（如果提供，会进行缩放）
+        original_height: 坐标的原始高度（如果提供，会进行缩放）
+    
+    返回:
+        绘制后的图片对象（矩形通过数组绘制，返回的是新的图片对象）
+    """
+    if not parking_spaces:
+        return img
+    
+    # 黄色，线宽2
+    color = (255, 255, 0)  # RGB黄色
+    width = 2
+    
+    # 确定是否需要缩放
+    need_scale = (original_width is not None and original_height is not None and 
+                  (original_width != img_width or original_height != img_height))
+    
+    rects = []  # 原始坐标系下的矩形 (x1, y1, x2, y2)
+    rect_names = []  # 与 rects 一一对应的车位编号
+    polygons = []  # 多边形扁平坐标列表
+    labels = []  # 车位编号 ((x, y), name)，所有边框绘制完成后统一绘制
+    
+    # 实际数据中同一通道的车位格式一致：按第一个车位判断格式，选用专用解析；
+    # 专用解析遇到不一致的车位时清空结果，回退到逐个判断格式的通用解析
+    first = parking_spaces[0] if isinstance(parking_spaces[0], dict) else {}
+    first_bbox = first.get("bbox")
+    if "bbox_x1" in first and not isinstance(first_bbox, list):
+        specialized = _collect_spaces_rect(parking_spaces, rects, rect_names)
+    elif isinstance(first_bbox, list) and len(first_bbox) >= 8:
+        scale = np.array([img_width / original_width, img_height / original_height]) if need_scale else None
+        specialized = _collect_spaces_polygon(parking_spaces, img_width, img_height, scale, polygons, labels)
+    else:
+        specialized = False
+    
+    if not specialized:
+        rects.clear()
+        rect_names.clear()
+        polygons.clear()
+        labels.clear()
+        _collect_spaces_generic(parking_spaces, img_width, img_height, need_scale, original_width, original_height,
+                                rects, rect_names, polygons, labels)
+    
+    # 一次性缩放、规范化并在图像数组上绘制所有矩形边框
+    if rects:
+        scale = None
+        if need_scale:
+            scale = (img_width / original_width, img_height / original_height)
+        # 解析阶段记录的都是 int 坐标，保持整数数组：不缩放时可走 normalize_bboxes 的整数快速路径
+        coords = normalize_bboxes(np.array(rects, dtype=np.int64), img_width, img_height, scale)
+        
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        arr = np.array(img)
+        _fill_rect_outlines(arr, coords, color, width)
+        img = Image.fromarray(arr)
+        
+        for (x1, y1, _, _), space_name in zip(coords.tolist(), rect_names):
+            if space_name:
+                labels.append(((x1 + 2, y1 + 2), space_name))
+    
+    # 按绘制类型分组：先绘制所有多边形边框，最后集中绘制所有车位编号（字体/字形缓存保持热状态）
+    draw = ImageDraw.Draw(img)
+    for points in polygons:
+        draw.polygon(points, outline=color, width=width)
+    _paste_labels(img, labels, 12, color)
+    
+    return img
+
+
+@functools.lru_cache(maxsize=16)
+def _build_overlay(
+    img_width: int,
+    img_height: int,
+    track_space: Optional[str],
+    parking_spaces: Optional[str],
+    original_width: Optional[int],
+    original_height: Optional[int],
+) -> Image.Image:
+    """在透明 RGBA 图层上绘制跟踪区域和停车位标注
+    
+    标注只依赖坐标和图片尺寸，与像素内容无关；按参数缓存后，同一通道的多张图片可复用同一个图层。
+    调用方不应修改返回的图层（alpha_composite 只读取图层）。
+    """
+    overlay = Image.new("RGBA", (img_width, img_height), (0, 0, 0, 0))
+    
+    # 解析坐标数据
+    track_data = parse_track_space(track_space) if track_space else None
+    parking_data = parse_parking_spaces(parking_spaces) if parking_spaces else []
+    
+    # 绘制跟踪区域（红色）
+    if track_data:
+        print(f"绘制跟踪区域: {track_data}")
+        overlay = draw_track_space(overlay, track_data, img_width, img_height, original_width, original_height)
+    else:
+        print("未提供跟踪区域坐标")
+    
+    # 绘制停车位坐标（黄色）
+    if parking_data:
+        print(f"绘制 {len(parking_data)} 个停车位")
+        overlay = draw_parking_spaces(overlay, parking_data, img_width, img_height, original_width, original_height)
+    else:
+        print("未提供停车位坐标")
+    
+    return overlay
+
+
+def _save_image(img: Image.Image, output_path: Path, fast: bool = False):
+    """按输出文件扩展名选择编码参数保存图片
+    
+    - PNG: compress_level=1（比默认的 6 快数倍，文件略大），fast 时为 0（不压缩）
+    - JPEG: quality=90，4:2:0 色度抽样，不做额外的 Huffman 优化
+    - 其他格式：交给 PIL 按默认参数保存
+    """
+    suffix = Path(output_path).suffix.lower()
+    if suffix == ".png":
+        img.save(output_path, format="PNG", compress_level=0 if fast else 1, optimize=False)
+    elif suffix in (".jpg", ".jpeg"):
+        img.save(output_path, format="JPEG", quality=90, optimize=False, subsampling=2)
+    else:
+        img.save(output_path)
+
+
 def draw_parking_areas_on_image(
     image_path: str,
     track_space: Optional[str] = None,
     parking_spaces: Optional[str] = None,
-    output_path: Optional[str] = None
+    output_path: Optional[str] = None,
+    fast: bool = False,
+    original_width: Optional[int] = None,
+    original_height: Optional[int] = None
 ) -> str:
     """
     在图片上绘制跟踪区域和停车位坐标
@@ -502,6 +830,9 @@ def draw_parking_areas_on_image(
         track_space: 跟踪区域坐标（JSON字符串）
         parking_spaces: 停车位坐标（JSON字符串，数组格式）
         output_path: 输出图片路径（如果不指定，自动生成）
+        fast: 是否使用最快的编码参数保存（PNG 不压缩，适合临时查看的测试标注图）
+        original_width: 坐标的原始宽度（与 original_height 同时提供且与图片尺寸不同时进行缩放）
+        original_height: 坐标的原始高度
     
     返回:
         输出图片路径
@@ -515,25 +846,47 @@ def draw_parking_areas_on_image(
     if not img_path.exists():
         raise FileNotFoundError(f"图片文件不存在: {image_path}")
     
-    # 打开图片
+    # 确定输出路径（始终保存在 testopvc 目录下）
+    if not output_path:
+        # 自动生成输出文件名，保存在 testopvc 目录
+        output_path = CURRENT_DIR / f"{img_path.stem}_annotated{img_path.suffix}"
+    else:
+        output_path = Path(output_path)
+        # 如果是相对路径，相对于 testopvc 目录
+        if not output_path.is_absolute():
+            output_path = CURRENT_DIR / output_path
+        # 确保输出目录存在
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    # 没有任何需要绘制的坐标时跳过解码/绘制/编码：输出格式不变则直接复制原文件
+    track_data = parse_track_space(track_space) if isinstance(track_space, str) else track_space
+    parking_data = parse_parking_spaces(parking_spaces) if isinstance(parking_spaces, str) else parking_spaces
+    if not track_data and not parking_data and output_path.suffix.lower() == img_path.suffix.lower():
+        print("警告: 未提供任何跟踪区域或停车位坐标，跳过绘制")
+        if output_path.resolve() != img_path.resolve():
+            shutil.copyfile(img_path, output_path)
+        print(f"✓ 已复制原图（无标注）: {output_path}")
+        return str(output_path)
+    
+    # 坐标缩放配置：如果提供了原始分辨率，且与实际图片尺寸不同，则进行缩放
+    orig_w, orig_h = original_width, original_height
+    
+    # 打开图片（优先只尝试 JPEG/PNG 解码器，跳过其他格式插件的探测）
     try:
-        img = Image.open(img_path)
+        try:
+            img = Image.open(img_path, formats=("JPEG", "PNG"))
+        except UnidentifiedImageError:
+            img = Image.open(img_path)
+        # JPEG 原图达到坐标分辨率的 2 倍以上时，让 libjpeg 直接按比例缩小解码（不小于坐标分辨率）
+        if orig_w and orig_h:
+            img.draft("RGB", (orig_w, orig_h))
+        img.load()
     except Exception as e:
         raise ValueError(f"无法打开图片文件: {e}")
     
-    # 创建绘图对象
-    draw = ImageDraw.Draw(img)
-    
-    # 解析坐标数据
-    track_data = parse_track_space(track_space) if track_space else None
-    parking_data = parse_parking_spaces(parking_spaces) if parking_spaces else []
-    
-    # 获取坐标缩放配置（从全局配置）
-    # 如果配置了原始分辨率，且与实际图片尺寸不同，则进行缩放
-    # 直接使用文件顶部定义的全局变量
-    globals_dict = globals()
-    orig_w = globals_dict.get('ORIGINAL_WIDTH', None)
-    orig_h = globals_dict.get('ORIGINAL_HEIGHT', None)
+    # 是否缩放只在这里判断一次：尺寸一致时不传原始分辨率，下游绘制函数直接走不缩放的路径
+    if orig_w == img.width and orig_h == img.height:
+        orig_w = orig_h = None
     
     # 打印缩放信息
     if orig_w and orig_h:
@@ -542,44 +895,32 @@ def draw_parking_areas_on_image(
     else:
         print(f"图片尺寸: {img.width}×{img.height} (不缩放)")
     
-    # 绘制跟踪区域（红色）
-    if track_data:
-        print(f"绘制跟踪区域: {track_data}")
-        draw_track_space(draw, track_data, img.width, img.height, orig_w, orig_h)
-    else:
-        print("未提供跟踪区域坐标")
-    
-    # 绘制停车位坐标（黄色）
-    if parking_data:
-        print(f"绘制 {len(parking_data)} 个停车位")
-        draw_parking_spaces(draw, parking_data, img.width, img.height, orig_w, orig_h)
-    else:
-        print("未提供停车位坐标")
+    # 在透明图层上绘制标注（按坐标和尺寸缓存），再合成到原图上
+    if track_space is not None and not isinstance(track_space, str):
+        # 坐标文件中的 track_space 可能已是对象，转换为字符串作为缓存键
+        track_space = json.dumps(track_space, ensure_ascii=False, sort_keys=True)
+    overlay = _build_overlay(img.width, img.height, track_space, parking_spaces, orig_w, orig_h)
     
-    # 确定输出路径（始终保存在 testopvc 目录下）
-    CURRENT_DIR = Path(__file__).resolve().parent  # testopvc 目录
-    if not output_path:
-        # 自动生成输出文件名，保存在 testopvc 目录
-        output_path = CURRENT_DIR / f"{img_path.stem}_annotated{img_path.suffix}"
-    else:
-        output_path = Path(output_path)
-        # 如果是相对路径，相对于 testopvc 目录
-        if not output_path.is_absolute():
-            output_path = CURRENT_DIR / output_path
-        # 确保输出目录存在
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+    base_mode = img.mode
+    img = img.convert("RGBA")
+    img.alpha_composite(overlay)
+    if base_mode != "RGBA":
+        img = img.convert("RGB")
     
-    # 保存图片
-    img.save(output_path, quality=95)
+    # 保存图片（按扩展名选择编码参数）
+    _save_image(img, output_path, fast=fast)
     print(f"✓ 已保存标注后的图片: {output_path}")
     
     return str(output_path)
 
 
+@functools.lru_cache(maxsize=64)
 def load_channel_coordinates(nvr_ip: str, channel_code: str, coordinates_dir: str = "channel_coordinates") -> tuple:
     """
     从导出的坐标文件中加载指定通道的坐标数据
     
+    同一进程内按 (nvr_ip, channel_code, coordinates_dir) 缓存解析结果，重复绘制同一通道时不再读取文件。
+    
     参数:
         nvr_ip: NVR IP地址
         channel_code: 通道编码（如 c1）
@@ -605,8 +946,9 @@ def load_channel_coordinates(nvr_ip: str, channel_code: str, coordinates_dir: st
         return None, None
     
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # 以字节读取，orjson 可跳过 utf-8 解码这一步
+        with open(filepath, "rb") as f:
+            data = _json_loads(f.read())
         
         track_space = data.get("track_space")
         parking_spaces = data.get("parking_spaces", [])
@@ -620,6 +962,79 @@ def load_channel_coordinates(nvr_ip: str, channel_code: str, coordinates_dir: st
         return None, None
 
 
+def _warmup_annotation_worker():
+    """标注子进程初始化：字体缓存不能跨进程共享，在每个子进程启动时预先加载用到的字号"""
+    _get_font(12)
+    _get_font(14)
+
+
+def _annotate_group(tasks: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """在子进程中依次处理同一通道的一组任务（同组任务复用坐标文件和标注图层缓存）"""
+    results = []
+    for task in tasks:
+        task = dict(task)
+        nvr_ip = task.pop("nvr_ip", None)
+        channel_code = task.pop("channel_code", None)
+        coordinates_dir = task.pop("coordinates_dir", COORDINATES_DIR)
+        try:
+            if nvr_ip and channel_code and "track_space" not in task and "parking_spaces" not in task:
+                task["track_space"], task["parking_spaces"] = load_channel_coordinates(
+                    nvr_ip, channel_code, coordinates_dir
+                )
+            results.append(draw_parking_areas_on_image(**task))
+        except Exception as e:
+            print(f"✗ 标注失败 {task.get('image_path')}: {e}")
+            results.append(None)
+    return results
+
+
+def annotate_batch(tasks: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Optional[str]]:
+    """多进程并行标注多张图片（多个通道）
+    
+    每个任务是 draw_parking_areas_on_image 的关键字参数字典（image_path / track_space / parking_spaces /
+    output_path 等）；也可以用 nvr_ip + channel_code（可选 coordinates_dir）代替坐标，由子进程从坐标文件加载。
+    未指定 original_width/original_height 时使用配置区域中的 ORIGINAL_WIDTH/ORIGINAL_HEIGHT。
+    
+    任务先按通道分组，同一通道的任务交给同一个子进程，复用该进程内的坐标文件和标注图层缓存。
+    
+    参数:
+        tasks: 任务列表
+        max_workers: 最大进程数（默认 CPU 核数）
+    
+    返回:
+        与 tasks 顺序一致的输出图片路径列表，失败的任务为 None
+    """
+    groups: Dict[Any, List[int]] = {}
+    for index, task in enumerate(tasks):
+        key = (task.get("nvr_ip"), task.get("channel_code"), task.get("track_space"), task.get("parking_spaces"))
+        try:
+            hash(key)
+        except TypeError:
+            key = ("__unhashable__", index)
+        groups.setdefault(key, []).append(index)
+    
+    group_tasks = []
+    for indices in groups.values():
+        group = []
+        for index in indices:
+            task = dict(tasks[index])
+            task.setdefault("original_width", ORIGINAL_WIDTH)
+            task.setdefault("original_height", ORIGINAL_HEIGHT)
+            group.append(task)
+        group_tasks.append(group)
+    
+    results: List[Optional[str]] = [None] * len(tasks)
+    if not group_tasks:
+        return results
+    
+    workers = min(max_workers or os.cpu_count() or 1, len(group_tasks))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warmup_annotation_worker) as executor:
+        for indices, outputs in zip(groups.values(), executor.map(_annotate_group, group_tasks)):
+            for index, output in zip(indices, outputs):
+                results[index] = output
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="在图片上绘制跟踪区域和停车位坐标",
@@ -724,8 +1139,8 @@ def main():
     elif args.channel_file:
         # 从指定文件加载
         try:
-            with open(args.channel_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            with open(args.channel_file, "rb") as f:
+                data = _json_loads(f.read())
             track_space = data.get("track_space")
             parking_spaces = json.dumps(data.get("parking_spaces", []), ensure_ascii=False) if data.get("parking_spaces") else None
             print(f"已从文件加载坐标: {args.channel_file}")
@@ -748,7 +1163,9 @@ def main():
             image_path=args.image,
             track_space=track_space,
             parking_spaces=parking_spaces,
-            output_path=args.output
+            output_path=args.output,
+            original_width=ORIGINAL_WIDTH,
+            original_height=ORIGINAL_HEIGHT
         )
         print(f"\n✓ 成功！标注后的图片已保存到: {output_path}")
     except Exception as e:
@@ -785,7 +1202,9 @@ def run_with_config():
             image_path=IMAGE_PATH,
             track_space=track_space,
             parking_spaces=parking_spaces,
-            output_path=OUTPUT_PATH if OUTPUT_PATH else None
+            output_path=OUTPUT_PATH if OUTPUT_PATH else None,
+            original_width=ORIGINAL_WIDTH,
+            original_height=ORIGINAL_HEIGHT
         )
         print(f"\n✓ 成功！标注后的图片已保存到: {output_path}")
     except Exception as e:
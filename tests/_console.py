@@ -0,0 +1,11 @@
+"""测试脚本公共的控制台设置（仅在直接运行脚本时调用，pytest 下由其输出捕获负责编码）"""
+import sys
+
+
+def configure_utf8_output():
+    """Windows 控制台默认编码不是 UTF-8 时，把标准输出/错误切换为 UTF-8，避免中文日志报错"""
+    if sys.platform != 'win32':
+        return
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, 'reconfigure') and (stream.encoding or '').lower() != 'utf-8':
+            stream.reconfigure(encoding='utf-8', errors='replace')
@@ -0,0 +1,88 @@
+"""pytest 公共配置：共享 HTTP 会话，服务器未运行时跳过 API 集成测试"""
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+# 添加项目根目录到路径
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# API 基础 URL
+BASE_URL = "http://localhost:8005"
+
+
+@pytest.fixture(scope="session")
+def http_session():
+    """整个测试会话共用一个 requests.Session（连接池 + keep-alive）
+
+    连接池大小与 TaskAPITester 的并发测试保持一致，并发线程不会因池满而丢弃重连。
+    """
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=32))
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def api_up(http_session):
+    """整个 pytest 会话只探测一次 /healthz；服务器未运行时跳过依赖该夹具的测试"""
+    try:
+        ok = http_session.get(f"{BASE_URL}/healthz", timeout=2).status_code == 200
+    except requests.exceptions.RequestException:
+        ok = False
+    if not ok:
+        pytest.skip("服务器未运行，跳过 API 测试（请先启动服务器: python app/main.py）")
+    return True
+
+
+@pytest.fixture(scope="session")
+def sample(http_session, api_up):
+    """取任务配置列表的第一条记录作为搜索测试的样本数据（整个会话只请求一次）
+
+    健康检查与样本数据都由会话级夹具提供，测试模块不再各自探测服务器。
+    """
+    response = http_session.get(f"{BASE_URL}/api/tasks/configs", params={"page": 1, "page_size": 1}, timeout=5)
+    items = response.json().get("items") if response.status_code == 200 else None
+    if not items:
+        pytest.skip("数据库中没有任务配置数据，跳过依赖样本数据的测试")
+    return items[0]
+
+
+@pytest.fixture(scope="session")
+def sample_date(sample):
+    return sample.get("date")
+
+
+@pytest.fixture(scope="session")
+def sample_ip(sample):
+    return sample.get("ip")
+
+
+@pytest.fixture(scope="session")
+def sample_channel(sample):
+    return sample.get("channel")
+
+
+@pytest.fixture(scope="session")
+def ip_prefix(sample_ip):
+    """样本 IP 的前两段，用于模糊搜索测试；样本没有 IP 或不是点分格式时跳过依赖的测试"""
+    parts = (sample_ip or "").split(".", 2)
+    if len(parts) < 2:
+        pytest.skip(f"样本数据的 IP 不是点分格式（{sample_ip!r}），跳过 IP 模糊搜索测试")
+    return parts[0] + "." + parts[1]
+
+
+@pytest.fixture(scope="session")
+def yolo_model():
+    """整个 pytest 会话只预加载一次 YOLO 模型（不存在时自动下载），依赖该夹具的测试共用同一实例"""
+    try:
+        from services.yolo_detector import _load_model, preload_model
+    except ImportError as e:
+        pytest.skip(f"缺少 YOLO 依赖，跳过模型相关测试: {e}")
+    if not preload_model():
+        pytest.skip("YOLO 模型预加载失败，跳过模型相关测试")
+    return _load_model()
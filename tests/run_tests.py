@@ -1,166 +1,161 @@
 """测试运行脚本"""
+import argparse
+import importlib.util
+import os
 import sys
 import subprocess
+import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-import io
 
-# 设置标准输出编码为 UTF-8（Windows 兼容）
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
-
-# 项目根目录
-PROJECT_ROOT = Path(__file__).resolve().parent
+# 项目根目录（测试脚本路径均相对于项目根目录）
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 单进程 pytest 运行的测试模块（其余 tests/ 下的脚本在导入时就会发请求，不参与收集）
+PYTEST_TARGETS = [
+    "tests/test_task_repository.py",
+    "tests/test_api_suites.py",
+    "tests/test_search_api.py",
+    "tests/test_search_api_enhanced.py",
+    "tests/test_simple_search.py",
+    "tests/test_params_debug.py",
+]
 BASE_URL = "http://localhost:8005"
 
 
-def check_server_running():
-    """检查服务器是否运行"""
-    try:
-        response = requests.get(f"{BASE_URL}/healthz", timeout=2)
-        return response.status_code == 200
-    except requests.exceptions.RequestException:
-        return False
+# 健康检查使用的会话：探测时建立的 keep-alive 连接保留在连接池中
+SESSION = requests.Session()
 
+# 健康检查结果缓存：main 和各 API 测试共用同一次探测结果，避免重复请求 /healthz
+CACHE_TTL = 30.0  # 秒
+_HEALTH_CACHE = {"ts": 0.0, "ok": False}
+_health_lock = threading.Lock()
 
-def run_repository_tests():
-    """运行仓库层测试"""
-    print("\n" + "=" * 60)
-    print("1. 运行仓库层测试")
-    print("=" * 60)
-    
-    result = subprocess.run(
-        [sys.executable, "tests/test_task_repository.py"],
+
+def check_server_running(force=False):
+    """检查服务器是否运行（结果缓存 CACHE_TTL 秒，force=True 时忽略缓存重新探测）"""
+    with _health_lock:
+        if not force and _HEALTH_CACHE["ts"] and time.monotonic() - _HEALTH_CACHE["ts"] < CACHE_TTL:
+            return _HEALTH_CACHE["ok"]
+        try:
+            response = SESSION.get(f"{BASE_URL}/healthz", timeout=2)
+            ok = response.status_code == 200
+        except requests.exceptions.RequestException:
+            ok = False
+        _HEALTH_CACHE["ts"] = time.monotonic()
+        _HEALTH_CACHE["ok"] = ok
+        return ok
+
+
+# 各测试脚本互不依赖，默认并行运行；子进程输出逐行转发并加上测试名前缀，写输出时加锁保证行不交错
+_print_lock = threading.Lock()
+
+
+def _emit(label, line):
+    """加锁输出一行（带测试名前缀）"""
+    with _print_lock:
+        sys.stdout.write(f"[{label}] {line.rstrip(chr(10))}\n")
+        sys.stdout.flush()
+
+
+# 子进程公共参数：不继承标准输入（测试误读 stdin 时不会挂起）、不继承多余句柄；Windows 下不创建控制台窗口
+_SUBPROCESS_KW = dict(stdin=subprocess.DEVNULL, close_fds=True)
+if sys.platform == 'win32':
+    _SUBPROCESS_KW["creationflags"] = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
+
+
+def _stream(cmd, label):
+    """运行子进程并实时逐行转发其输出（stderr 合并到 stdout），返回是否成功退出"""
+    # 子进程输出到管道时默认整块缓冲，关闭缓冲才能实时看到进度
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    # 已确认服务器正常运行时通知子脚本跳过各自的健康检查
+    if _HEALTH_CACHE["ok"]:
+        env["TEST_SESSION_REUSE"] = "1"
+    process = subprocess.Popen(
+        cmd,
         cwd=PROJECT_ROOT,
-        capture_output=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
         text=True,
         encoding='utf-8',
-        errors='replace'
+        errors='replace',
+        bufsize=1,
+        env=env,
+        **_SUBPROCESS_KW,
     )
+    with process.stdout:
+        for line in process.stdout:
+            _emit(label, line)
+    return process.wait() == 0
+
+
+def _run_test_script(index, title, script, needs_server=False):
+    """运行单个测试脚本，返回 (标题, 是否通过)"""
+    _emit(title, "=" * 60)
+    _emit(title, f"{index}. 运行{title}")
+    _emit(title, "=" * 60)
     
-    print(result.stdout)
-    if result.stderr:
-        print("错误输出:", result.stderr)
+    if needs_server and not check_server_running():
+        _emit(title, "[WARN] 服务器未运行，跳过 API 测试")
+        _emit(title, "   请先启动服务器: python app/main.py")
+        return title, False
     
-    return result.returncode == 0
+    return title, _stream([sys.executable, script], title)
+
+
+def run_repository_tests():
+    """运行仓库层测试"""
+    return _run_test_script(1, "仓库层测试", "tests/test_task_repository.py")
 
 
 def run_api_tests():
     """运行 API 集成测试"""
-    print("\n" + "=" * 60)
-    print("2. 运行任务管理 API 集成测试")
-    print("=" * 60)
-    
-    if not check_server_running():
-        print("[WARN] 服务器未运行，跳过 API 测试")
-        print("   请先启动服务器: python app/main.py")
-        return False
-    
-    result = subprocess.run(
-        [sys.executable, "tests/test_task_api_integration.py"],
-        cwd=PROJECT_ROOT,
-        capture_output=True,
-        text=True,
-        encoding='utf-8',
-        errors='replace'
-    )
-    
-    print(result.stdout)
-    if result.stderr:
-        print("错误输出:", result.stderr)
-    
-    return result.returncode == 0
+    return _run_test_script(2, "任务管理 API 集成测试", "tests/test_task_api_integration.py", needs_server=True)
 
 
 def run_image_api_tests():
     """运行图片管理 API 集成测试"""
-    print("\n" + "=" * 60)
-    print("3. 运行图片管理 API 集成测试")
-    print("=" * 60)
-    
-    if not check_server_running():
-        print("[WARN] 服务器未运行，跳过 API 测试")
-        print("   请先启动服务器: python app/main.py")
-        return False
-    
-    result = subprocess.run(
-        [sys.executable, "tests/test_image_api_integration.py"],
-        cwd=PROJECT_ROOT,
-        capture_output=True,
-        text=True,
-        encoding='utf-8',
-        errors='replace'
-    )
-    
-    print(result.stdout)
-    if result.stderr:
-        print("错误输出:", result.stderr)
-    
-    return result.returncode == 0
+    return _run_test_script(3, "图片管理 API 集成测试", "tests/test_image_api_integration.py", needs_server=True)
 
 
 def run_auto_schedule_api_tests():
     """运行自动调度规则 API 集成测试"""
-    print("\n" + "=" * 60)
-    print("4. 运行自动调度规则 API 集成测试")
-    print("=" * 60)
-    
-    if not check_server_running():
-        print("[WARN] 服务器未运行，跳过 API 测试")
-        print("   请先启动服务器: python app/main.py")
-        return False
-    
-    result = subprocess.run(
-        [sys.executable, "tests/test_auto_schedule_api_integration.py"],
-        cwd=PROJECT_ROOT,
-        capture_output=True,
-        text=True,
-        encoding='utf-8',
-        errors='replace'
-    )
-    
-    print(result.stdout)
-    if result.stderr:
-        print("错误输出:", result.stderr)
-    
-    return result.returncode == 0
+    return _run_test_script(4, "自动调度规则 API 集成测试", "tests/test_auto_schedule_api_integration.py", needs_server=True)
 
 
 def run_utils_api_tests():
     """运行工具类 API 集成测试"""
-    print("\n" + "=" * 60)
-    print("5. 运行工具类 API 集成测试")
-    print("=" * 60)
-    
-    if not check_server_running():
-        print("[WARN] 服务器未运行，跳过 API 测试")
-        print("   请先启动服务器: python app/main.py")
-        return False
-    
-    result = subprocess.run(
-        [sys.executable, "tests/test_utils_api_integration.py"],
-        cwd=PROJECT_ROOT,
-        capture_output=True,
-        text=True,
-        encoding='utf-8',
-        errors='replace'
-    )
-    
-    print(result.stdout)
-    if result.stderr:
-        print("错误输出:", result.stderr)
+    return _run_test_script(5, "工具类 API 集成测试", "tests/test_utils_api_integration.py", needs_server=True)
+
+
+def run_pytest(serial=False):
+    """在单个 pytest 进程中运行全部测试（解释器启动和重量级导入只付出一次），返回退出码
     
-    return result.returncode == 0
+    安装了 pytest-xdist 且未指定 serial 时使用 -n auto 并行；服务器未运行时 API 测试自动跳过。
+    """
+    cmd = [sys.executable, "-m", "pytest", "--tb=short", *PYTEST_TARGETS]
+    if not serial and importlib.util.find_spec("xdist") is not None:
+        cmd[3:3] = ["-n", "auto"]
+    print(f"运行: {' '.join(cmd[1:])}")
+    return subprocess.call(cmd, cwd=PROJECT_ROOT, stdin=subprocess.DEVNULL, close_fds=True)
 
 
-def main():
-    """主函数"""
+def main(serial=False, scripts=False):
+    """主函数
+    
+    参数:
+        serial: 是否按顺序逐个运行测试（便于定位相互影响的问题），默认并行运行
+        scripts: 是否逐个以独立脚本方式运行测试（默认在安装了 pytest 时使用单个 pytest 进程）
+    """
     print("=" * 60)
     print("Smart RTSP Stream Manager 模块重构测试")
     print("=" * 60)
     
+    if not scripts and importlib.util.find_spec("pytest") is not None:
+        return run_pytest(serial=serial)
+    
     # 检查服务器
     server_running = check_server_running()
     if server_running:
@@ -169,40 +164,31 @@ def main():
         print("[WARN] 服务器未运行")
         print("   仓库层测试可以运行，但 API 测试需要服务器运行")
     
-    # 运行测试
-    results = []
-    
-    # 1. 仓库层测试（不需要服务器）
-    repo_ok = run_repository_tests()
-    results.append(("仓库层测试", repo_ok))
-    
-    # 2. 任务管理 API 集成测试（需要服务器）
-    if server_running:
-        api_ok = run_api_tests()
-        results.append(("任务管理 API 集成测试", api_ok))
+    # 运行测试（仓库层测试不需要服务器，API 集成测试需要服务器）
+    jobs = [
+        ("仓库层测试", run_repository_tests, False),
+        ("任务管理 API 集成测试", run_api_tests, True),
+        ("图片管理 API 集成测试", run_image_api_tests, True),
+        ("自动调度规则 API 集成测试", run_auto_schedule_api_tests, True),
+        ("工具类 API 集成测试", run_utils_api_tests, True),
+    ]
+    outcomes = {}
+    runnable = [(name, fn) for name, fn, needs_server in jobs if server_running or not needs_server]
+    
+    if serial:
+        for name, fn in runnable:
+            _, ok = fn()
+            outcomes[name] = ok
     else:
-        results.append(("任务管理 API 集成测试", None))  # None 表示跳过
+        max_workers = min(len(runnable), max(1, (os.cpu_count() or 1) - 2))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fn): name for name, fn in runnable}
+            for future in as_completed(futures):
+                _, ok = future.result()
+                outcomes[futures[future]] = ok
     
-    # 3. 图片管理 API 集成测试（需要服务器）
-    if server_running:
-        image_api_ok = run_image_api_tests()
-        results.append(("图片管理 API 集成测试", image_api_ok))
-    else:
-        results.append(("图片管理 API 集成测试", None))  # None 表示跳过
-    
-    # 4. 自动调度规则 API 集成测试（需要服务器）
-    if server_running:
-        auto_schedule_api_ok = run_auto_schedule_api_tests()
-        results.append(("自动调度规则 API 集成测试", auto_schedule_api_ok))
-    else:
-        results.append(("自动调度规则 API 集成测试", None))  # None 表示跳过
-    
-    # 5. 工具类 API 集成测试（需要服务器）
-    if server_running:
-        utils_api_ok = run_utils_api_tests()
-        results.append(("工具类 API 集成测试", utils_api_ok))
-    else:
-        results.append(("工具类 API 集成测试", None))  # None 表示跳过
+    # 按固定顺序汇总，未运行的记为 None（表示跳过）
+    results = [(name, outcomes.get(name)) for name, _, _ in jobs]
     
     # 汇总结果
     print("\n" + "=" * 60)
@@ -234,5 +220,13 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    # 直接运行脚本时 tests/ 位于 sys.path[0]；pytest 导入本模块时不会执行到这里
+    from _console import configure_utf8_output
+    configure_utf8_output()
+    
+    parser = argparse.ArgumentParser(description="运行模块重构测试")
+    parser.add_argument("--serial", action="store_true", help="按顺序逐个运行测试（默认并行）")
+    parser.add_argument("--scripts", action="store_true", help="逐个以独立脚本方式运行测试（默认使用单个 pytest 进程）")
+    args = parser.parse_args()
+    sys.exit(main(serial=args.serial, scripts=args.scripts))
 
@@ -1,29 +1,88 @@
 """
 全面测试所有搜索参数
 """
+import asyncio
+import os
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+# 有 orjson 时直接从响应字节解码（比 response.json() 走的标准库 json 更快）
+_json_loads = orjson.loads if orjson is not None else json.loads
 
 BASE_URL = "http://localhost:8005"
 date = "2025-11-07"
 ip = "192.168.54.227"
 channel = "c2"
 
+# 所有请求复用同一个 Session（连接池 + keep-alive），避免每次请求重新建立 TCP 连接
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=20, max_retries=0))
+SESSION.headers["Connection"] = "keep-alive"
+
+# 并发探测的线程数（各搜索请求相互独立，可并发发送）
+PROBE_WORKERS = int(os.getenv("PROBE_WORKERS", "8"))
+
+
+def multi(*values):
+    """多选参数：服务端接口按逗号分隔的单个字符串参数解析（xxx__in），在构造测试参数时统一拼接一次"""
+    return ",".join(str(v).strip() for v in values)
+
+
+def probe(endpoint, test_name, params):
+    """发送单个搜索请求，返回 (测试名称, 状态码, 响应JSON)"""
+    response = SESSION.get(endpoint, params=params)
+    return test_name, response.status_code, _json_loads(response.content) if response.ok else None
+
+
+async def probe_async(client, endpoint, test_name, params):
+    """异步发送单个搜索请求，返回 (测试名称, 状态码, 响应JSON)"""
+    response = await client.get(endpoint, params=params)
+    return test_name, response.status_code, _json_loads(response.content) if response.is_success else None
+
+
+async def run_probes_async(probes):
+    """用一个 httpx.AsyncClient 同时发出所有请求，结果与 probes 顺序一致"""
+    limits = httpx.Limits(max_connections=16, max_keepalive_connections=8)
+    async with httpx.AsyncClient(limits=limits) as client:
+        return await asyncio.gather(*(probe_async(client, *t) for t in probes))
+
+
+def report(section_title, results, total_key):
+    """按提交顺序打印一组测试结果"""
+    print("\n" + "="*60)
+    print(section_title)
+    print("="*60)
+    for test_name, status_code, data in results:
+        if status_code == 200:
+            total = data.get(total_key, 0)
+            status = "[PASS]" if total >= 0 else "[FAIL]"
+            print(f"{status} {test_name}: {total}条")
+        else:
+            print(f"✗ {test_name}: 错误 {status_code}")
+
 print("="*60)
 print("全面测试所有搜索参数")
 print("="*60)
 
 # 任务列表详情接口测试
-print("\n" + "="*60)
-print("任务列表详情接口 (/api/tasks/{date}/paged)")
-print("="*60)
-
 tests = [
     ("基础搜索-IP和通道", {"rtsp_ip": ip, "channel": channel}),
     ("新参数-IP和通道", {"ip": ip, "channel__eq": channel}),
     ("IP模糊搜索", {"ip__like": "192.168"}),
     ("通道模糊搜索", {"channel__like": "c"}),
-    ("状态多选", {"status__in": "pending,playing,completed"}),
+    ("状态多选", {"status__in": multi("pending", "playing", "completed")}),
     ("截图文件名模糊搜索", {"screenshot_name__like": "176245"}),
     ("时间范围搜索", {"start_ts__gte": 1734048000, "start_ts__lte": 1734134399}),
     ("组合搜索-IP+通道+状态", {"ip": ip, "channel__eq": channel, "status": "completed"}),
@@ -32,70 +91,57 @@ tests = [
 for test_name, params in tests:
     params["page"] = 1
     params["page_size"] = 5
-    response = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params)
-    if response.status_code == 200:
-        data = response.json()
-        total = data.get('total', 0)
-        status = "[PASS]" if total >= 0 else "[FAIL]"
-        print(f"{status} {test_name}: {total}条")
-    else:
-        print(f"✗ {test_name}: 错误 {response.status_code}")
 
 # 任务列表接口测试
-print("\n" + "="*60)
-print("任务列表接口 (/api/tasks/configs)")
-print("="*60)
-
 tests2 = [
     ("基础搜索-日期", {"date": date}),
     ("IP精准搜索", {"ip": ip}),
     ("IP模糊搜索", {"ip__like": "192.168"}),
     ("通道搜索", {"channel": channel}),
     ("状态搜索", {"status": "完成"}),
-    ("状态多选", {"status__in": "完成,部分失败"}),
+    ("状态多选", {"status__in": multi("完成", "部分失败")}),
     ("间隔时间范围", {"interval_minutes__gte": 10, "interval_minutes__lte": 15}),
 ]
 
 for test_name, params in tests2:
     params["page"] = 1
     params["page_size"] = 10
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    if response.status_code == 200:
-        data = response.json()
-        total = data.get('total', 0)
-        status = "[PASS]" if total >= 0 else "[FAIL]"
-        print(f"{status} {test_name}: {total}条")
-    else:
-        print(f"✗ {test_name}: 错误 {response.status_code}")
 
 # 图片列表接口测试
-print("\n" + "="*60)
-print("图片列表接口 (/api/images/{date})")
-print("="*60)
-
 tests3 = [
     ("基础搜索-IP和通道", {"rtsp_ip": ip, "channel": channel}),
     ("新参数-IP和通道", {"task_ip": ip, "task_channel": channel}),
     ("任务IP模糊搜索", {"task_ip__like": "192.168"}),
     ("任务通道模糊搜索", {"task_channel__like": "c"}),
-    ("任务状态多选", {"task_status__in": "completed,failed"}),
+    ("任务状态多选", {"task_status__in": multi("completed", "failed")}),
     ("状态标签搜索", {"status_label": "待截图"}),
-    ("状态标签多选", {"status_label__in": "待截图,截图中"}),
+    ("状态标签多选", {"status_label__in": multi("待截图", "截图中")}),
     ("图片名称模糊搜索", {"name__like": "176245"}),
     ("缺失状态过滤", {"missing": False}),
 ]
 
-for test_name, params in tests3:
-    response = requests.get(f"{BASE_URL}/api/images/{date}", params=params)
-    if response.status_code == 200:
-        data = response.json()
-        total = data.get('count', 0)
-        status = "[PASS]" if total >= 0 else "[FAIL]"
-        print(f"{status} {test_name}: {total}条")
-    else:
-        print(f"✗ {test_name}: 错误 {response.status_code}")
+# 三组请求一起并发发送，完成后按提交顺序分组打印，输出保持确定
+sections = [
+    ("任务列表详情接口 (/api/tasks/{date}/paged)", f"{BASE_URL}/api/tasks/{date}/paged", tests, "total"),
+    ("任务列表接口 (/api/tasks/configs)", f"{BASE_URL}/api/tasks/configs", tests2, "total"),
+    ("图片列表接口 (/api/images/{date})", f"{BASE_URL}/api/images/{date}", tests3, "count"),
+]
+all_probes = [(endpoint, test_name, params) for _, endpoint, group, _ in sections for test_name, params in group]
+
+if httpx is not None:
+    # 安装了 httpx 时在单个事件循环中并发请求，省去线程切换
+    all_results = asyncio.run(run_probes_async(all_probes))
+else:
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        all_results = list(executor.map(lambda t: probe(*t), all_probes))
+
+offset = 0
+for section_title, _, group, total_key in sections:
+    report(section_title, all_results[offset:offset + len(group)], total_key)
+    offset += len(group)
 
 print("\n" + "="*60)
 print("测试完成")
 print("="*60)
 
+SESSION.close()
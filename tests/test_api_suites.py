@@ -0,0 +1,46 @@
+"""API 集成测试的 pytest 入口
+
+各 *APITester 类仍可作为独立脚本运行；这里把它们作为 pytest 用例收集，
+由 tests/run_tests.py 在同一个 pytest 进程中与仓库层测试一起运行（安装 pytest-xdist 时并行）。
+"""
+import pytest
+
+from tests.test_auto_schedule_api_integration import AutoScheduleAPITester
+from tests.test_image_api_integration import ImageAPITester
+from tests.test_task_api_integration import TaskAPITester
+from tests.test_utils_api_integration import UtilsAPITester
+
+# 图片 API 的各个用例互不依赖，逐个收集为独立的 pytest 用例，pytest-xdist 可把它们分发到不同进程
+IMAGE_API_TESTS = [
+    "test_get_available_dates",
+    "test_list_images_all",
+    "test_list_images_by_date",
+    "test_search_images",
+    "test_image_proxy",
+]
+
+
+def _with_session(tester_cls, http_session):
+    """创建测试类实例，改用会话级共享的 HTTP 连接"""
+    tester = tester_cls()
+    tester.session.close()
+    tester.session = http_session
+    return tester
+
+
+@pytest.mark.parametrize(
+    "tester_cls",
+    [TaskAPITester, AutoScheduleAPITester, UtilsAPITester],
+    ids=["task", "auto_schedule", "utils"],
+)
+def test_api_suite(tester_cls, http_session, api_up):
+    """运行单个 API 测试类的全部用例，复用会话级 HTTP 连接"""
+    tester = _with_session(tester_cls, http_session)
+    assert tester.run_all_tests(), f"{tester_cls.__name__} 存在失败的用例"
+
+
+@pytest.mark.parametrize("method_name", IMAGE_API_TESTS)
+def test_image_api(method_name, http_session, api_up):
+    """运行单个图片 API 用例"""
+    tester = _with_session(ImageAPITester, http_session)
+    assert getattr(tester, method_name)(), tester.test_results[-1]["message"] if tester.test_results else method_name
@@ -1,19 +1,18 @@
 """自动调度规则 API 集成测试"""
+import os
 import sys
-import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 import requests
+from requests.adapters import HTTPAdapter
 
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-# 设置标准输出编码为 UTF-8（Windows 兼容）
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
-
 # API 基础 URL
 BASE_URL = "http://localhost:8005"
 
@@ -24,26 +23,79 @@ class AutoScheduleAPITester:
     def __init__(self, base_url: str = BASE_URL):
         self.base_url = base_url
         self.session = requests.Session()
+        # 显式配置连接池，保持 keep-alive 复用连接，并发运行时不受默认 10 个连接的限制
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=20))
         self.test_results = []
         self.created_rule_ids = []  # 记录创建的规则ID，用于清理
+        self._deleted_rule_ids: set = set()  # 测试中已成功删除的规则ID，清理时跳过
+        self._lock = threading.Lock()  # 多个测试并发运行时保护结果列表、规则ID列表和输出缓冲
+        self._log_buf: list = []  # 输出先缓冲，run_all_tests 结束时一次性写出
     
     def log_result(self, test_name: str, success: bool, message: str = ""):
         """记录测试结果"""
         status = "[OK]" if success else "[FAIL]"
-        self.test_results.append({
-            "test": test_name,
-            "success": success,
-            "message": message
-        })
-        print(f"{status} {test_name}: {message}")
+        with self._lock:
+            self.test_results.append({
+                "test": test_name,
+                "success": success,
+                "message": message
+            })
+            self._log_buf.append(f"{status} {test_name}: {message}")
+    
+    def _log(self, line: str = ""):
+        """缓冲一行输出"""
+        with self._lock:
+            self._log_buf.append(line)
+    
+    def _flush_log(self):
+        """一次性写出缓冲的输出"""
+        with self._lock:
+            buf, self._log_buf = self._log_buf, []
+        if buf:
+            sys.stdout.write("\n".join(buf) + "\n")
+            sys.stdout.flush()
+    
+    def _track_rule(self, rule_id: int):
+        """记录创建的规则ID，测试结束后统一清理"""
+        with self._lock:
+            self.created_rule_ids.append(rule_id)
+    
+    def _prepare_rule(self, test_name: str, rule_data: dict, track: bool = True) -> Optional[int]:
+        """创建测试用规则并返回规则ID；创建失败时记录失败结果并返回 None"""
+        create_response = self.session.post(
+            f"{self.base_url}/api/auto-schedule/rules",
+            json=rule_data
+        )
+        if create_response.status_code != 200:
+            self.log_result(test_name, False, "无法创建测试规则")
+            return None
+        
+        rule_id = create_response.json().get("id")
+        if not rule_id:
+            self.log_result(test_name, False, "未获取到规则ID")
+            return None
+        
+        if track:
+            self._track_rule(rule_id)
+        return rule_id
     
     def cleanup(self):
-        """清理测试数据"""
-        for rule_id in self.created_rule_ids:
+        """清理测试数据（跳过已删除的规则，其余并发删除）"""
+        urls = [
+            f"{self.base_url}/api/auto-schedule/rules/{rule_id}"
+            for rule_id in self.created_rule_ids
+            if rule_id not in self._deleted_rule_ids
+        ]
+        
+        def delete(url):
             try:
-                self.session.delete(f"{self.base_url}/api/auto-schedule/rules/{rule_id}")
+                self.session.delete(url)
             except:
                 pass
+        
+        if urls:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(delete, urls))
     
     def test_list_rules(self) -> bool:
         """测试获取所有规则"""
@@ -78,7 +130,7 @@ class AutoScheduleAPITester:
                 data = response.json()
                 rule_id = data.get("id")
                 if rule_id:
-                    self.created_rule_ids.append(rule_id)
+                    self._track_rule(rule_id)
                     self.log_result("创建规则", True, f"规则ID: {rule_id}")
                     return True
                 else:
@@ -140,19 +192,21 @@ class AutoScheduleAPITester:
             },
         ]
         
+        # 各验证请求相互独立，并发发送后按顺序检查结果
+        url = f"{self.base_url}/api/auto-schedule/rules"
+        with ThreadPoolExecutor(max_workers=len(test_cases)) as executor:
+            futures = [executor.submit(self.session.post, url, json=tc["data"]) for tc in test_cases]
+        
         success_count = 0
-        for test_case in test_cases:
+        for test_case, future in zip(test_cases, futures):
             try:
-                response = self.session.post(
-                    f"{self.base_url}/api/auto-schedule/rules",
-                    json=test_case["data"]
-                )
+                response = future.result()
                 if response.status_code == test_case["expected_status"]:
                     success_count += 1
                 else:
-                    print(f"  警告: {test_case['name']} 期望状态码 {test_case['expected_status']}, 实际 {response.status_code}")
+                    self._log(f"  警告: {test_case['name']} 期望状态码 {test_case['expected_status']}, 实际 {response.status_code}")
             except Exception as e:
-                print(f"  错误: {test_case['name']} - {str(e)}")
+                self._log(f"  错误: {test_case['name']} - {str(e)}")
         
         if success_count == len(test_cases):
             self.log_result("创建规则验证", True, f"所有验证测试通过 ({success_count}/{len(test_cases)})")
@@ -172,21 +226,10 @@ class AutoScheduleAPITester:
                 "interval_minutes": 20,
                 "trigger_time": "19:00",
             }
-            create_response = self.session.post(
-                f"{self.base_url}/api/auto-schedule/rules",
-                json=rule_data
-            )
-            if create_response.status_code != 200:
-                self.log_result("更新规则", False, "无法创建测试规则")
-                return False
-            
-            rule_id = create_response.json().get("id")
-            if not rule_id:
-                self.log_result("更新规则", False, "未获取到规则ID")
+            rule_id = self._prepare_rule("更新规则", rule_data)
+            if rule_id is None:
                 return False
             
-            self.created_rule_ids.append(rule_id)
-            
             # 更新规则
             update_data = {"is_enabled": False}
             update_response = self.session.patch(
@@ -214,17 +257,8 @@ class AutoScheduleAPITester:
                 "interval_minutes": 30,
                 "trigger_time": "20:00",
             }
-            create_response = self.session.post(
-                f"{self.base_url}/api/auto-schedule/rules",
-                json=rule_data
-            )
-            if create_response.status_code != 200:
-                self.log_result("删除规则", False, "无法创建测试规则")
-                return False
-            
-            rule_id = create_response.json().get("id")
-            if not rule_id:
-                self.log_result("删除规则", False, "未获取到规则ID")
+            rule_id = self._prepare_rule("删除规则", rule_data)
+            if rule_id is None:
                 return False
             
             # 删除规则
@@ -232,6 +266,8 @@ class AutoScheduleAPITester:
                 f"{self.base_url}/api/auto-schedule/rules/{rule_id}"
             )
             if delete_response.status_code == 200:
+                with self._lock:
+                    self._deleted_rule_ids.add(rule_id)
                 self.log_result("删除规则", True, f"规则ID: {rule_id}")
                 return True
             else:
@@ -259,20 +295,21 @@ class AutoScheduleAPITester:
     
     def run_all_tests(self):
         """运行所有测试"""
-        print("=" * 60)
-        print("自动调度规则 API 集成测试")
-        print("=" * 60)
+        self._log("=" * 60)
+        self._log("自动调度规则 API 集成测试")
+        self._log("=" * 60)
         
         try:
             # 功能完整性测试
-            print("\n=== 功能完整性测试 ===")
+            self._log("\n=== 功能完整性测试 ===")
             self.test_list_rules()
-            self.test_create_rule()
-            self.test_update_rule()
-            self.test_delete_rule()
+            # 创建/更新/删除使用互不相关的规则数据，并发运行
+            lifecycle_tests = [self.test_create_rule, self.test_update_rule, self.test_delete_rule]
+            with ThreadPoolExecutor(max_workers=len(lifecycle_tests)) as executor:
+                list(executor.map(lambda test: test(), lifecycle_tests))
             
             # 验证测试
-            print("\n=== 验证测试 ===")
+            self._log("\n=== 验证测试 ===")
             self.test_create_rule_validation()
             self.test_delete_nonexistent_rule()
             
@@ -281,41 +318,47 @@ class AutoScheduleAPITester:
             self.cleanup()
         
         # 汇总结果
-        print("\n" + "=" * 60)
-        print("测试结果汇总")
-        print("=" * 60)
+        self._log("\n" + "=" * 60)
+        self._log("测试结果汇总")
+        self._log("=" * 60)
         
         total_tests = len(self.test_results)
         passed_tests = sum(1 for r in self.test_results if r["success"])
         failed_tests = total_tests - passed_tests
         
-        print(f"总测试数: {total_tests}")
-        print(f"通过: {passed_tests}")
-        print(f"失败: {failed_tests}")
+        self._log(f"总测试数: {total_tests}")
+        self._log(f"通过: {passed_tests}")
+        self._log(f"失败: {failed_tests}")
         if total_tests > 0:
-            print(f"成功率: {passed_tests/total_tests*100:.1f}%")
+            self._log(f"成功率: {passed_tests/total_tests*100:.1f}%")
         
         if failed_tests > 0:
-            print("\n失败的测试:")
+            self._log("\n失败的测试:")
             for result in self.test_results:
                 if not result["success"]:
-                    print(f"  - {result['test']}: {result['message']}")
+                    self._log(f"  - {result['test']}: {result['message']}")
         
+        self._flush_log()
         return failed_tests == 0
 
 
 if __name__ == "__main__":
-    # 检查服务器是否运行
-    try:
-        response = requests.get(f"{BASE_URL}/healthz", timeout=2)
-        if response.status_code != 200:
-            print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+    # 直接运行脚本时 tests/ 位于 sys.path[0]；pytest 导入本模块时不会执行到这里
+    from _console import configure_utf8_output
+    configure_utf8_output()
+    
+    # 检查服务器是否运行（由 run_tests.py 启动且已完成健康检查时跳过）
+    if os.getenv("TEST_SESSION_REUSE") != "1":
+        try:
+            response = requests.get(f"{BASE_URL}/healthz", timeout=2)
+            if response.status_code != 200:
+                print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+                print("请先启动服务器: python app/main.py")
+                sys.exit(1)
+        except requests.exceptions.RequestException:
+            print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
             print("请先启动服务器: python app/main.py")
             sys.exit(1)
-    except requests.exceptions.RequestException:
-        print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
-        print("请先启动服务器: python app/main.py")
-        sys.exit(1)
     
     # 运行测试
     tester = AutoScheduleAPITester()
@@ -1,89 +1,59 @@
 """
 调试搜索API - 检查实际返回的数据
 """
+import re
 import requests
 import json
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# 有 orjson 时直接从响应字节解码（比 response.json() 走的标准库 json 更快）
+_json_loads = orjson.loads if orjson is not None else json.loads
 
 BASE_URL = "http://localhost:8005"
 date = "2025-11-07"
 ip = "192.168.54.227"
 channel = "c2"
 
-print("="*60)
-print("调试搜索API")
-print("="*60)
+# 所有请求复用同一个 Session（连接池 + keep-alive），避免每次请求重新建立 TCP 连接
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=20, max_retries=0))
+SESSION.headers["Connection"] = "keep-alive"
+
+# 从 RTSP 地址中提取通道（如 ".../c2/..." -> "c2"）
+_CHAN_RE = re.compile(r'/(c[1-4])/')
 
-# 测试1: 旧参数
-print("\n[测试1] 旧参数 - rtsp_ip + channel")
-params1 = {
-    "rtsp_ip": ip,
-    "channel": channel,
-    "page": 1,
-    "page_size": 5
-}
-response1 = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params1)
-data1 = response1.json()
-print(f"总数: {data1.get('total', 0)}")
-if data1.get('items'):
-    print("前3项的通道:")
-    for item in data1['items'][:3]:
-        rtsp = item.get('rtsp_url', '')
-        ch_match = None
-        if '/c1/' in rtsp:
-            ch_match = 'c1'
-        elif '/c2/' in rtsp:
-            ch_match = 'c2'
-        elif '/c3/' in rtsp:
-            ch_match = 'c3'
-        elif '/c4/' in rtsp:
-            ch_match = 'c4'
-        print(f"  {rtsp[:60]}... -> {ch_match}")
 
-# 测试2: 新参数
-print("\n[测试2] 新参数 - ip + channel__eq")
-params2 = {
-    "ip": ip,
-    "channel__eq": channel,
-    "page": 1,
-    "page_size": 5
-}
-response2 = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params2)
-data2 = response2.json()
-print(f"总数: {data2.get('total', 0)}")
-if data2.get('items'):
-    print("前3项的通道:")
-    for item in data2['items'][:3]:
-        rtsp = item.get('rtsp_url', '')
-        ch_match = None
-        if '/c1/' in rtsp:
-            ch_match = 'c1'
-        elif '/c2/' in rtsp:
-            ch_match = 'c2'
-        elif '/c3/' in rtsp:
-            ch_match = 'c3'
-        elif '/c4/' in rtsp:
-            ch_match = 'c4'
-        print(f"  {rtsp[:60]}... -> {ch_match}")
+def _channel_of(rtsp):
+    """返回 RTSP 地址中的通道编号，未匹配时返回 None"""
+    m = _CHAN_RE.search(rtsp)
+    return m.group(1) if m else None
 
-# 测试3: 只传IP
-print("\n[测试3] 只传IP - ip")
-params3 = {
-    "ip": ip,
-    "page": 1,
-    "page_size": 5
-}
-response3 = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params3)
-data3 = response3.json()
-print(f"总数: {data3.get('total', 0)}")
 
-# 测试4: 只传通道
-print("\n[测试4] 只传通道 - channel__eq")
-params4 = {
-    "channel__eq": channel,
-    "page": 1,
-    "page_size": 5
-}
-response4 = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params4)
-data4 = response4.json()
-print(f"总数: {data4.get('total', 0)}")
+def _probe(label, params, show_channels=False):
+    """请求任务分页接口并打印总数；show_channels 时额外打印前3项的通道"""
+    print(f"\n{label}")
+    response = SESSION.get(f"{BASE_URL}/api/tasks/{date}/paged", params={**params, "page": 1, "page_size": 5})
+    data = _json_loads(response.content)
+    print(f"总数: {data.get('total', 0)}")
+    if show_channels and data.get('items'):
+        print("前3项的通道:")
+        for item in data['items'][:3]:
+            rtsp = item.get('rtsp_url', '')
+            print(f"  {rtsp[:60]}... -> {_channel_of(rtsp)}")
+    return data
+
+print("="*60)
+print("调试搜索API")
+print("="*60)
+
+_probe("[测试1] 旧参数 - rtsp_ip + channel", {"rtsp_ip": ip, "channel": channel}, show_channels=True)
+_probe("[测试2] 新参数 - ip + channel__eq", {"ip": ip, "channel__eq": channel}, show_channels=True)
+_probe("[测试3] 只传IP - ip", {"ip": ip})
+_probe("[测试4] 只传通道 - channel__eq", {"channel__eq": channel})
 
+SESSION.close()
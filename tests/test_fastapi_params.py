@@ -3,7 +3,6 @@
 """
 from fastapi import FastAPI, Query
 from typing import Optional
-import uvicorn
 
 app = FastAPI()
 
@@ -21,6 +20,9 @@ def test_params(
     }
 
 if __name__ == "__main__":
+    # 只在启动服务器时才导入 uvicorn，pytest 收集本文件时不加载服务器依赖
+    import uvicorn
+    
     print("启动测试服务器...")
     print("访问: http://localhost:8006/test?channel__eq=c2")
     print("访问: http://localhost:8006/test?channel_eq=c2")
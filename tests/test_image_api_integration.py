@@ -1,19 +1,16 @@
 """图片管理 API 集成测试"""
+import os
 import sys
-import io
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
 
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-# 设置标准输出编码为 UTF-8（Windows 兼容）
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
-
 # API 基础 URL
 BASE_URL = "http://localhost:8005"
 
@@ -24,7 +21,29 @@ class ImageAPITester:
     def __init__(self, base_url: str = BASE_URL):
         self.base_url = base_url
         self.session = requests.Session()
+        # 显式配置连接池：并发搜索或连续运行整套测试时连接不被挤出，始终复用
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.test_results = []
+        # available_dates 的成功响应在各测试方法间复用，避免重复请求
+        self._dates_cache = None
+        # 列表测试返回的第一张带路径的图片，供图片代理测试复用
+        self._probe_item = None
+    
+    def _get_dates(self) -> requests.Response:
+        """获取可用日期（成功响应会被缓存）"""
+        if self._dates_cache is None:
+            response = self.session.get(f"{self.base_url}/api/images/available_dates")
+            if response.status_code != 200:
+                return response
+            self._dates_cache = response
+        return self._dates_cache
+    
+    def _remember_item(self, items) -> None:
+        """记录第一张带路径的图片"""
+        if self._probe_item is None:
+            self._probe_item = next((item for item in items if item.get("path")), None)
     
     def log_result(self, test_name: str, success: bool, message: str = ""):
         """记录测试结果"""
@@ -39,7 +58,7 @@ class ImageAPITester:
     def test_get_available_dates(self) -> bool:
         """测试获取可用日期"""
         try:
-            response = self.session.get(f"{self.base_url}/api/images/available_dates")
+            response = self._get_dates()
             if response.status_code == 200:
                 data = response.json()
                 dates = data.get("dates", [])
@@ -60,6 +79,7 @@ class ImageAPITester:
                 data = response.json()
                 items = data.get("items", [])
                 count = data.get("count", 0)
+                self._remember_item(items)
                 self.log_result("获取所有图片", True, f"返回 {len(items)} 条，总计 {count} 条")
                 return True
             else:
@@ -73,7 +93,7 @@ class ImageAPITester:
         """测试按日期获取图片"""
         try:
             # 先获取可用日期
-            dates_response = self.session.get(f"{self.base_url}/api/images/available_dates")
+            dates_response = self._get_dates()
             if dates_response.status_code == 200:
                 dates_data = dates_response.json()
                 dates = dates_data.get("dates", [])
@@ -83,6 +103,7 @@ class ImageAPITester:
                     if response.status_code == 200:
                         data = response.json()
                         items = data.get("items", [])
+                        self._remember_item(items)
                         self.log_result("按日期获取图片", True, f"日期 {test_date} 返回 {len(items)} 条")
                         return True
                     else:
@@ -109,15 +130,17 @@ class ImageAPITester:
                 {"name__like": "jpg"},
             ]
             
-            success_count = 0
-            for search_params in search_tests:
-                response = self.session.get(
-                    f"{self.base_url}/api/images",
-                    params=search_params,
-                    timeout=10
-                )
-                if response.status_code == 200:
-                    success_count += 1
+            # 各搜索条件相互独立，并发请求（共用 self.session 的连接池）
+            with ThreadPoolExecutor(max_workers=len(search_tests)) as executor:
+                responses = list(executor.map(
+                    lambda search_params: self.session.get(
+                        f"{self.base_url}/api/images",
+                        params=search_params,
+                        timeout=10
+                    ),
+                    search_tests
+                ))
+            success_count = sum(1 for response in responses if response.status_code == 200)
             
             if success_count == len(search_tests):
                 self.log_result("图片搜索功能", True, f"所有搜索条件测试通过 ({success_count}/{len(search_tests)})")
@@ -132,30 +155,30 @@ class ImageAPITester:
     def test_image_proxy(self) -> bool:
         """测试图片代理功能"""
         try:
-            # 先获取一张图片的路径
-            response = self.session.get(f"{self.base_url}/api/images", params={"limit": 1})
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get("items", [])
-                if items and items[0].get("path"):
-                    path = items[0]["path"]
-                    proxy_response = self.session.get(
-                        f"{self.base_url}/api/image_proxy",
-                        params={"path": path},
-                        timeout=5
-                    )
-                    if proxy_response.status_code in [200, 404]:  # 404 也是正常的（文件可能不存在）
-                        self.log_result("图片代理功能", True, f"代理响应状态码: {proxy_response.status_code}")
-                        return True
-                    else:
-                        self.log_result("图片代理功能", False, f"状态码: {proxy_response.status_code}")
-                        return False
-                else:
-                    self.log_result("图片代理功能", True, "没有图片数据，跳过测试")
+            # 优先复用前面列表测试拿到的图片，没有时再单独获取一张图片的路径
+            item = self._probe_item
+            if item is None:
+                response = self.session.get(f"{self.base_url}/api/images", params={"limit": 1})
+                if response.status_code != 200:
+                    self.log_result("图片代理功能", False, "无法获取图片列表")
+                    return False
+                items = response.json().get("items", [])
+                item = items[0] if items else None
+            if item and item.get("path"):
+                proxy_response = self.session.get(
+                    f"{self.base_url}/api/image_proxy",
+                    params={"path": item["path"]},
+                    timeout=5
+                )
+                if proxy_response.status_code in [200, 404]:  # 404 也是正常的（文件可能不存在）
+                    self.log_result("图片代理功能", True, f"代理响应状态码: {proxy_response.status_code}")
                     return True
+                else:
+                    self.log_result("图片代理功能", False, f"状态码: {proxy_response.status_code}")
+                    return False
             else:
-                self.log_result("图片代理功能", False, "无法获取图片列表")
-                return False
+                self.log_result("图片代理功能", True, "没有图片数据，跳过测试")
+                return True
         except Exception as e:
             self.log_result("图片代理功能", False, str(e))
             return False
@@ -179,9 +202,16 @@ class ImageAPITester:
         print("测试结果汇总")
         print("=" * 60)
         
-        total_tests = len(self.test_results)
-        passed_tests = sum(1 for r in self.test_results if r["success"])
-        failed_tests = total_tests - passed_tests
+        # 单次遍历同时统计通过/失败数并收集失败项
+        passed_tests = failed_tests = 0
+        failures = []
+        for result in self.test_results:
+            if result["success"]:
+                passed_tests += 1
+            else:
+                failed_tests += 1
+                failures.append(result)
+        total_tests = passed_tests + failed_tests
         
         print(f"总测试数: {total_tests}")
         print(f"通过: {passed_tests}")
@@ -191,29 +221,34 @@ class ImageAPITester:
         
         if failed_tests > 0:
             print("\n失败的测试:")
-            for result in self.test_results:
-                if not result["success"]:
-                    print(f"  - {result['test']}: {result['message']}")
+            for result in failures:
+                print(f"  - {result['test']}: {result['message']}")
         
         return failed_tests == 0
 
 
 if __name__ == "__main__":
-    # 检查服务器是否运行
-    try:
-        response = requests.get(f"{BASE_URL}/healthz", timeout=2)
-        if response.status_code != 200:
-            print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+    # 直接运行脚本时 tests/ 位于 sys.path[0]；pytest 导入本模块时不会执行到这里
+    from _console import configure_utf8_output
+    configure_utf8_output()
+    
+    # 先创建测试器，健康检查走同一个 Session，建立的连接留在连接池中供后续测试复用
+    tester = ImageAPITester()
+    
+    # 检查服务器是否运行（由 run_tests.py 启动且已完成健康检查时跳过）
+    if os.getenv("TEST_SESSION_REUSE") != "1":
+        try:
+            response = tester.session.get(f"{BASE_URL}/healthz", timeout=2)
+            if response.status_code != 200:
+                print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+                print("请先启动服务器: python app/main.py")
+                sys.exit(1)
+        except requests.exceptions.RequestException:
+            print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
             print("请先启动服务器: python app/main.py")
             sys.exit(1)
-    except requests.exceptions.RequestException:
-        print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
-        print("请先启动服务器: python app/main.py")
-        sys.exit(1)
     
     # 运行测试
-    tester = ImageAPITester()
     success = tester.run_all_tests()
     
     sys.exit(0 if success else 1)
-
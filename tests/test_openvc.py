@@ -6,6 +6,8 @@ FileName:test_openvc.py
 SoftWare:PyCharm
 PS:
 """
+import os
+
 import cv2
 import numpy as np
 
@@ -33,20 +35,53 @@ colors = [
     (0, 255, 255)  # 黄色
 ]
 
-# 绘制每个车位
-for i, (x, y, w, h) in enumerate(parking_spaces):
-    color = colors[i % len(colors)]
-    cv2.rectangle(img, (x, y), (x + w, y + h), color, 2)
 
-    # 添加文字标签
-    label = f"GXSL{i + 1:03d}"
-    cv2.putText(img, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 
-# 显示图像
-cv2.imshow('Parking Spaces', img)
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+def build_overlay(shape):
+    """把所有车位框和标签一次性画到透明叠加层上，返回 (overlay, mask)
+
+    车位几何是固定的，逐帧标注时只需把叠加层合成到帧上，
+    不必每帧重复调用 cv2.rectangle / cv2.putText。
+    """
+    overlay = np.zeros(shape, dtype=np.uint8)
+    for i, (x, y, w, h) in enumerate(parking_spaces):
+        color = colors[i % len(colors)]
+        cv2.rectangle(overlay, (x, y), (x + w, y + h), color, 2)
+
+        # 添加文字标签
+        label = f"GXSL{i + 1:03d}"
+        cv2.putText(overlay, label, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    # 被绘制过的像素（任一通道非零）
+    mask = overlay.any(axis=2)
+    return overlay, mask
+
+
+def apply_overlay(frame, overlay, mask):
+    """把预渲染的叠加层原地合成到帧上（与直接在帧上绘制的结果一致）"""
+    np.copyto(frame, overlay, where=mask[..., None])
+    return frame
+
+
+# 叠加层只构建一次；视频流场景下对每一帧调用 apply_overlay 即可
+overlay, overlay_mask = build_overlay(img.shape)
+apply_overlay(img, overlay, overlay_mask)
+
+# 标注区域的外接框直接由掩码得到
+ys, xs = np.where(overlay_mask)
+if xs.size:
+    print(f"标注区域范围: x={xs.min()}~{xs.max()}, y={ys.min()}~{ys.max()}")
+
+# 显示图像（需要图形界面，设置 SHOW_UI=1 时才打开窗口，避免无界面环境下阻塞）
+if os.environ.get("SHOW_UI"):
+    cv2.imshow('Parking Spaces', img)
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
 
-# 可选：保存结果
-cv2.imwrite('parking_spaces_marked.jpg', img)
-print("已保存带车位标注的图像：parking_spaces_marked.jpg")
\ No newline at end of file
+# 保存结果
+ok, encoded = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+if ok:
+    with open('parking_spaces_marked.jpg', 'wb') as f:
+        f.write(encoded.tobytes())
+    print("已保存带车位标注的图像：parking_spaces_marked.jpg")
+else:
+    print("图像编码失败，未保存结果")
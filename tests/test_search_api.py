@@ -1,236 +1,110 @@
 """
 测试搜索API功能
 运行方式：python test_search_api.py
+或：pytest tests/test_search_api.py -n auto（每个搜索条件是独立的用例，可由 pytest-xdist 分发）
 """
+import asyncio
+import atexit
+
+import pytest
 import requests
 import json
 from datetime import datetime
 
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
 BASE_URL = "http://localhost:8005"
 
-def test_task_detail_search():
-    """测试任务列表详情搜索"""
-    print("\n" + "="*60)
-    print("测试任务列表详情搜索 (/api/tasks/{date}/paged)")
-    print("="*60)
-    
-    # 获取一个有效的日期
-    date = "2025-12-13"  # 根据实际数据修改
-    
-    # 测试1: 基础搜索（向后兼容）
-    print("\n测试1: 基础搜索 - IP和通道")
-    params = {
-        "date": date,
-        "rtsp_ip": "192.168.54.227",
-        "channel": "c2",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
-        print(f"返回项数: {len(data.get('items', []))}")
-        if data.get('items'):
-            print(f"第一项: {data['items'][0].get('rtsp_url', 'N/A')}")
-    
-    # 测试2: 精准搜索
-    print("\n测试2: 精准搜索 - IP精准匹配")
-    params = {
-        "ip": "192.168.54.227",
-        "channel__eq": "c2",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
-    
-    # 测试3: 模糊搜索
-    print("\n测试3: 模糊搜索 - IP模糊匹配")
-    params = {
-        "ip__like": "192.168",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
-    
-    # 测试4: 状态多选
-    print("\n测试4: 状态多选")
-    params = {
-        "status__in": "pending,playing",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
-        if data.get('items'):
-            statuses = set(item.get('status') for item in data['items'])
-            print(f"返回的状态: {statuses}")
-    
-    # 测试5: 时间范围搜索
-    print("\n测试5: 时间范围搜索")
-    params = {
-        "start_ts__gte": 1734048000,  # 2025-12-13 00:00:00
-        "start_ts__lte": 1734134399,  # 2025-12-13 23:59:59
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{date}/paged", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
+# 复用同一个 Session（keep-alive），脚本模式下所有请求共用一个连接
+SESSION = requests.Session()
+atexit.register(SESSION.close)
 
+# 根据实际数据修改
+DATE = "2025-12-13"
 
-def test_task_configs_search():
-    """测试任务列表搜索"""
-    print("\n" + "="*60)
-    print("测试任务列表搜索 (/api/tasks/configs)")
-    print("="*60)
-    
-    # 测试1: 基础搜索
-    print("\n测试1: 基础搜索 - 日期")
-    params = {
-        "date": "2025-12-13",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
-        print(f"返回项数: {len(data.get('items', []))}")
-        if data.get('items'):
-            print(f"第一项: IP={data['items'][0].get('ip')}, 通道={data['items'][0].get('channel')}")
-    
-    # 测试2: IP模糊搜索
-    print("\n测试2: IP模糊搜索")
-    params = {
-        "ip__like": "192.168",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
-    
-    # 测试3: 状态搜索
-    print("\n测试3: 状态搜索")
-    params = {
-        "status": "完成",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
-        if data.get('items'):
-            statuses = set(item.get('status') for item in data['items'])
-            print(f"返回的状态: {statuses}")
-    
-    # 测试4: 间隔时间范围搜索
-    print("\n测试4: 间隔时间范围搜索")
-    params = {
-        "interval_minutes__gte": 10,
-        "interval_minutes__lte": 15,
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('total', 0)}")
+# 搜索条件：(描述, 参数, 打印第一项的字段, 汇总取值的字段)
+TASK_DETAIL_CASES = [
+    ("基础搜索 - IP和通道", {"date": DATE, "rtsp_ip": "192.168.54.227", "channel": "c2", "page": 1, "page_size": 10}, "rtsp_url", None),
+    ("精准搜索 - IP精准匹配", {"ip": "192.168.54.227", "channel__eq": "c2", "page": 1, "page_size": 10}, None, None),
+    ("模糊搜索 - IP模糊匹配", {"ip__like": "192.168", "page": 1, "page_size": 10}, None, None),
+    ("状态多选", {"status__in": "pending,playing", "page": 1, "page_size": 10}, None, "status"),
+    # 2025-12-13 00:00:00 ~ 2025-12-13 23:59:59
+    ("时间范围搜索", {"start_ts__gte": 1734048000, "start_ts__lte": 1734134399, "page": 1, "page_size": 10}, None, None),
+]
 
+TASK_CONFIGS_CASES = [
+    ("基础搜索 - 日期", {"date": DATE, "page": 1, "page_size": 10}, "ip", None),
+    ("IP模糊搜索", {"ip__like": "192.168", "page": 1, "page_size": 10}, None, None),
+    ("状态搜索", {"status": "完成", "page": 1, "page_size": 10}, None, "status"),
+    ("间隔时间范围搜索", {"interval_minutes__gte": 10, "interval_minutes__lte": 15, "page": 1, "page_size": 10}, None, None),
+]
 
-def test_images_search():
-    """测试图片列表搜索"""
-    print("\n" + "="*60)
-    print("测试图片列表搜索 (/api/images/{date})")
-    print("="*60)
-    
-    date = "2025-12-13"  # 根据实际数据修改
-    
-    # 测试1: 基础搜索
-    print("\n测试1: 基础搜索 - IP和通道")
-    params = {
-        "rtsp_ip": "192.168.54.227",
-        "channel": "c2"
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{date}", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('count', 0)}")
-        print(f"返回项数: {len(data.get('items', []))}")
-        if data.get('items'):
-            print(f"第一项: 名称={data['items'][0].get('name', 'N/A')}")
-    
-    # 测试2: 图片名称模糊搜索
-    print("\n测试2: 图片名称模糊搜索")
-    params = {
-        "name__like": "176245"
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{date}", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('count', 0)}")
-    
-    # 测试3: 任务状态多选
-    print("\n测试3: 任务状态多选")
-    params = {
-        "task_status__in": "completed,failed"
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{date}", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('count', 0)}")
-        if data.get('items'):
-            statuses = set(item.get('task_status') for item in data['items'])
-            print(f"返回的任务状态: {statuses}")
-    
-    # 测试4: 状态标签搜索
-    print("\n测试4: 状态标签搜索")
-    params = {
-        "status_label": "待截图"
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{date}", params=params)
-    print(f"状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        print(f"总数: {data.get('count', 0)}")
-        if data.get('items'):
-            labels = set(item.get('status_label') for item in data['items'])
-            print(f"返回的状态标签: {labels}")
-    
-    # 测试5: 缺失状态过滤
-    print("\n测试5: 缺失状态过滤")
-    params = {
-        "missing": False  # 只显示存在的图片
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{date}", params=params)
+IMAGES_CASES = [
+    ("基础搜索 - IP和通道", {"rtsp_ip": "192.168.54.227", "channel": "c2"}, "name", None),
+    ("图片名称模糊搜索", {"name__like": "176245"}, None, None),
+    ("任务状态多选", {"task_status__in": "completed,failed"}, None, "task_status"),
+    ("状态标签搜索", {"status_label": "待截图"}, None, "status_label"),
+    ("缺失状态过滤", {"missing": False}, None, None),  # 只显示存在的图片
+]
+
+
+def _ids(cases):
+    return [case[0] for case in cases]
+
+
+def _print_summary(response, first_key, values_key, total_key):
+    """打印单个搜索响应的摘要（requests / httpx 响应均可）"""
     print(f"状态码: {response.status_code}")
     if response.status_code == 200:
         data = response.json()
-        print(f"总数: {data.get('count', 0)}")
+        items = data.get('items', [])
+        print(f"总数: {data.get(total_key, 0)}")
+        if first_key:
+            print(f"返回项数: {len(items)}")
+            if items:
+                print(f"第一项: {first_key}={items[0].get(first_key, 'N/A')}")
+        if values_key and items:
+            print(f"返回的{values_key}: {set(item.get(values_key) for item in items)}")
+
+
+def _run_search(session, endpoint, description, params, first_key, values_key, total_key="total"):
+    """发送单个搜索请求并打印结果摘要，返回响应"""
+    print(f"\n{description}")
+    response = session.get(endpoint, params=params)
+    _print_summary(response, first_key, values_key, total_key)
+    return response
+
+
+async def _fetch_all_async(requests_to_send):
+    """用一个 httpx.AsyncClient 并发发出所有 (endpoint, params) 请求，结果与输入顺序一致"""
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+    async with httpx.AsyncClient(limits=limits) as client:
+        return await asyncio.gather(*(client.get(endpoint, params=params) for endpoint, params in requests_to_send))
+
+
+@pytest.mark.parametrize("description,params,first_key,values_key", TASK_DETAIL_CASES, ids=_ids(TASK_DETAIL_CASES))
+def test_task_detail_search(http_session, api_up, description, params, first_key, values_key):
+    """测试任务列表详情搜索 (/api/tasks/{date}/paged)"""
+    response = _run_search(http_session, f"{BASE_URL}/api/tasks/{DATE}/paged", description, params, first_key, values_key)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("description,params,first_key,values_key", TASK_CONFIGS_CASES, ids=_ids(TASK_CONFIGS_CASES))
+def test_task_configs_search(http_session, api_up, description, params, first_key, values_key):
+    """测试任务列表搜索 (/api/tasks/configs)"""
+    response = _run_search(http_session, f"{BASE_URL}/api/tasks/configs", description, params, first_key, values_key)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("description,params,first_key,values_key", IMAGES_CASES, ids=_ids(IMAGES_CASES))
+def test_images_search(http_session, api_up, description, params, first_key, values_key):
+    """测试图片列表搜索 (/api/images/{date})"""
+    response = _run_search(http_session, f"{BASE_URL}/api/images/{DATE}", description, params, first_key, values_key,
+                           total_key="count")
+    assert response.status_code == 200
 
 
 def main():
@@ -240,7 +114,7 @@ def main():
     
     try:
         # 测试服务器是否运行
-        response = requests.get(f"{BASE_URL}/api/tasks/configs", params={"page": 1, "page_size": 1}, timeout=5)
+        response = SESSION.get(f"{BASE_URL}/api/tasks/configs", params={"page": 1, "page_size": 1}, timeout=5)
         if response.status_code != 200:
             print(f"错误: 服务器返回状态码 {response.status_code}")
             return
@@ -253,9 +127,28 @@ def main():
         return
     
     # 运行测试
-    test_task_detail_search()
-    test_task_configs_search()
-    test_images_search()
+    groups = [
+        ("测试任务列表详情搜索 (/api/tasks/{date}/paged)", f"{BASE_URL}/api/tasks/{DATE}/paged", TASK_DETAIL_CASES, "total"),
+        ("测试任务列表搜索 (/api/tasks/configs)", f"{BASE_URL}/api/tasks/configs", TASK_CONFIGS_CASES, "total"),
+        ("测试图片列表搜索 (/api/images/{date})", f"{BASE_URL}/api/images/{DATE}", IMAGES_CASES, "count"),
+    ]
+    if httpx is not None:
+        # 安装了 httpx 时所有搜索条件并发发送，完成后按原顺序分组打印
+        responses = iter(asyncio.run(_fetch_all_async(
+            [(endpoint, case[1]) for _, endpoint, cases, _ in groups for case in cases]
+        )))
+    else:
+        responses = None
+    for title, endpoint, cases, total_key in groups:
+        print("\n" + "="*60)
+        print(title)
+        print("="*60)
+        for index, (description, params, first_key, values_key) in enumerate(cases, 1):
+            if responses is None:
+                _run_search(SESSION, endpoint, f"测试{index}: {description}", params, first_key, values_key, total_key)
+            else:
+                print(f"\n测试{index}: {description}")
+                _print_summary(next(responses), first_key, values_key, total_key)
     
     print("\n" + "="*60)
     print("测试完成")
@@ -264,4 +157,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -1,236 +1,218 @@
 """
 增强版搜索API测试 - 使用实际数据验证
 运行方式：python test_search_api_enhanced.py
+或：pytest tests/test_search_api_enhanced.py（样本数据由 conftest.py 中的会话级夹具提供）
 """
+import atexit
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 BASE_URL = "http://localhost:8005"
+CONFIGS_URL = f"{BASE_URL}/api/tasks/configs"
+# 分页搜索的默认参数，各子测试在其基础上补充搜索条件
+PAGE_PARAMS = {"page": 1, "page_size": 5}
 
-def get_available_dates():
-    """获取可用的日期列表"""
-    try:
-        response = requests.get(f"{BASE_URL}/api/tasks/configs", params={"page": 1, "page_size": 100}, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            dates = set()
-            for item in data.get('items', []):
-                if item.get('date'):
-                    dates.add(item['date'])
-            return sorted(list(dates))
-    except Exception as e:
-        print(f"获取日期列表失败: {e}")
-    return []
+# 所有请求复用同一个 Session（连接池 + keep-alive），避免每次请求重新建立 TCP 连接
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0))
+atexit.register(SESSION.close)
+
+# 有 orjson 时直接从响应字节解码（比 response.json() 走的标准库 json 更快）
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+def _fetch_all(jobs):
+    """并发发出多个 (url, params) GET 请求，按 jobs 的顺序返回响应"""
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        return list(executor.map(lambda job: SESSION.get(job[0], params=job[1]), jobs))
+
+# /api/tasks/configs 第一页的成功响应缓存：健康检查与样本数据共用一次请求
+_CONFIGS_CACHE = {}
+
+def _get_configs(page=1, page_size=100):
+    """获取任务配置列表（成功响应按 (page, page_size) 缓存），返回响应对象"""
+    key = (page, page_size)
+    if key not in _CONFIGS_CACHE:
+        response = SESSION.get(CONFIGS_URL, params={"page": page, "page_size": page_size}, timeout=5)
+        if response.status_code != 200:
+            return response
+        _CONFIGS_CACHE[key] = response
+    return _CONFIGS_CACHE[key]
+
+def _has_both(items, ip, channel):
+    """所有项的 rtsp_url 都同时包含 IP 和通道（遇到第一个不匹配项即返回）"""
+    for item in items:
+        url = item.get('rtsp_url') or ''
+        if ip not in url or channel not in url:
+            return False
+    return True
+
+# _first_invalid 在所有取值都合法时返回的哨兵（取值本身可能为 None）
+_ALL_VALID = object()
+
+def _first_invalid(items, key, allowed):
+    """单次遍历校验 items[key] 都在 allowed 中，返回第一个不合法的取值，全部合法时返回 _ALL_VALID"""
+    return next((item.get(key) for item in items if item.get(key) not in allowed), _ALL_VALID)
 
 def get_sample_data():
     """获取样本数据用于测试"""
     try:
-        response = requests.get(f"{BASE_URL}/api/tasks/configs", params={"page": 1, "page_size": 10}, timeout=5)
+        response = _get_configs()
         if response.status_code == 200:
-            data = response.json()
+            data = _json_loads(response.content)
             if data.get('items'):
                 return data['items'][0]  # 返回第一条数据作为样本
     except Exception as e:
         print(f"获取样本数据失败: {e}")
     return None
 
-def test_task_detail_search_enhanced(sample_date, sample_ip, sample_channel):
+def _ok_json(response):
+    """断言响应成功（200）后再解析 JSON，失败时报告状态码而不是在后续取值处出错"""
+    print(f"  状态码: {response.status_code}")
+    assert response.status_code == 200, f"请求失败: {response.url} -> {response.status_code}"
+    return _json_loads(response.content)
+
+def _verify(desc, ok, detail=""):
+    """打印验证结果并断言通过：pytest 与脚本模式都以断言失败作为测试失败"""
+    print(f"  验证: {desc} - {'[PASS]' if ok else '[FAIL]'}")
+    assert ok, f"{desc} {detail}".rstrip()
+
+def _verify_all_in(desc, items, key, allowed):
+    """校验 items[key] 都在 allowed 中；只在失败时汇总返回的取值，便于排查"""
+    bad = _first_invalid(items, key, allowed)
+    detail = ""
+    if bad is not _ALL_VALID:
+        detail = f"不允许的取值: {bad}，返回的取值: {set(item.get(key) for item in items)}"
+    _verify(desc, bad is _ALL_VALID, detail)
+
+def test_task_detail_search_enhanced(sample_date, sample_ip, sample_channel, ip_prefix):
     """增强版任务列表详情搜索测试"""
     print("\n" + "="*60)
     print("测试任务列表详情搜索 (/api/tasks/{date}/paged)")
     print("="*60)
     
+    # 各子测试的请求相互独立，先并发发出，再按原顺序逐个校验输出
+    url_paged = f"{BASE_URL}/api/tasks/{sample_date}/paged"
+    jobs = [
+        (url_paged, {**PAGE_PARAMS, "rtsp_ip": sample_ip, "channel": sample_channel}),
+        (url_paged, {**PAGE_PARAMS, "ip": sample_ip, "channel__eq": sample_channel}),
+        (url_paged, {**PAGE_PARAMS, "ip__like": ip_prefix}),
+        (url_paged, {**PAGE_PARAMS, "status__in": "pending,playing,completed", "page_size": 10}),
+        (url_paged, {**PAGE_PARAMS, "screenshot_name__like": "176245"}),
+    ]
+    responses = _fetch_all(jobs)
+    
     # 测试1: 基础搜索（向后兼容）
     print("\n[测试1] 基础搜索 - IP和通道（向后兼容）")
-    params = {
-        "rtsp_ip": sample_ip,
-        "channel": sample_channel,
-        "page": 1,
-        "page_size": 5
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{sample_date}/paged", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total1 = data.get('total', 0)
-        print(f"  总数: {total1}")
-        print(f"  返回项数: {len(data.get('items', []))}")
-        if data.get('items'):
-            item = data['items'][0]
-            print(f"  第一项: IP={item.get('rtsp_url', 'N/A')[:50]}...")
-            # 验证所有返回项的IP和通道
-            all_match = all(
-                sample_ip in item.get('rtsp_url', '') and sample_channel in item.get('rtsp_url', '')
-                for item in data['items']
-            )
-            print(f"  验证: 所有项都包含IP和通道 - {'[PASS]' if all_match else '[FAIL]'}")
+    data = _ok_json(responses[0])
+    total1 = data.get('total', 0)
+    print(f"  总数: {total1}")
+    print(f"  返回项数: {len(data.get('items', []))}")
+    if data.get('items'):
+        item = data['items'][0]
+        print(f"  第一项: IP={item.get('rtsp_url', 'N/A')[:50]}...")
+        # 验证所有返回项的IP和通道
+        _verify("所有项都包含IP和通道", _has_both(data['items'], sample_ip, sample_channel))
     
     # 测试2: 新参数精准搜索
     print("\n[测试2] 新参数精准搜索 - IP和通道")
-    params = {
-        "ip": sample_ip,
-        "channel__eq": sample_channel,
-        "page": 1,
-        "page_size": 5
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{sample_date}/paged", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total2 = data.get('total', 0)
-        print(f"  总数: {total2}")
-        # 验证结果应该与测试1相同
-        if total1 > 0:
-            match = (total1 == total2)
-            print(f"  验证: 与测试1结果一致 - {'[PASS]' if match else '[FAIL]'}")
+    data = _ok_json(responses[1])
+    total2 = data.get('total', 0)
+    print(f"  总数: {total2}")
+    # 验证结果应该与测试1相同
+    if total1 > 0:
+        _verify("与测试1结果一致", total1 == total2, f"({total1} != {total2})")
     
     # 测试3: 模糊搜索
     print("\n[测试3] 模糊搜索 - IP部分匹配")
-    ip_prefix = sample_ip.split('.')[0] + '.' + sample_ip.split('.')[1]  # 前两段
-    params = {
-        "ip__like": ip_prefix,
-        "page": 1,
-        "page_size": 5
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{sample_date}/paged", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total3 = data.get('total', 0)
-        print(f"  总数: {total3}")
-        if data.get('items'):
-            # 验证所有返回项都包含IP前缀
-            all_match = all(ip_prefix in item.get('rtsp_url', '') for item in data['items'])
-            print(f"  验证: 所有项都包含IP前缀 - {'[PASS]' if all_match else '[FAIL]'}")
+    data = _ok_json(responses[2])
+    print(f"  总数: {data.get('total', 0)}")
+    if data.get('items'):
+        # 验证所有返回项都包含IP前缀
+        all_match = all(ip_prefix in item.get('rtsp_url', '') for item in data['items'])
+        _verify("所有项都包含IP前缀", all_match)
     
     # 测试4: 状态多选
     print("\n[测试4] 状态多选")
-    params = {
-        "status__in": "pending,playing,completed",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{sample_date}/paged", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total4 = data.get('total', 0)
-        print(f"  总数: {total4}")
-        if data.get('items'):
-            statuses = set(item.get('status') for item in data['items'])
-            print(f"  返回的状态: {statuses}")
-            valid_statuses = {'pending', 'playing', 'completed'}
-            all_valid = all(s in valid_statuses for s in statuses)
-            print(f"  验证: 所有状态都在允许范围内 - {'[PASS]' if all_valid else '[FAIL]'}")
+    data = _ok_json(responses[3])
+    print(f"  总数: {data.get('total', 0)}")
+    if data.get('items'):
+        _verify_all_in("所有状态都在允许范围内", data['items'], 'status', {'pending', 'playing', 'completed'})
     
     # 测试5: 截图文件名模糊搜索
     print("\n[测试5] 截图文件名模糊搜索")
-    params = {
-        "screenshot_name__like": "176245",
-        "page": 1,
-        "page_size": 5
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/{sample_date}/paged", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total5 = data.get('total', 0)
-        print(f"  总数: {total5}")
-        if data.get('items'):
-            # 验证所有返回项的截图文件名都包含搜索关键词
-            all_match = all(
-                '176245' in (item.get('screenshot_path', '') or '')
-                for item in data['items']
-            )
-            print(f"  验证: 所有项都包含关键词 - {'[PASS]' if all_match else '[FAIL]'}")
+    data = _ok_json(responses[4])
+    print(f"  总数: {data.get('total', 0)}")
+    if data.get('items'):
+        # 验证所有返回项的截图文件名都包含搜索关键词
+        all_match = all(
+            '176245' in (item.get('screenshot_path', '') or '')
+            for item in data['items']
+        )
+        _verify("所有项都包含关键词", all_match)
 
 
-def test_task_configs_search_enhanced(sample_date, sample_ip):
+def test_task_configs_search_enhanced(sample_date, sample_ip, ip_prefix):
     """增强版任务列表搜索测试"""
     print("\n" + "="*60)
     print("测试任务列表搜索 (/api/tasks/configs)")
     print("="*60)
     
+    # 各子测试的请求相互独立，先并发发出，再按原顺序逐个校验输出
+    jobs = [
+        (CONFIGS_URL, {**PAGE_PARAMS, "date": sample_date, "page_size": 10}),
+        (CONFIGS_URL, {**PAGE_PARAMS, "ip": sample_ip, "page_size": 10}),
+        (CONFIGS_URL, {**PAGE_PARAMS, "ip__like": ip_prefix, "page_size": 10}),
+        (CONFIGS_URL, {**PAGE_PARAMS, "status": "完成", "page_size": 10}),
+    ]
+    responses = _fetch_all(jobs)
+    
     # 测试1: 基础搜索
     print("\n[测试1] 基础搜索 - 日期")
-    params = {
-        "date": sample_date,
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total1 = data.get('total', 0)
-        print(f"  总数: {total1}")
-        print(f"  返回项数: {len(data.get('items', []))}")
-        if data.get('items'):
-            item = data['items'][0]
-            print(f"  第一项: IP={item.get('ip')}, 通道={item.get('channel')}, 状态={item.get('status')}")
-            # 验证所有返回项的日期
-            all_match = all(item.get('date') == sample_date for item in data['items'])
-            print(f"  验证: 所有项都是指定日期 - {'[PASS]' if all_match else '[FAIL]'}")
+    data = _ok_json(responses[0])
+    print(f"  总数: {data.get('total', 0)}")
+    print(f"  返回项数: {len(data.get('items', []))}")
+    if data.get('items'):
+        item = data['items'][0]
+        print(f"  第一项: IP={item.get('ip')}, 通道={item.get('channel')}, 状态={item.get('status')}")
+        # 验证所有返回项的日期
+        _verify("所有项都是指定日期", all(item.get('date') == sample_date for item in data['items']))
     
     # 测试2: IP精准搜索
     print("\n[测试2] IP精准搜索")
-    params = {
-        "ip": sample_ip,
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total2 = data.get('total', 0)
-        print(f"  总数: {total2}")
-        if data.get('items'):
-            # 验证所有返回项的IP
-            all_match = all(item.get('ip') == sample_ip for item in data['items'])
-            print(f"  验证: 所有项的IP都匹配 - {'[PASS]' if all_match else '[FAIL]'}")
+    data = _ok_json(responses[1])
+    total2 = data.get('total', 0)
+    print(f"  总数: {total2}")
+    if data.get('items'):
+        # 验证所有返回项的IP
+        _verify("所有项的IP都匹配", all(item.get('ip') == sample_ip for item in data['items']))
     
     # 测试3: IP模糊搜索
     print("\n[测试3] IP模糊搜索")
-    ip_prefix = sample_ip.split('.')[0] + '.' + sample_ip.split('.')[1]
-    params = {
-        "ip__like": ip_prefix,
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total3 = data.get('total', 0)
-        print(f"  总数: {total3}")
-        if data.get('items'):
-            # 验证所有返回项的IP都包含前缀
-            all_match = all(ip_prefix in (item.get('ip') or '') for item in data['items'])
-            print(f"  验证: 所有项的IP都包含前缀 - {'[PASS]' if all_match else '[FAIL]'}")
-            # 模糊搜索应该返回更多结果
-            more_results = total3 >= total2
-            print(f"  验证: 模糊搜索返回更多或相等结果 - {'[PASS]' if more_results else '[FAIL]'}")
+    data = _ok_json(responses[2])
+    total3 = data.get('total', 0)
+    print(f"  总数: {total3}")
+    if data.get('items'):
+        # 验证所有返回项的IP都包含前缀
+        _verify("所有项的IP都包含前缀", all(ip_prefix in (item.get('ip') or '') for item in data['items']))
+        # 模糊搜索应该返回更多结果
+        _verify("模糊搜索返回更多或相等结果", total3 >= total2, f"({total3} < {total2})")
     
     # 测试4: 状态搜索
     print("\n[测试4] 状态搜索 - 完成")
-    params = {
-        "status": "完成",
-        "page": 1,
-        "page_size": 10
-    }
-    response = requests.get(f"{BASE_URL}/api/tasks/configs", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total4 = data.get('total', 0)
-        print(f"  总数: {total4}")
-        if data.get('items'):
-            statuses = set(item.get('status') for item in data['items'])
-            print(f"  返回的状态: {statuses}")
-            all_completed = all(item.get('status') == '完成' for item in data['items'])
-            print(f"  验证: 所有项都是'完成'状态 - {'[PASS]' if all_completed else '[FAIL]'}")
+    data = _ok_json(responses[3])
+    print(f"  总数: {data.get('total', 0)}")
+    if data.get('items'):
+        _verify_all_in("所有项都是'完成'状态", data['items'], 'status', {'完成'})
 
 
 def test_images_search_enhanced(sample_date, sample_ip, sample_channel):
@@ -239,63 +221,46 @@ def test_images_search_enhanced(sample_date, sample_ip, sample_channel):
     print("测试图片列表搜索 (/api/images/{date})")
     print("="*60)
     
+    # 各子测试的请求相互独立，先并发发出，再按原顺序逐个校验输出
+    url_images = f"{BASE_URL}/api/images/{sample_date}"
+    jobs = [
+        (url_images, {"rtsp_ip": sample_ip, "channel": sample_channel}),
+        (url_images, {"task_ip": sample_ip, "task_channel": sample_channel}),
+        (url_images, {"task_status__in": "completed,failed"}),
+    ]
+    responses = _fetch_all(jobs)
+    
     # 测试1: 基础搜索（向后兼容）
     print("\n[测试1] 基础搜索 - IP和通道（向后兼容）")
-    params = {
-        "rtsp_ip": sample_ip,
-        "channel": sample_channel
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{sample_date}", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total1 = data.get('count', 0)
-        print(f"  总数: {total1}")
-        print(f"  返回项数: {len(data.get('items', []))}")
-        if data.get('items'):
-            item = data['items'][0]
-            print(f"  第一项: 名称={item.get('name', 'N/A')[:30]}..., IP={item.get('task_ip')}, 通道={item.get('task_channel')}")
-            # 验证所有返回项的IP和通道
-            all_match = all(
-                item.get('task_ip') == sample_ip and item.get('task_channel') == sample_channel
-                for item in data['items']
-            )
-            print(f"  验证: 所有项都匹配IP和通道 - {'[PASS]' if all_match else '[FAIL]'}")
+    data = _ok_json(responses[0])
+    total1 = data.get('count', 0)
+    print(f"  总数: {total1}")
+    print(f"  返回项数: {len(data.get('items', []))}")
+    if data.get('items'):
+        item = data['items'][0]
+        print(f"  第一项: 名称={item.get('name', 'N/A')[:30]}..., IP={item.get('task_ip')}, 通道={item.get('task_channel')}")
+        # 验证所有返回项的IP和通道
+        all_match = all(
+            item.get('task_ip') == sample_ip and item.get('task_channel') == sample_channel
+            for item in data['items']
+        )
+        _verify("所有项都匹配IP和通道", all_match)
     
     # 测试2: 新参数精准搜索
     print("\n[测试2] 新参数精准搜索 - IP和通道")
-    params = {
-        "task_ip": sample_ip,
-        "task_channel": sample_channel
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{sample_date}", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total2 = data.get('count', 0)
-        print(f"  总数: {total2}")
-        # 验证结果应该与测试1相同
-        if total1 > 0:
-            match = (total1 == total2)
-            print(f"  验证: 与测试1结果一致 - {'[PASS]' if match else '[FAIL]'}")
+    data = _ok_json(responses[1])
+    total2 = data.get('count', 0)
+    print(f"  总数: {total2}")
+    # 验证结果应该与测试1相同
+    if total1 > 0:
+        _verify("与测试1结果一致", total1 == total2, f"({total1} != {total2})")
     
     # 测试3: 任务状态多选
     print("\n[测试3] 任务状态多选")
-    params = {
-        "task_status__in": "completed,failed"
-    }
-    response = requests.get(f"{BASE_URL}/api/images/{sample_date}", params=params)
-    print(f"  状态码: {response.status_code}")
-    if response.status_code == 200:
-        data = response.json()
-        total3 = data.get('count', 0)
-        print(f"  总数: {total3}")
-        if data.get('items'):
-            statuses = set(item.get('task_status') for item in data['items'])
-            print(f"  返回的任务状态: {statuses}")
-            valid_statuses = {'completed', 'failed'}
-            all_valid = all(s in valid_statuses for s in statuses)
-            print(f"  验证: 所有状态都在允许范围内 - {'[PASS]' if all_valid else '[FAIL]'}")
+    data = _ok_json(responses[2])
+    print(f"  总数: {data.get('count', 0)}")
+    if data.get('items'):
+        _verify_all_in("所有状态都在允许范围内", data['items'], 'task_status', {'completed', 'failed'})
 
 
 def main():
@@ -305,44 +270,59 @@ def main():
     print("="*60)
     print(f"API地址: {BASE_URL}")
     
-    # 检查服务器
+    # 检查服务器（响应会被缓存，后面获取样本数据时直接复用）
     try:
-        response = requests.get(f"{BASE_URL}/api/tasks/configs", params={"page": 1, "page_size": 1}, timeout=5)
+        response = _get_configs()
         if response.status_code != 200:
             print(f"错误: 服务器返回状态码 {response.status_code}")
-            return
+            return 1
     except requests.exceptions.ConnectionError:
         print("错误: 无法连接到服务器，请确保服务器正在运行")
         print("提示: 运行 python app/main.py 启动服务器")
-        return
+        return 1
     except Exception as e:
         print(f"错误: {e}")
-        return
+        return 1
     
     # 获取样本数据
     print("\n获取样本数据...")
     sample = get_sample_data()
     if not sample:
         print("错误: 无法获取样本数据，请确保数据库中有数据")
-        return
+        return 1
     
     sample_date = sample.get('date')
     sample_ip = sample.get('ip')
     sample_channel = sample.get('channel')
+    # IP 前两段，用于模糊搜索测试
+    parts = (sample_ip or '').split('.', 2)
+    if len(parts) < 2:
+        print(f"错误: 样本数据的 IP 不是点分格式（{sample_ip!r}），无法进行 IP 模糊搜索测试")
+        return 1
+    sample_ip_prefix = parts[0] + '.' + parts[1]
     
     print(f"使用样本数据: 日期={sample_date}, IP={sample_ip}, 通道={sample_channel}")
     
-    # 运行测试
-    test_task_detail_search_enhanced(sample_date, sample_ip, sample_channel)
-    test_task_configs_search_enhanced(sample_date, sample_ip)
-    test_images_search_enhanced(sample_date, sample_ip, sample_channel)
+    # 运行测试：某个测试断言失败时记录下来，继续运行其余测试
+    tests = [
+        (test_task_detail_search_enhanced, (sample_date, sample_ip, sample_channel, sample_ip_prefix)),
+        (test_task_configs_search_enhanced, (sample_date, sample_ip, sample_ip_prefix)),
+        (test_images_search_enhanced, (sample_date, sample_ip, sample_channel)),
+    ]
+    failures = []
+    for test, args in tests:
+        try:
+            test(*args)
+        except AssertionError as e:
+            print(f"  [FAIL] {e}")
+            failures.append(test.__name__)
     
     print("\n" + "="*60)
-    print("测试完成")
+    print("测试完成" if not failures else f"测试失败: {', '.join(failures)}")
     print("="*60)
-    print("\n提示: 请检查所有验证结果，确保都是 [PASS]")
+    return 1 if failures else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
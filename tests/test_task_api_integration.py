@@ -1,17 +1,24 @@
 """任务 API 集成测试（功能完整性、并发、安全）"""
+import asyncio
+import os
 import sys
-import io
 import time
 import threading
 from pathlib import Path
 from typing import List, Dict
 import requests
+from requests.adapters import HTTPAdapter
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# 设置标准输出编码为 UTF-8（Windows 兼容）
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+try:
+    from requests_futures.sessions import FuturesSession
+except ImportError:  # pragma: no cover - optional dependency
+    FuturesSession = None
 
 # 添加项目根目录到路径
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
@@ -25,19 +32,36 @@ BASE_URL = "http://localhost:8005"
 class TaskAPITester:
     """任务 API 测试类"""
     
-    def __init__(self, base_url: str = BASE_URL):
+    def __init__(self, base_url: str = BASE_URL, num_threads: int = 20, thorough: bool = False):
         self.base_url = base_url
+        # 完整模式下搜索条件逐个单独请求，默认合并为一次请求
+        self.thorough = thorough
+        self.num_threads = num_threads
         self.session = requests.Session()
-        self.test_results = []
+        # 连接池不小于并发数：并发测试的每个线程都能保留自己的 keep-alive 连接，不被丢弃重连
+        pool_size = max(num_threads, 32)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # 测试结果按字段分列存储：名称、是否通过、说明
+        self.test_names: List[str] = []
+        self.test_successes: List[bool] = []
+        self.test_messages: List[str] = []
+    
+    @property
+    def test_results(self) -> List[Dict]:
+        """与其他测试类一致的结果列表视图（按需构建）"""
+        return [
+            {"test": name, "success": success, "message": message}
+            for name, success, message in zip(self.test_names, self.test_successes, self.test_messages)
+        ]
     
     def log_result(self, test_name: str, success: bool, message: str = ""):
         """记录测试结果"""
         status = "[OK]" if success else "[FAIL]"
-        self.test_results.append({
-            "test": test_name,
-            "success": success,
-            "message": message
-        })
+        self.test_names.append(test_name)
+        self.test_successes.append(success)
+        self.test_messages.append(message)
         print(f"{status} {test_name}: {message}")
     
     # ==================== 功能完整性测试 ====================
@@ -134,6 +158,14 @@ class TaskAPITester:
             self.log_result("获取任务详情（分页）", False, str(e))
             return False
     
+    async def _gather_gets(self, url: str, params_list: List[Dict]):
+        """用 httpx.AsyncClient 并发发出多个 GET，异常作为结果返回"""
+        async with httpx.AsyncClient(timeout=10) as client:
+            return await asyncio.gather(
+                *(client.get(url, params=params) for params in params_list),
+                return_exceptions=True,
+            )
+    
     def test_search_tasks(self) -> bool:
         """测试任务搜索功能"""
         try:
@@ -145,19 +177,31 @@ class TaskAPITester:
                 {"screenshot_name__like": "1762452600"},
             ]
             
-            success_count = 0
-            for search_params in search_tests:
-                url = f"{self.base_url}/api/tasks/paged"
-                params = {"page": 1, "page_size": 5, **search_params}
-                response = self.session.get(url, params=params)
-                if response.status_code == 200:
-                    success_count += 1
+            url = f"{self.base_url}/api/tasks/paged"
+            if self.thorough:
+                # 完整模式：各搜索条件单独请求（相互独立，并发发出）
+                params_list = [{"page": 1, "page_size": 5, **search_params} for search_params in search_tests]
+            else:
+                # 默认：所有条件合并为一次请求（服务端按 AND 组合各条件），一次往返验证全部参数都能被接受
+                combined = {"page": 1, "page_size": 5}
+                for search_params in search_tests:
+                    combined.update(search_params)
+                params_list = [combined]
+            if httpx is not None:
+                responses = asyncio.run(self._gather_gets(url, params_list))
+            else:
+                with ThreadPoolExecutor(max_workers=len(params_list)) as executor:
+                    responses = list(executor.map(lambda params: self.session.get(url, params=params), params_list))
+            success_count = sum(
+                1 for response in responses
+                if not isinstance(response, Exception) and response.status_code == 200
+            )
             
-            if success_count == len(search_tests):
-                self.log_result("任务搜索功能", True, f"所有搜索条件测试通过 ({success_count}/{len(search_tests)})")
+            if success_count == len(params_list):
+                self.log_result("任务搜索功能", True, f"所有搜索条件测试通过 ({success_count}/{len(params_list)})")
                 return True
             else:
-                self.log_result("任务搜索功能", False, f"部分搜索失败 ({success_count}/{len(search_tests)})")
+                self.log_result("任务搜索功能", False, f"部分搜索失败 ({success_count}/{len(params_list)})")
                 return False
         except Exception as e:
             self.log_result("任务搜索功能", False, str(e))
@@ -165,17 +209,52 @@ class TaskAPITester:
     
     # ==================== 并发测试 ====================
     
-    def test_concurrent_requests(self, num_threads: int = 20) -> bool:
-        """测试并发请求"""
-        print(f"\n=== 并发测试 ({num_threads} 个并发请求) ===")
+    async def _run_concurrent(self, num_requests: int):
+        """用 httpx.AsyncClient 并发请求任务列表，返回 (成功编号列表, 错误信息列表)"""
+        limits = httpx.Limits(max_connections=num_requests, max_keepalive_connections=num_requests)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=10) as client:
+            responses = await asyncio.gather(
+                *(client.get("/api/tasks/configs", params={"page": 1, "page_size": 5}) for _ in range(num_requests)),
+                return_exceptions=True,
+            )
         
         results = []
         errors = []
+        for request_id, response in enumerate(responses):
+            if isinstance(response, Exception):
+                errors.append(f"Thread {request_id}: {str(response)}")
+            elif response.status_code == 200:
+                results.append(request_id)
+            else:
+                errors.append(f"Thread {request_id}: Status {response.status_code}")
+        return results, errors
+    
+    def _run_concurrent_threads(self, num_threads: int):
+        """未安装 httpx 时用线程池并发请求，返回 (成功编号列表, 错误信息列表)"""
+        results = []
+        errors = []
+        url = f"{self.base_url}/api/tasks/configs"
+        params = {"page": 1, "page_size": 5}
+        
+        if FuturesSession is not None:
+            # 安装了 requests-futures 时直接在共享 Session 上提交全部请求，复用其连接池
+            with FuturesSession(session=self.session, max_workers=num_threads) as fsession:
+                futures = {fsession.get(url, params=params, timeout=10): i for i in range(num_threads)}
+                for future in as_completed(futures):
+                    thread_id = futures[future]
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        errors.append(f"Thread {thread_id}: {str(e)}")
+                        continue
+                    if response.status_code == 200:
+                        results.append(thread_id)
+                    else:
+                        errors.append(f"Thread {thread_id}: Status {response.status_code}")
+            return results, errors
         
         def make_request(thread_id: int):
             try:
-                url = f"{self.base_url}/api/tasks/configs"
-                params = {"page": 1, "page_size": 5}
                 response = self.session.get(url, params=params, timeout=10)
                 if response.status_code == 200:
                     results.append(thread_id)
@@ -187,12 +266,24 @@ class TaskAPITester:
                 errors.append(f"Thread {thread_id}: {str(e)}")
                 return False
         
-        start_time = time.time()
-        
         with ThreadPoolExecutor(max_workers=num_threads) as executor:
             futures = [executor.submit(make_request, i) for i in range(num_threads)]
             for future in as_completed(futures):
                 future.result()
+        return results, errors
+    
+    def test_concurrent_requests(self, num_threads: int = None) -> bool:
+        """测试并发请求（默认并发数为构造时的 num_threads）"""
+        num_threads = num_threads or self.num_threads
+        print(f"\n=== 并发测试 ({num_threads} 个并发请求) ===")
+        
+        start_time = time.time()
+        
+        if httpx is not None:
+            # 安装了 httpx 时在单个事件循环中并发发出全部请求
+            results, errors = asyncio.run(self._run_concurrent(num_threads))
+        else:
+            results, errors = self._run_concurrent_threads(num_threads)
         
         elapsed_time = time.time() - start_time
         
@@ -272,9 +363,11 @@ class TaskAPITester:
             success_count = 0
             for params in invalid_tests:
                 url = f"{self.base_url}/api/tasks/configs"
-                response = self.session.get(url, params=params, timeout=5)
+                # 只检查状态码：stream=True 只读响应头，不下载响应体（page_size=1000 时可能很大）
+                with self.session.get(url, params=params, timeout=5, stream=True) as response:
+                    status_code = response.status_code
                 # 应该返回错误或修正后的值
-                if response.status_code in [200, 400, 422]:
+                if status_code in [200, 400, 422]:
                     success_count += 1
             
             if success_count == len(invalid_tests):
@@ -305,7 +398,7 @@ class TaskAPITester:
         self.test_search_tasks()
         
         # 并发测试
-        self.test_concurrent_requests(num_threads=20)
+        self.test_concurrent_requests()
         
         # 安全测试
         self.test_sql_injection_protection()
@@ -316,8 +409,8 @@ class TaskAPITester:
         print("测试结果汇总")
         print("=" * 60)
         
-        total_tests = len(self.test_results)
-        passed_tests = sum(1 for r in self.test_results if r["success"])
+        total_tests = len(self.test_successes)
+        passed_tests = sum(self.test_successes)
         failed_tests = total_tests - passed_tests
         
         print(f"总测试数: {total_tests}")
@@ -327,30 +420,40 @@ class TaskAPITester:
         
         if failed_tests > 0:
             print("\n失败的测试:")
-            for result in self.test_results:
-                if not result["success"]:
-                    print(f"  - {result['test']}: {result['message']}")
+            for name, success, message in zip(self.test_names, self.test_successes, self.test_messages):
+                if not success:
+                    print(f"  - {name}: {message}")
         
         return failed_tests == 0
 
 
 if __name__ == "__main__":
+    # 直接运行脚本时 tests/ 位于 sys.path[0]；pytest 导入本模块时不会执行到这里
+    from _console import configure_utf8_output
+    configure_utf8_output()
+    
+    import argparse
     import sys
     
-    # 检查服务器是否运行
-    try:
-        response = requests.get(f"{BASE_URL}/healthz", timeout=2)
-        if response.status_code != 200:
-            print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+    parser = argparse.ArgumentParser(description="任务 API 集成测试")
+    parser.add_argument("--thorough", action="store_true", help="搜索条件逐个单独请求（默认合并为一次请求）")
+    args = parser.parse_args()
+    
+    # 检查服务器是否运行（由 run_tests.py 启动且已完成健康检查时跳过）
+    if os.getenv("TEST_SESSION_REUSE") != "1":
+        try:
+            response = requests.get(f"{BASE_URL}/healthz", timeout=2)
+            if response.status_code != 200:
+                print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+                print("请先启动服务器: python app/main.py")
+                sys.exit(1)
+        except requests.exceptions.RequestException:
+            print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
             print("请先启动服务器: python app/main.py")
             sys.exit(1)
-    except requests.exceptions.RequestException:
-        print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
-        print("请先启动服务器: python app/main.py")
-        sys.exit(1)
     
     # 运行测试
-    tester = TaskAPITester()
+    tester = TaskAPITester(thorough=args.thorough)
     success = tester.run_all_tests()
     
     sys.exit(0 if success else 1)
@@ -1,18 +1,9 @@
 """工具类 API 集成测试"""
+import os
 import sys
-import io
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import requests
-
-# 添加项目根目录到路径
-PROJECT_ROOT = Path(__file__).resolve().parent.parent
-if str(PROJECT_ROOT) not in sys.path:
-    sys.path.insert(0, str(PROJECT_ROOT))
-
-# 设置标准输出编码为 UTF-8（Windows 兼容）
-if sys.platform == 'win32':
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+from requests.adapters import HTTPAdapter
 
 # API 基础 URL
 BASE_URL = "http://localhost:8005"
@@ -24,6 +15,10 @@ class UtilsAPITester:
     def __init__(self, base_url: str = BASE_URL):
         self.base_url = base_url
         self.session = requests.Session()
+        # 各测试并发执行，连接池需容纳全部测试同时占用的连接，保持长连接复用
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.test_results = []
     
     def log_result(self, test_name: str, success: bool, message: str = ""):
@@ -162,11 +157,17 @@ class UtilsAPITester:
         
         # 功能完整性测试
         print("\n=== 功能完整性测试 ===")
-        self.test_healthz()
-        self.test_get_ocr_results()
-        self.test_image_proxy()
-        self.test_index_page()
-        self.test_hls_start()
+        # 各接口互不依赖，并发执行：HLS 启动最长可阻塞 30 秒，不再拖慢其余测试
+        tests = [
+            self.test_healthz,
+            self.test_get_ocr_results,
+            self.test_image_proxy,
+            self.test_index_page,
+            self.test_hls_start,
+        ]
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            for future in [executor.submit(test) for test in tests]:
+                future.result()
         
         # 汇总结果
         print("\n" + "=" * 60)
@@ -193,17 +194,22 @@ class UtilsAPITester:
 
 
 if __name__ == "__main__":
-    # 检查服务器是否运行
-    try:
-        response = requests.get(f"{BASE_URL}/healthz", timeout=2)
-        if response.status_code != 200:
-            print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+    # 直接运行脚本时 tests/ 位于 sys.path[0]；pytest 导入本模块时不会执行到这里
+    from _console import configure_utf8_output
+    configure_utf8_output()
+    
+    # 检查服务器是否运行（由 run_tests.py 启动且已完成健康检查时跳过）
+    if os.getenv("TEST_SESSION_REUSE") != "1":
+        try:
+            response = requests.get(f"{BASE_URL}/healthz", timeout=2)
+            if response.status_code != 200:
+                print(f"[FAIL] 服务器未正常运行 (状态码: {response.status_code})")
+                print("请先启动服务器: python app/main.py")
+                sys.exit(1)
+        except requests.exceptions.RequestException:
+            print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
             print("请先启动服务器: python app/main.py")
             sys.exit(1)
-    except requests.exceptions.RequestException:
-        print(f"[FAIL] 无法连接到服务器: {BASE_URL}")
-        print("请先启动服务器: python app/main.py")
-        sys.exit(1)
     
     # 运行测试
     tester = UtilsAPITester()
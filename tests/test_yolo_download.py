@@ -6,14 +6,19 @@
 import sys
 from pathlib import Path
 
-# 添加项目路径
-ROOT = Path(__file__).resolve().parent
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
+# 直接运行脚本时补充项目根目录；pytest 下由 tests/conftest.py 统一处理
+if __name__ == "__main__":
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def test_preload_model(yolo_model):
+    """模型经会话级夹具预加载（必要时下载到项目目录）后可用"""
+    assert yolo_model is not None
 
-from services.yolo_detector import preload_model
 
 if __name__ == "__main__":
+    from services.yolo_detector import preload_model
+
     print("=" * 60)
     print("YOLO 模型下载测试")
     print("=" * 60)
@@ -15,14 +15,12 @@ def update_schema():
     """添加 vehicle_features 字段到 parking_changes 表"""
     with engine.connect() as conn:
         try:
-            # 检查字段是否已存在
-            result = conn.execute(text("""
-                SELECT COLUMN_NAME 
-                FROM INFORMATION_SCHEMA.COLUMNS 
-                WHERE TABLE_SCHEMA = DATABASE() 
-                AND TABLE_NAME = 'parking_changes' 
-                AND COLUMN_NAME = 'vehicle_features'
-            """))
+            # 检查字段是否已存在（SHOW COLUMNS 直接读表定义，比扫描 INFORMATION_SCHEMA 快；
+            # LIKE 中 "_" 是通配符，需转义才能精确匹配字段名）
+            result = conn.execute(
+                text("SHOW COLUMNS FROM parking_changes LIKE :column"),
+                {"column": "vehicle_features".replace("_", "\\_")},
+            )
             exists = result.fetchone() is not None
             
             if exists:
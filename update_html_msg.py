@@ -1,11 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """临时脚本：更新HTML中的提示信息"""
+import re
 
-html_path = "app/static/index.html"
+from utils.file_utils import atomic_write_text
 
-with open(html_path, 'r', encoding='utf-8') as f:
-    content = f.read()
+html_path = "app/static/index.html"
 
 # 替换提示信息
 old_msg = '请先点击"搜索"加载车位变化数据。'
@@ -14,10 +14,16 @@ new_msg = '💡 提示：请先选择日期并点击"搜索"按钮加载车位
 old_style = 'style="font-size:12px; margin-bottom:8px;"'
 new_style = 'style="font-size:13px; margin-bottom:12px; padding:12px; background:rgba(148,163,184,0.1); border-radius:6px;"'
 
-content = content.replace(old_msg, new_msg)
-content = content.replace(old_style, new_style)
+# 两处替换合并为一次扫描：匹配任一旧文本，按匹配内容取对应的新文本
+replacements = {old_msg: new_msg, old_style: new_style}
+pattern = re.compile("|".join(re.escape(old) for old in replacements))
+
+with open(html_path, 'r', encoding='utf-8') as f:
+    content = f.read()
+
+content = pattern.sub(lambda m: replacements[m.group(0)], content)
 
-with open(html_path, 'w', encoding='utf-8') as f:
-    f.write(content)
+# 先写临时文件再原子替换（保留原文件权限），写入中途出错不会留下半个 HTML 文件
+atomic_write_text(html_path, content)
 
 print("HTML提示信息已更新")
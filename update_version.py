@@ -11,6 +11,11 @@ from datetime import datetime
 
 HTML_FILE = "app/static/index.html"
 
+# window.APP_VERSION = '...'
+_APP_VERSION_RE = re.compile(r"window\.APP_VERSION\s*=\s*['\"]([^'\"]+)['\"]")
+# JS 文件引用上的 ?v=YYYYMMDDHHMM
+_QV_RE = re.compile(r"(\?v=)(\d{12})")
+
 def update_version():
     """更新 index.html 中的版本号"""
     if not os.path.exists(HTML_FILE):
@@ -25,14 +30,12 @@ def update_version():
     new_version = datetime.now().strftime("%Y%m%d%H%M")
     
     # 替换 window.APP_VERSION
-    pattern1 = r"window\.APP_VERSION\s*=\s*['\"]([^'\"]+)['\"]"
     replacement1 = f"window.APP_VERSION = '{new_version}'"
-    content = re.sub(pattern1, replacement1, content)
+    content = _APP_VERSION_RE.sub(replacement1, content)
     
     # 替换所有 JS 文件的版本号 (?v=版本号)
-    pattern2 = r"(\?v=)(\d{12})"
     replacement2 = f"\\g<1>{new_version}"
-    content = re.sub(pattern2, replacement2, content)
+    content = _QV_RE.sub(replacement2, content)
     
     # 写入文件
     with open(HTML_FILE, 'w', encoding='utf-8') as f:
@@ -0,0 +1,28 @@
+"""文件写入工具函数"""
+import os
+import shutil
+import tempfile
+
+
+def atomic_write_text(path: str, content: str, encoding: str = "utf-8") -> None:
+    """
+    先写同目录临时文件再原子替换，写入中途出错不会留下半个文件。
+
+    mkstemp 创建的临时文件权限为 0600，替换前复制原文件的权限位，
+    避免目标文件（如 Web 服务读取的静态页）变成仅属主可读。
+
+    Args:
+        path: 目标文件路径
+        content: 要写入的文本
+        encoding: 文本编码
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(content)
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -1,7 +1,27 @@
 """路径处理工具函数"""
+import os
 from pathlib import Path
+from typing import Dict, Optional
+
 from app.core.config import SCREENSHOT_BASE
 
+# 截图根目录的字符串前缀（原始路径与解析符号链接后的路径各一份），导入时计算一次。
+# 列表接口每行图片都会调用 to_rel / build_image_url，绝大多数路径都在截图目录下，
+# 直接做字符串前缀匹配即可，无需每次 Path.resolve() 访问文件系统。
+_BASE_PREFIXES = tuple(dict.fromkeys(
+    os.path.normpath(str(base)) + os.sep
+    for base in (SCREENSHOT_BASE, SCREENSHOT_BASE.resolve())
+))
+
+
+def _lexical_rel(path: str) -> Optional[str]:
+    """绝对路径字符串在截图目录下时返回相对路径（posix 格式），否则返回 None"""
+    path = os.path.normpath(path)
+    for prefix in _BASE_PREFIXES:
+        if path.startswith(prefix):
+            return path[len(prefix):].replace(os.sep, "/")
+    return None
+
 
 def to_rel(p: Path) -> str:
     """
@@ -13,6 +33,11 @@ def to_rel(p: Path) -> str:
     Returns:
         相对路径字符串或绝对路径字符串
     """
+    if p.is_absolute():
+        rel = _lexical_rel(str(p))
+        if rel is not None:
+            return rel
+    # 相对路径或不在截图目录下：解析后再判断（可能经过符号链接）
     try:
         abs_path = p.resolve()
         rel = abs_path.relative_to(SCREENSHOT_BASE)
@@ -21,6 +46,19 @@ def to_rel(p: Path) -> str:
         return str(p)
 
 
+def scan_dir_files(dir_path: str) -> Dict[str, os.DirEntry]:
+    """
+    一次 os.scandir 列出目录下的文件，返回 {文件名: DirEntry}；目录不存在时返回空字典。
+    
+    批量判断同一目录下多张图片是否存在时，用一次目录扫描代替逐个 stat。
+    """
+    try:
+        with os.scandir(dir_path) as it:
+            return {entry.name: entry for entry in it if entry.is_file()}
+    except OSError:
+        return {}
+
+
 def build_image_url(p: Path) -> tuple[str, bool]:
     """
     构造图片可访问 URL；如果文件缺失，标记 missing。
@@ -35,8 +73,11 @@ def build_image_url(p: Path) -> tuple[str, bool]:
     if not p.is_absolute():
         p = SCREENSHOT_BASE / p
 
-    # 如果文件不存在且可能是相对路径，尝试再次拼接
-    missing = not p.exists()
+    path_str = str(p)
+    missing = not os.path.isfile(path_str)
+    rel = _lexical_rel(path_str)
+    if rel is not None:
+        return f"/shots/{rel}", missing
     try:
         abs_path = p.resolve()
         rel = abs_path.relative_to(SCREENSHOT_BASE)
@@ -44,4 +85,3 @@ def build_image_url(p: Path) -> tuple[str, bool]:
     except Exception:
         # 不在截图目录下，走代理端点
         return f"/api/image_proxy?path={p.as_posix()}", missing
-
@@ -0,0 +1,48 @@
+"""简单的进程内 TTL 缓存"""
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+def ttl_cache(seconds: float, method: bool = False) -> Callable:
+    """
+    带过期时间的结果缓存装饰器（线程安全）。
+
+    适合结果很少变化、但被频繁读取的小查询（如下拉框选项）。
+    被装饰的函数带有 cache_clear() 方法，数据变更时可立即失效。
+
+    Args:
+        seconds: 缓存有效期（秒），<= 0 时不缓存
+        method: 是否用于实例方法；为 True 时缓存键忽略第一个参数（self），所有实例共享缓存
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        cache: Dict[Hashable, Tuple[Any, float]] = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if seconds <= 0:
+                return func(*args, **kwargs)
+            key = (args[1:] if method else args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with lock:
+                entry = cache.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+            value = func(*args, **kwargs)
+            with lock:
+                cache[key] = (value, now + seconds)
+            return value
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
@@ -6,14 +6,29 @@
 
 import os
 import sys
+import time
 import psutil
 import multiprocessing
 from typing import Tuple, Optional
 
+from utils.simple_cache import ttl_cache
 
+# CPU 使用率最短采样窗口（秒）
+CPU_SAMPLE_MIN_INTERVAL = 0.1
+
+# 导入时先调用一次 cpu_percent(interval=None) 初始化 psutil 的计数基准，
+# 之后的调用直接返回距上次调用的平均使用率，不再阻塞等待采样
+try:
+    psutil.cpu_percent(interval=None)
+except Exception:
+    pass
+_cpu_primed_at = time.monotonic()
+
+
+@ttl_cache(5)
 def get_system_resources() -> dict:
     """
-    获取系统资源信息
+    获取系统资源信息（结果缓存 5 秒）
     
     Returns:
         dict: 包含 CPU 核心数、内存、可用内存等信息
@@ -34,9 +49,13 @@ def get_system_resources() -> dict:
         available_mem_gb = mem.available / (1024 ** 3)
         mem_usage_percent = mem.percent
         
-        # CPU 使用率（取平均值，采样间隔 1 秒）
+        # CPU 使用率（取自上次调用以来的平均值，非阻塞）
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            # 刚导入就调用时采样窗口太短，只补足剩余的等待时间
+            remaining = CPU_SAMPLE_MIN_INTERVAL - (time.monotonic() - _cpu_primed_at)
+            if remaining > 0:
+                time.sleep(remaining)
+            cpu_percent = psutil.cpu_percent(interval=None)
         except:
             cpu_percent = 0
         
@@ -1,4 +1,5 @@
 """任务相关工具函数"""
+import time
 from typing import Optional
 from app.core.config import TASK_STORE, RUNNING_KEYS, COMBO_SEM, MAX_COMBO_CONCURRENCY
 
@@ -53,12 +54,30 @@ def release_combo_semaphore():
 
 def add_running_key(key: str):
     """添加运行中的任务键"""
-    RUNNING_KEYS.add(key)
+    RUNNING_KEYS.setdefault(key, time.time())
+
+
+def try_add_running_key(key: str) -> bool:
+    """
+    原子地检查并添加运行中的任务键
+    
+    先 is_task_running 再 add_running_key 的两步调用之间，另一个线程可能抢先添加同一个键，
+    导致同一组合被重复启动；本函数用一次 dict.setdefault 完成检查和占用：
+    只有写入的正是本次调用创建的时间戳对象时才算占用成功。
+    
+    Args:
+        key: 任务键
+        
+    Returns:
+        True 表示添加成功（此前未运行），False 表示该键已在运行
+    """
+    started_at = time.time()
+    return RUNNING_KEYS.setdefault(key, started_at) is started_at
 
 
 def remove_running_key(key: str):
     """移除运行中的任务键"""
-    RUNNING_KEYS.discard(key)
+    RUNNING_KEYS.pop(key, None)
 
 
 def get_max_concurrency() -> int:
@@ -1,7 +1,9 @@
 import datetime
+import functools
 from typing import List, Tuple
 
 
+@functools.lru_cache(maxsize=1024)
 def parse_date(date_str: str) -> datetime.datetime:
     """Parse a date string (YYYY-MM-DD) to datetime at midnight."""
     return datetime.datetime.strptime(date_str, "%Y-%m-%d")
@@ -12,6 +14,7 @@ def to_unix(dt: datetime.datetime) -> int:
     return int(dt.timestamp())
 
 
+@functools.lru_cache(maxsize=1024)
 def generate_day_range(date_str: str) -> Tuple[int, int]:
     """Generate start and end unix timestamps for a given date."""
     start_dt = parse_date(date_str)
@@ -19,18 +22,26 @@ def generate_day_range(date_str: str) -> Tuple[int, int]:
     return to_unix(start_dt), to_unix(end_dt)
 
 
+@functools.lru_cache(maxsize=64)
+def _day_segments(
+    date_str: str, interval_minutes: int
+) -> Tuple[Tuple[int, int], ...]:
+    """Cached, immutable segment table for one (date, interval) pair."""
+    start_ts, end_ts = generate_day_range(date_str)
+    interval = interval_minutes * 60
+    return tuple(
+        (seg_start, min(seg_start + interval - 1, end_ts))
+        for seg_start in range(start_ts, end_ts + 1, interval)
+    )
+
+
 def generate_segments(
     date_str: str, interval_minutes: int = 10
 ) -> List[Tuple[int, int]]:
-    """Generate (start_ts, end_ts) tuples for the whole day."""
-    start_ts, end_ts = generate_day_range(date_str)
-    interval = interval_minutes * 60
+    """Generate (start_ts, end_ts) tuples for the whole day.
 
-    segments = []
-    current_start = start_ts
-    while current_start <= end_ts:
-        current_end = min(current_start + interval - 1, end_ts)
-        segments.append((current_start, current_end))
-        current_start += interval
-    return segments
+    The table for a given date/interval is computed once and reused;
+    callers get a fresh list they are free to modify.
+    """
+    return list(_day_segments(date_str, interval_minutes))
 